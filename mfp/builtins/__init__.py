@@ -1,18 +1,164 @@
+"""
+Builtin processor types
+
+register() makes every builtin type name known to MFPApp without
+importing the module that implements it. A module is imported (and
+its own register() called) the first time one of its types is created.
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import importlib
+import time
+
+from .. import log
+
+# names registered by each module's register(), in registration
+# order. Where two modules register the same name the later one wins.
+# test-builtins checks this against the modules themselves.
+builtin_names = {
+    "var": ("var", "message", "patch_message", "enum", "slidemeter", "text"),
+    "metro": ("metro", "throttle", "delay", "beatchase"),
+    "printformat": ("print", "format"),
+    "pyfunc": (
+        "get", "set!", "delete", "slice", "eval", "apply", "call", "func", "first",
+        "rest", "sort", "+", "-", "*", "/", "//", "%", "^", "**", "log", "exp", "log10",
+        "pow", "sin", "cos", "tan", "acos", "asin", "atan2", ">", "<", ">=", "<=", "==",
+        "!=", ">:", "<:", ">=:", "<=:", "==:", "!=:", "max", "min", "abs", "neg",
+        "phase", "not", "and", "or", "xor", "<<", ">>", "complex", "int", "float",
+        "tuple", "list", "type", "dict", "set", "str", "strip", "split", "index", "in",
+        "in:", "join", "startswith", "startswith:", "endswith", "endswith:", "now",
+        "datetime", "date"
+    ),
+    "audio": ("in~", "out~", "aud~"),
+    "osc": ("osc~",),
+    "sig": ("sig~",),
+    "route": ("route", "route=", "routecar", "routecar=", "case", "case="),
+    "trigger": ("trigger", "t"),
+    "inletoutlet": ("inlet", "outlet", "inlet~", "outlet~"),
+    "line": ("line~",),
+    "noise": ("noise~",),
+    "arith": ("+~", "-~", "*~", "/~", ">~", "<~"),
+    "file": ("file", "filename"),
+    "loop": ("for",),
+    "buffer": ("buffer~",),
+    "midi": ("midi_in", "midi_out", "midi_time", "midi.in", "midi.out", "midi.time"),
+    "note2freq": ("note2freq", "midi.note2freq"),
+    "plot": ("scatter", "bars", "histogram", "scope", "table"),
+    "listops": (
+        "pack", "unpack", "hodor", "zip", "append", "map", "filter", "sort", "slice",
+        "range"
+    ),
+    "ampl": ("ampl~",),
+    "snap": ("snap~",),
+    "biquad": ("biquad~", "hip~", "lop~", "bp~"),
+    "sendrcv": ("send", "recv", "s", "r", "send~", "recv~", "s~", "r~", "bus", "bus~"),
+    "phasor": ("phasor~",),
+    "radiogroup": ("radiogroup",),
+    "dbmath": ("db2a", "a2db"),
+    "plugin": ("plugin~",),
+    "loadbang": ("loadbang",),
+    "oscutils": ("osc_in", "osc_out"),
+    "delay": ("del~", "delblk~"),
+    "dispatch": ("dispatch", "baseclass"),
+    "latency": ("latency",),
+    "errtest": ("errtest~",),
+    "slew": ("slew~",),
+    "bitcombine": ("bitcombine", "bitsplit"),
+    "pulse": ("pulse~", "gate~"),
+    "pulsesel": ("pulsesel~",),
+    "stepseq": ("stepseq~",),
+    "vcq12": ("vcq12~",),
+    "vcfreq": ("vcfreq~",),
+    "hold": ("hold~", "track~", "sample~"),
+    "replay": ("replay",),
+    "breakpoint": ("bp",),
+    "faust": ("faust~",),
+    "messagerec": ("messagerec",),
+    "quantize": ("quantize",),
+}
+
+builtin_modules = list(builtin_names)
+
+# type name: module that provides it
+builtin_index = {
+    name: mod_name
+    for mod_name, names in builtin_names.items()
+    for name in names
+}
+
+# modules already imported and registered, and seconds each took
+load_times = {}
+
+# ctor that each loaded builtin name was registered with
+_provided = {}
+
+
+def load_module(mod_name):
+    """
+    Import builtin module 'mod_name' and register its types, leaving
+    alone any name that belongs to a later module or that was
+    registered by something other than a builtin
+    """
+    from ..mfp_app import MFPApp
+
+    if mod_name in load_times:
+        return True
+
+    app = MFPApp()
+    names = builtin_names.get(mod_name, ())
+    prev = {name: app.registry[name] for name in names if name in app.registry}
+
+    start = time.monotonic()
+    try:
+        mod = importlib.import_module("." + mod_name, __name__)
+        mod.register()
+    except Exception as e:
+        log.error(f"[builtins] Could not load module {mod_name}: {e}")
+        log.debug_traceback(e)
+        return False
+    load_times[mod_name] = time.monotonic() - start
+
+    for name in names:
+        prev_ctor = prev.get(name)
+        owned = builtin_index[name] == mod_name and (
+            name not in prev or _provided.get(name) is prev_ctor
+        )
+        if owned:
+            _provided[name] = app.registry[name]
+            app.lazy_registry.pop(name, None)
+        elif name in prev:
+            app.registry[name] = prev_ctor
+        else:
+            app.registry.pop(name, None)
+    return True
+
+
+def _loader(mod_name):
+    return lambda: load_module(mod_name)
 
-builtin_modules = [
-    "var", "metro", "printformat", "pyfunc", "audio", "osc",
-    "sig", "route", "trigger", "inletoutlet", "line", "noise",
-    "arith", "file", "loop", "buffer", "midi", "note2freq",
-    "plot", "listops", "ampl", "snap", "biquad", "sendrcv",
-    "phasor", "radiogroup", "dbmath", "plugin", "loadbang",
-    "oscutils", "delay", "dispatch", "latency", "errtest",
-    "slew", "bitcombine", "pulse", "pulsesel", "stepseq",
-    "vcq12", "vcfreq", "hold", "replay", "breakpoint", "faust",
-    "messagerec", "quantize"
-]
 
 def register():
-    import importlib
+    from ..mfp_app import MFPApp
+
+    app = MFPApp()
+    loaders = {mod_name: _loader(mod_name) for mod_name in builtin_names}
+    for name, mod_name in builtin_index.items():
+        if mod_name not in load_times:
+            app.register_lazy(name, loaders[mod_name])
+
+
+def register_all():
+    """
+    Import and register every builtin module now
+    """
+    register()
     for mod_name in builtin_modules:
-        mod = importlib.import_module("." + mod_name, "mfp.builtins")
-        mod.register()
+        load_module(mod_name)
+
+
+def __getattr__(name):
+    # builtins.<module> works whether or not it's been loaded yet
+    if name in builtin_names:
+        return importlib.import_module("." + name, __name__)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
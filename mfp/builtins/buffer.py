@@ -5,12 +5,9 @@ buffer.py:  Builtin POSIX shared memory buffer
 Copyright (c) Bill Gribble <grib@billgribble.com>
 '''
 
-import os
 import asyncio
 from threading import Thread
 
-from posix_ipc import SharedMemory
-
 import numpy
 from mfp import Bang, Uninit
 from mfp import log
@@ -19,6 +16,7 @@ from mfp.gui.param_info import ParamInfo, BitArray
 from mfp.processor import Processor
 from ..mfp_app import MFPApp
 from ..buffer_info import BufferInfo
+from ..shm_buffer import SharedBuffer
 from ..method import MethodCall
 
 
@@ -252,7 +250,7 @@ class Buffer(Processor):
             mfp_samplerate = MFPApp().samplerate
 
             if self.shm_obj is None:
-                self.shm_obj = SharedMemory(self.buf_id)
+                self.shm_obj = SharedBuffer(self.buf_id)
 
             log.debug(f"[export] Exporting {channels} channels at {mfp_samplerate} hz to file '{filename}'")
 
@@ -269,16 +267,10 @@ class Buffer(Processor):
                 return
 
             if export_file:
-                os.lseek(self.shm_obj.fd, 0, os.SEEK_SET)
-                data = os.read(self.shm_obj.fd, self.size * channels * self.FLOAT_SIZE)
-
                 # shm data is in column-major order, transpose before exporting
-                c_data = (
-                    numpy.fromstring(data, dtype=numpy.float32)
-                    .reshape((channels, self.size))
-                    .transpose()
+                c_data = numpy.ascontiguousarray(
+                    self.shm_obj.channels(channels, self.size).transpose()
                 )
-                c_data = numpy.ascontiguousarray(c_data)
 
                 try:
                     export_file.buffer_write(c_data, 'float32')
@@ -294,16 +286,17 @@ class Buffer(Processor):
 
     def _transfer_file_data(self):
         if self.shm_obj is None:
-            self.shm_obj = SharedMemory(self.buf_id)
+            self.shm_obj = SharedBuffer(self.buf_id)
 
         for channel in range(self.file_channels):
             if self.file_channels == 1:
-                byte_data = self.file_data.tobytes()
+                file_data = self.file_data
             else:
-                byte_data = self.file_data[:, channel].tobytes()
+                file_data = self.file_data[:, channel]
 
-            os.lseek(self.shm_obj.fd, self.offset(channel, 0), os.SEEK_SET)
-            os.write(self.shm_obj.fd, byte_data)
+            dest = self.shm_obj.channel(channel, self.size)
+            count = min(len(dest), len(file_data))
+            dest[:count] = file_data[:count]
 
     def set_channel_tooltips(self):
         self.doc_tooltip_inlet = [
@@ -355,7 +348,7 @@ class Buffer(Processor):
             need_props = True
         elif resp_id == self.RESP_BUFID:
             if self.shm_obj:
-                self.shm_obj.close_fd()
+                self.shm_obj.close()
                 self.shm_obj = None
             if self.obj_id in Buffer.registry:
                 del Buffer.registry[self.obj_id]
@@ -500,15 +493,13 @@ class Buffer(Processor):
         @slice() outputs some audio data as a message
         """
         if self.shm_obj is None:
-            self.shm_obj = SharedMemory(self.buf_id)
+            self.shm_obj = SharedBuffer(self.buf_id)
 
         start = max(0, min(start, self.size-1))
         end = max(0, min(end, self.size-1))
 
         try:
-            os.lseek(self.shm_obj.fd, self.offset(channel, start), os.SEEK_SET)
-            slc = os.read(self.shm_obj.fd, (end - start) * self.FLOAT_SIZE)
-            self.outlets[-2] = list(numpy.fromstring(slc, dtype=numpy.float32))
+            self.outlets[-2] = self.shm_obj.channel(channel, self.size, start, end).tolist()
         except Exception as e:
             import traceback
             tb = traceback.format_exc()
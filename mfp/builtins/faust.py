@@ -23,6 +23,11 @@ class Faust(Processor):
     RESP_DSP_INLETS = 1
     RESP_DSP_OUTLETS = 2
     RESP_COMPILED = 3
+    RESP_FACTORY_CACHE = 4
+    RESP_COMPILE_MS = 5
+
+    # how the DSP side got its compiled factory (RESP_FACTORY_CACHE)
+    FACTORY_SOURCES = {0: "compiled", 1: "shared", 2: "disk cache"}
 
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
         Processor.__init__(self, 1, 0, init_type, init_args, patch, scope, name, defs)
@@ -49,6 +54,10 @@ class Faust(Processor):
         self.faust_dsp_outlets = 0
         self.faust_initialized = []
 
+        # where the last compiled factory came from, and how long it took
+        self.faust_factory_source = None
+        self.faust_compile_ms = None
+
         # dsp inlets and outlets are dynamically created to match the
         # Faust process
         self.dsp_inlets = []
@@ -151,6 +160,10 @@ class Faust(Processor):
         elif resp_id == self.RESP_PARAM:
             if resp_value not in self.faust_params:
                 self.faust_params.append(resp_value)
+        elif resp_id == self.RESP_FACTORY_CACHE:
+            self.faust_factory_source = self.FACTORY_SOURCES.get(resp_value)
+        elif resp_id == self.RESP_COMPILE_MS:
+            self.faust_compile_ms = resp_value
 
         if io_conf and "inlets" in self.faust_initialized and "outlets" in self.faust_initialized:
             inlets = self.faust_dsp_inlets + len(self.faust_params)
@@ -174,6 +187,23 @@ class Faust(Processor):
             )
             self.set_channel_tooltips()
 
+    def tooltip_info(self, port_dir=None, port_num=None, details=False):
+        info = super().tooltip_info(port_dir, port_num, details)
+        if self.faust_factory_source is not None:
+            info['faust_factory'] = dict(
+                source=self.faust_factory_source,
+                cache_hit=(self.faust_factory_source != "compiled"),
+                compile_ms=self.faust_compile_ms
+            )
+        return info
+
+    def tooltip_extra(self):
+        if self.faust_factory_source is None:
+            return False
+        return "<b>Faust factory:</b> %s in %.1f ms" % (
+            self.faust_factory_source, self.faust_compile_ms or 0
+        )
+
     async def trigger(self):
         for inlet_num, value in enumerate(self.inlets):
             if value != Uninit:
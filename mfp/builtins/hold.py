@@ -13,6 +13,7 @@ class TrackHold(Processor):
     doc_tooltip_obj = "Track and hold"
     doc_tooltip_inlet = ["Signal input", "Hold signal"]
     doc_tooltip_outlet = ["Signal output", "Sample output"]
+    dsp_level_responses = (0,)
 
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
         Processor.__init__(self, 2, 2, init_type, init_args, patch, scope, name, defs)
@@ -47,6 +48,7 @@ class SampleHold(Processor):
     doc_tooltip_obj = "Sample and hold"
     doc_tooltip_inlet = ["Signal input", "Hold signal"]
     doc_tooltip_outlet = ["Signal output", "Sample output"]
+    dsp_level_responses = (0,)
 
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
         Processor.__init__(self, 2, 2, init_type, init_args, patch, scope, name, defs)
@@ -5,6 +5,7 @@ builtins/messagerec.py: Record/playback for message sequences
 Copyright (c) Bill Grbble <grib@billgribble.com>
 '''
 
+from bisect import bisect_right
 from datetime import datetime
 from mfp import log
 from mfp.bang import Uninit
@@ -20,6 +21,60 @@ class RecEvent:
         self.first_play = first_play
 
 
+class RecTimeline:
+    """
+    Recorded events in beat order, with a parallel list of beats so
+    that the events due in a window of beats can be found by bisection.
+    The play cursor remembers where the last window ended, so the next
+    tick usually starts from there without searching
+    """
+    def __init__(self):
+        self.beats = []
+        self.events = []
+        self.cursor = 0
+
+    def __len__(self):
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+    def clear(self):
+        self.beats = []
+        self.events = []
+        self.cursor = 0
+
+    def insert(self, event):
+        # after any events already on the same beat
+        pos = bisect_right(self.beats, event.beat)
+        self.beats.insert(pos, event.beat)
+        self.events.insert(pos, event)
+        if pos < self.cursor:
+            self.cursor += 1
+
+    def _first_after(self, beat):
+        if beat is None:
+            return 0
+        beats = self.beats
+        cursor = self.cursor
+        if (
+            (cursor == 0 or beats[cursor - 1] <= beat)
+            and (cursor == len(beats) or beats[cursor] > beat)
+        ):
+            return cursor
+        return bisect_right(beats, beat)
+
+    def window(self, after, upto):
+        """
+        Events with after < beat <= upto ('after' of None means from
+        the start). The play cursor is left at the end of the window
+        """
+        first = self._first_after(after)
+        last = bisect_right(self.beats, upto, lo=first)
+        self.cursor = last
+        return self.events[first:last]
+
+
 class MessageRec(Processor):
     doc_tooltip_obj = "Message recorder"
     doc_tooltip_inlet = ["Values/control", "Clock"]
@@ -30,7 +85,7 @@ class MessageRec(Processor):
         extra = defs or {}
         _, _ = self.parse_args(init_args, **extra)
 
-        self.messages = []
+        self.messages = RecTimeline()
         self.clock_tempo_ts_timestamp = None
         self.clock_tempo_ts_beat = None
         self.clock_tempo_ms = None
@@ -46,7 +101,7 @@ class MessageRec(Processor):
         self.rec_state = new_state
 
     def clear(self):
-        self.messages = []
+        self.messages.clear()
 
     def play(self):
         self.play_state = True
@@ -91,7 +146,7 @@ class MessageRec(Processor):
 
             if isinstance(msg, (list, tuple)):
                 for e in msg:
-                    self.messages.append(
+                    self.messages.insert(
                         RecEvent(e[0], rightnow, e[1], False)
                     )
             else:
@@ -105,10 +160,7 @@ class MessageRec(Processor):
                         )
                     beat_fraction = ms_since_clock / self.clock_tempo_ms
                 newevent = RecEvent(self.clock_beat + beat_fraction, rightnow, msg, True)
-                self.messages.append(newevent)
-            self.messages.sort(
-                key=lambda ev: (ev.beat, ev.timestamp, ev.event)
-            )
+                self.messages.insert(newevent)
 
         # we want to emit any events that are "due" when quantized to
         # the current clock. To make this sound natural, we want to
@@ -121,27 +173,23 @@ class MessageRec(Processor):
             # could probably be as much as .5
             fudge = 0.25 * self.clock_tick_ms / self.clock_tempo_ms
 
-        def test_beat(beat):
+        pending = []
+        if clock_arrived:
             if self.clock_beat > clock_starting:
                 # normal case: clock is moving forward
-                return (
-                    clock_starting < beat <= (self.clock_beat + fudge)
-                )
+                due = self.messages.window(clock_starting, self.clock_beat + fudge)
             else:
-                # edge case: clock wrapped around
-                return (
-                    (beat > clock_starting and beat <= clock_starting + 1)
-                    or beat <= (self.clock_beat + fudge)
+                # edge case: clock wrapped around. The end of the old
+                # loop, then the start of the new one
+                due = self.messages.window(clock_starting, clock_starting + 1)
+                seen = set(id(m) for m in due)
+                due.extend(
+                    m for m in self.messages.window(None, self.clock_beat + fudge)
+                    if id(m) not in seen
                 )
 
-        pending = []
-        if clock_arrived:
-            pending = [
-                m for m in self.messages if not m.first_play and test_beat(m.beat)
-            ]
-            already_played = [
-                m for m in self.messages if m.first_play and test_beat(m.beat)
-            ]
+            pending = [m for m in due if not m.first_play]
+            already_played = [m for m in due if m.first_play]
             pending.sort(key=lambda e: (0 if e.beat >= clock_starting else 1, e.beat))
             for p in already_played:
                 p.first_play = False
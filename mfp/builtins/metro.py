@@ -5,10 +5,9 @@ metro.py: Metronome control processor
 Copyright (c) 2010-2016 Bill Gribble <grib@billgribble.com>
 '''
 
-from ..timer import MultiTimer
+from ..timer import MultiTimer, Clock
 from ..processor import Processor
 from ..mfp_app import MFPApp
-from datetime import datetime, timedelta
 from .. import Bang, Uninit
 from mfp import log
 
@@ -34,17 +33,17 @@ class Throttle (Processor):
         self.queue = []
 
         if Throttle._timer is None:
-            Throttle._timer = MultiTimer()
+            Throttle._timer = MultiTimer("throttle")
 
         extra=defs or {}
         parsed_args, kwargs = self.parse_args(init_args, **extra)
 
         if len(parsed_args):
-            self.interval = timedelta(milliseconds=int(parsed_args[0]))
+            self.interval = int(parsed_args[0]) / 1000.0
 
     async def trigger(self):
         if self.inlets[1] is not Uninit:
-            self.interval = timedelta(milliseconds=int(self.inlets[1]))
+            self.interval = int(self.inlets[1]) / 1000.0
             self.inlets[1] = Uninit
 
         if isinstance(self.inlets[0], TimerTick):
@@ -59,7 +58,7 @@ class Throttle (Processor):
         elif self.started:
             self.queue.append(self.inlets[0])
         else:
-            self.started = datetime.now()
+            self.started = MultiTimer.now()
             self.count = 1
             self._timer.schedule(self.started + self.interval, self.timer_cb)
             self.outlets[0] = self.inlets[0]
@@ -81,23 +80,23 @@ class Delay (Processor):
         self.delay = False
 
         if Delay._timer is None:
-            Delay._timer = MultiTimer()
+            Delay._timer = MultiTimer("delay")
 
         extra=defs or {}
         parsed_args, kwargs = self.parse_args(init_args, **extra)
 
         if len(parsed_args):
-            self.delay = timedelta(milliseconds=int(parsed_args[0]))
+            self.delay = int(parsed_args[0]) / 1000.0
 
     async def trigger(self):
         if self.inlets[1] is not Uninit:
-            self.delay = timedelta(milliseconds=int(self.inlets[1]))
+            self.delay = int(self.inlets[1]) / 1000.0
             self.inlets[1] = Uninit
 
         if isinstance(self.inlets[0], TimerTick):
             self.outlets[0] = self.inlets[0].payload
         else:
-            self._timer.schedule(datetime.now() + self.delay, self.timer_cb, [self.inlets[0]])
+            self._timer.schedule(MultiTimer.now() + self.delay, self.timer_cb, [self.inlets[0]])
             self.started = False
 
     async def timer_cb(self, data):
@@ -105,10 +104,12 @@ class Delay (Processor):
 
 
 class Metro (Processor):
-    doc_tooltip_obj = "Emit a Bang at specified interval"
+    doc_tooltip_obj = ("Emit a Bang at specified interval. With lookahead=<ms>, "
+                       + "fire early and report the exact tick time on outlet 1")
     doc_tooltip_inlet = ["Control input (True/Bang/nonzero to start, False/None/zero to stop)",
                          "Interval between Bang (ms) (default: initarg 0)" ]
-    doc_tooltip_outlet = ["Metronome output"]
+    doc_tooltip_outlet = ["Metronome output",
+                          "Tick time, CLOCK_MONOTONIC microseconds (lookahead mode only)"]
     _timer = None
 
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
@@ -117,45 +118,73 @@ class Metro (Processor):
         self.started = False
         self.interval = False
         self.count = 0
+        self.lookahead = 0
+        self.tick_time = None
+        self.pending = None
 
         if Metro._timer is None:
-            Metro._timer = MultiTimer()
+            Metro._timer = MultiTimer("metro")
 
         extra=defs or {}
         parsed_args, kwargs = self.parse_args(init_args, **extra)
 
         if len(parsed_args):
-            self.interval = timedelta(milliseconds=int(parsed_args[0]))
+            self.interval = int(parsed_args[0]) / 1000.0
+
+        if kwargs.get("lookahead"):
+            self.lookahead = kwargs.get("lookahead") / 1000.0
+            self.resize(2, 2)
+
+    def schedule_tick(self):
+        # ticks are always computed from the start time, so
+        # lateness of one tick doesn't push back the next one
+        self.tick_time = self.started + self.count * self.interval
+        self.pending = self._timer.schedule(self.tick_time - self.lookahead, self.timer_cb)
+
+    def cancel_tick(self):
+        if self.pending is not None:
+            self._timer.cancel(self.pending)
+            self.pending = None
+
+    def output_tick(self, tick_time):
+        self.outlets[0] = Bang
+        if self.lookahead:
+            self.outlets[1] = Clock.timestamp(tick_time)
 
     async def trigger(self):
         if self.inlets[1] is not Uninit:
-            self.interval = timedelta(milliseconds=int(self.inlets[1]))
+            self.interval = int(self.inlets[1]) / 1000.0
             self.inlets[1] = Uninit
             if self.started:
-                self.started = datetime.now()
+                self.started = MultiTimer.now()
                 self.count = 0
 
         if isinstance(self.inlets[0], TimerTick):
             if self.started:
-                self.outlets[0] = Bang
+                self.output_tick(self.tick_time)
                 self.count += 1
-                self._timer.schedule(self.started + self.count * self.interval, self.timer_cb)
+                self.schedule_tick()
         elif self.inlets[0]:
-            self.started = datetime.now()
+            self.cancel_tick()
+            self.started = MultiTimer.now()
             self.count = 1
-            self._timer.schedule(self.started + self.interval, self.timer_cb)
-            self.outlets[0] = Bang
+            self.output_tick(self.started)
+            self.schedule_tick()
         else:
+            self.cancel_tick()
             self.started = False
 
     async def timer_cb(self):
         await self.send(TimerTick())
 
 class BeatChase (Processor):
-    doc_tooltip_obj = "Chase a series of bangs, potentially adjusting timing"
+    doc_tooltip_obj = ("Chase a series of bangs, potentially adjusting timing. "
+                       + "With lookahead=<ms>, fire early and report the exact tick time on outlet 1")
     doc_tooltip_inlet = ["Bang/True/False to chase/start/stop",
                          "Multiplier of beat (higher is faster)",
                          "Beat slip (milliseconds)"]
+    doc_tooltip_outlet = ["Beat output",
+                          "Tick time, CLOCK_MONOTONIC microseconds (lookahead mode only)"]
     _timer = None
 
     RUNNING = 2
@@ -170,34 +199,39 @@ class BeatChase (Processor):
         self.chase_interval = False
         self.multiplier = 1.0
         self.interval = None
-        self.slip = timedelta()
+        self.slip = 0.0
         self.baseline_count = 0
         self.baseline_time = False
+        self.lookahead = 0
+        self.tick_time = None
+        self.pending = None
 
         if BeatChase._timer is None:
-            BeatChase._timer = MultiTimer()
+            BeatChase._timer = MultiTimer("beatchase")
 
         extra=defs or {}
         parsed_args, kwargs = self.parse_args(init_args, **extra)
         if len(parsed_args) > 1:
-            self.slip = timedelta(milliseconds=parsed_args[1])
+            self.slip = parsed_args[1] / 1000.0
         if len(parsed_args) > 0:
             self.multiplier = parsed_args[0]
 
-    async def trigger(self):
-        def interval_div(intvl, divisor):
-            ts = intvl.total_seconds() / float(divisor)
-            int_sec = int(ts)
-            frac_sec = ts - int_sec
-            return timedelta(seconds=int_sec, microseconds=int(frac_sec * 1000000))
-        def interval_mul(intvl, mult):
-            ts = intvl.total_seconds() * float(mult)
-            int_sec = int(ts)
-            frac_sec = ts - int_sec
-            return timedelta(seconds=int_sec, microseconds=int(frac_sec * 1000000))
+        if kwargs.get("lookahead"):
+            self.lookahead = kwargs.get("lookahead") / 1000.0
+            self.resize(3, 2)
+
+    def schedule_tick(self, tick_time):
+        self.tick_time = tick_time
+        self.pending = self._timer.schedule(tick_time - self.lookahead, self.timer_cb)
 
+    def output_tick(self, tick_time):
+        self.outlets[0] = Bang
+        if self.lookahead:
+            self.outlets[1] = Clock.timestamp(tick_time)
+
+    async def trigger(self):
         if self.inlets[2] is not Uninit:
-            self.slip = timedelta(milliseconds=int(self.inlets[2]))
+            self.slip = int(self.inlets[2]) / 1000.0
             self.inlets[2] = Uninit
 
         ticker = self.inlets[0]
@@ -208,33 +242,34 @@ class BeatChase (Processor):
             if self.inlets[1] is not Uninit:
                 self.baseline_count *= (1.0 * self.inlets[1] / self.multiplier)
                 self.multiplier = self.inlets[1]
-                self.interval = interval_div(self.chase_interval, self.multiplier)
+                self.interval = self.chase_interval / float(self.multiplier)
                 self.inlets[1] = Uninit
 
             if self.run:
-                self.outlets[0] = Bang
-                self._timer.schedule(self.baseline_time + self.slip
-                                     + interval_mul(self.interval, self.baseline_count),
-                                     self.timer_cb)
+                self.output_tick(self.tick_time)
+                self.schedule_tick(self.baseline_time + self.slip
+                                   + self.interval * self.baseline_count)
         elif isinstance(ticker, type(Bang)):
-            bangtime = datetime.now()
+            bangtime = MultiTimer.now()
             if self.chase_lastbang:
                 self.chase_interval = bangtime - self.chase_lastbang
-                self.interval = interval_div(self.chase_interval, self.multiplier)
+                self.interval = self.chase_interval / float(self.multiplier)
                 self.chase_lastbang = bangtime
                 if self.run == BeatChase.STARTING:
                     self.baseline_time = self.chase_lastbang
                     self.baseline_count = 1
                     self.run = BeatChase.RUNNING
-                    deadline = self.baseline_time + self.slip + self.interval
-                    self._timer.schedule(deadline, self.timer_cb)
-                    self.outlets[0] = Bang
+                    self.output_tick(bangtime)
+                    self.schedule_tick(self.baseline_time + self.slip + self.interval)
             else:
                 self.chase_lastbang = bangtime
         elif ticker:
             self.run = BeatChase.STARTING
         else:
             self.run = BeatChase.STOPPED
+            if self.pending is not None:
+                self._timer.cancel(self.pending)
+                self.pending = None
 
     async def timer_cb(self):
         await self.send(TimerTick())
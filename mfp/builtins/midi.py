@@ -5,7 +5,6 @@ p_midi.py: builtins for MIDI I/O
 Copyright (c) 2012 Bill Gribble <grib@billgribble.com>
 '''
 
-import asyncio
 import copy
 
 from mfp import log
@@ -17,7 +16,7 @@ from ..midi import (
     Note, NoteOn, NoteOff, NotePress,
     MidiCC, MidiPgmChange, MidiUndef,
     MidiClock, MidiPitchbend, MidiStart, MidiStop, MidiContinue,
-    MidiQFrame, MidiSysex, MidiSPP, MidiTimeSignature
+    MidiQFrame, MidiSysex, MidiSPP, MidiTimeSignature, MidiRealtime
 )
 
 event_types = (
@@ -41,29 +40,24 @@ class MidiIn (Processor):
         extra = defs or {}
         initargs, kwargs = self.parse_args(init_args, **extra)
 
+        # inline=True: the MIDI reader waits for each event's patch
+        # processing before reading the next event
+        self.inline = bool(kwargs.pop("inline", False))
+
         if kwargs:
             self.handler = MFPApp().midi_mgr.register(
-                lambda event, data: asyncio.run_coroutine_threadsafe(
-                    self.send(event, data),
-                    MFPApp().midi_mgr.event_loop
-                ),
-                0, kwargs
+                self.send, 0, kwargs, inline=self.inline
             )
             self.midi_filters = copy.copy(kwargs)
         else:
             self.handler = MFPApp().midi_mgr.register(
-                lambda event, data: asyncio.run_coroutine_threadsafe(
-                    self.send(event, data),
-                    MFPApp().midi_mgr.event_loop
-                ),
-                0
+                self.send, 0, inline=self.inline
             )
 
     def filter(self, **filters):
         MFPApp().midi_mgr.unregister(self.handler)
         self.handler = MFPApp().midi_mgr.register(
-            lambda event, data: asyncio.create_task(self.send(event, data)),
-            0, filters
+            self.send, 0, filters, inline=self.inline
         )
         self.midi_filters = copy.copy(filters)
 
@@ -102,8 +96,11 @@ class MidiOut (Processor):
         elif isinstance(event, MethodCall):
             self.method(event, 0)
         elif isinstance(event, event_types):
+            # the event may be shared with other objects (or be a
+            # MidiRealtime flyweight), so send a copy
+            event = event.copy()
             event.port = self.port
-            if self.channel is not None:
+            if self.channel is not None and not isinstance(event, MidiRealtime):
                 event.channel = self.channel
             await MFPApp().midi_mgr.send(self.port, event)
 
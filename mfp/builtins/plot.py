@@ -5,12 +5,17 @@ plot.py: Stub for graphical plot I/O
 Copyright (c) Bill Gribble <grib@billgribble.com>
 '''
 
+import asyncio
 import inspect
 from datetime import datetime
+
+import numpy as np
+
 from ..processor import Processor
 from ..mfp_app import MFPApp
 from .. import Bang, Uninit
 from ..method import MethodCall
+from ..point_store import PointStore, decimate, pack_points
 
 from .buffer import BufferInfo
 from mfp import log
@@ -86,8 +91,24 @@ class Scatter (Processor):
             channels = initargs[0]
         else:
             channels = 1
+        # keep only the newest max_points points of each curve, and
+        # only points within max_seconds of the newest
+        self.max_points = kwargs.get("max_points")
+        self.max_seconds = kwargs.get("max_seconds")
+
+        # stream=True sends points to the GUI in batches, once per GUI
+        # frame. decimate=True (or a number of columns) also thins each
+        # batch to the lowest and highest point per pixel column
+        self.decimate = kwargs.get("decimate")
+        self.stream = bool(kwargs.get("stream") or self.decimate)
+        self.stream_pending = {}
+        self.stream_handle = None
+
         self.hot_inlets = list(range(channels))
-        self.gui_params = dict(plot_type=init_type, channels=channels)
+        self.gui_params = dict(
+            plot_type=init_type, channels=channels,
+            max_points=self.max_points, max_seconds=self.max_seconds
+        )
 
         self.doc_tooltip_inlet = []
         for i in range(channels):
@@ -113,6 +134,54 @@ class Scatter (Processor):
             MFPApp().async_task(MFPApp().gui_command.command(self.obj_id, action, data))
         return True
 
+    def _stream_add(self, curve, point):
+        xs, ys = self.stream_pending.setdefault(curve, ([], []))
+        xs.append(float(point[0]))
+        ys.append(float(point[1]))
+        if self.stream_handle is None:
+            loop = asyncio.get_event_loop()
+            rate = MFPApp().gui_update_rate
+            if rate:
+                self.stream_handle = loop.call_later(1.0 / rate, self._stream_flush)
+            else:
+                self.stream_handle = loop.call_soon(self._stream_flush)
+
+    def _stream_cancel(self):
+        if self.stream_handle is not None:
+            self.stream_handle.cancel()
+            self.stream_handle = None
+        self.stream_pending = {}
+
+    def _stream_flush(self):
+        self.stream_handle = None
+        pending = self.stream_pending
+        self.stream_pending = {}
+        if not self.gui_created or not pending:
+            return
+
+        columns = None
+        if self.decimate:
+            columns = self.decimate
+            if columns is True:
+                columns = self.gui_params.get('width') or 320
+        x_min = self.gui_params.get('x_min')
+        x_max = self.gui_params.get('x_max')
+
+        batch = {}
+        for curve, (xs, ys) in pending.items():
+            xs = np.array(xs, dtype=np.float64)
+            ys = np.array(ys, dtype=np.float64)
+            if columns:
+                if x_min is not None and x_max is not None and x_max > x_min:
+                    span = x_max - x_min
+                else:
+                    span = xs.max() - xs.min()
+                keep = decimate(xs, ys, span / columns)
+                xs = xs[keep]
+                ys = ys[keep]
+            batch[curve] = pack_points(xs, ys)
+        self._chartconf('points', batch)
+
     async def trigger(self):
         points = {}
 
@@ -125,15 +194,21 @@ class Scatter (Processor):
             elif isinstance(val, (float, int)):
                 v = (self._time(), val)
             if v is not None:
-                cpts = self.points.setdefault(i, [])
-                cpts.append(v)
-                cpts = points.setdefault(i, [])
-                cpts.append(v)
+                store = self.points.get(i)
+                if store is None:
+                    store = self.points[i] = PointStore(self.max_points, self.max_seconds)
+                store.append(v[0], v[1])
+                if self.stream:
+                    self._stream_add(i, v)
+                else:
+                    cpts = points.setdefault(i, [])
+                    cpts.append(v)
             return v
 
         for i, val in zip(range(len(self.inlets)), self.inlets):
             if val == Bang:
-                self.outlets[0] = self.points[i]
+                store = self.points.get(i)
+                self.outlets[0] = store.points() if store else []
 
             elif isinstance(val, list):
                 for elt in val:
@@ -165,12 +240,14 @@ class Scatter (Processor):
     def clearall(self, *args, **kwargs):
         '''Clear all data points'''
         self.points = {}
+        self._stream_cancel()
         return self._chartconf('clear')
 
     def clear(self, inlet=0):
         '''Clear a single curve's points'''
         if inlet is not None and inlet in self.points:
             del self.points[inlet]
+        self.stream_pending.pop(inlet, None)
         return self._chartconf('clear', inlet)
 
     def style(self, **kwargs):
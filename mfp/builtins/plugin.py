@@ -9,6 +9,7 @@ Copyright (c) 2013 Bill Gribble <grib@billgribble.com>
 from ..processor import Processor
 from ..mfp_app import MFPApp
 from ..bang import Uninit
+from .. import log
 
 
 class Plugin(Processor):
@@ -48,6 +49,9 @@ class Plugin(Processor):
 
     def init_plugin(self, pname):
         pinfo = MFPApp().pluginfo.find(pname)
+        if pinfo is None:
+            log.error(f"[plugin~] No LADSPA plugin '{pname}' found")
+            return
         self.plug_info = pinfo
         self.lib_name = pinfo.get("lib_name")
         self.lib_index = pinfo.get("lib_index")
@@ -91,5 +95,17 @@ class Plugin(Processor):
         await self.dsp_setparam("plug_control", self.plug_control)
 
 
+async def create_plugin(init_type, init_args, patch, scope, name, defs=None):
+    # the plugin index may still be building; wait for just this entry
+    extra = defs or {}
+    initargs, kwargs = patch.parse_args(init_args, **extra)
+    if len(initargs):
+        await MFPApp().find_plugin(initargs[0])
+    return Plugin(init_type, init_args, patch, scope, name, defs)
+
+
+create_plugin.doc_tooltip_obj = Plugin.doc_tooltip_obj
+
+
 def register():
-    MFPApp().register("plugin~", Plugin)
+    MFPApp().register("plugin~", create_plugin)
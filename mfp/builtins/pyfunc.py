@@ -46,7 +46,7 @@ class CallFunction(Processor):
             self.arity = initargs[0]
             self.resize(self.arity + 1, 1)
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[0] is not Bang:
             self.thunk = self.inlets[0]
 
@@ -70,7 +70,7 @@ class ApplyMethod(Processor):
         if len(initargs):
             self.method_name = str(initargs[0])
 
-    async def trigger(self):
+    def trigger(self):
         pargs = None
         kargs = None
 
@@ -111,7 +111,7 @@ class GetElement(Processor):
         if len(initargs):
             self.elements = initargs
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             self.elements = self.inlets[1]
             if not isinstance(self.inlets[1], list):
@@ -185,7 +185,7 @@ class SetElement(Processor):
         if len(initargs):
             self.element = initargs[0]
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             element = self.inlets[1]
         else:
@@ -253,7 +253,7 @@ class DeleteElement(Processor):
         if len(initargs):
             self.elements = initargs
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             self.elements = self.inlets[1]
             if not isinstance(self.inlets[1], list):
@@ -300,7 +300,7 @@ class GetSlice(Processor):
         if len(initargs):
             self.slice_start = initargs[0]
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             self.slice_start = self.inlets[1]
 
@@ -332,7 +332,7 @@ class PyEval(Processor):
         if len(initargs):
             self.bindings = initargs[0]
 
-    async def trigger(self):
+    def trigger(self):
         if isinstance(self.inlets[0], MethodCall):
             self.inlets[0].call(self)
         else:
@@ -368,7 +368,7 @@ class PyFunc(Processor):
 
         Processor.__init__(self, self.argcount or 1, 1, init_type, init_args, patch, scope, name, defs)
 
-    async def trigger(self):
+    def trigger(self):
         if isinstance(self.inlets[0], MethodCall):
             self.inlets[0].call(self)
         elif self.argcount:
@@ -403,7 +403,7 @@ class PyAutoWrap(Processor):
             if index < len(self.inlets):
                 self.inlets[index+1] = arg
 
-    async def trigger(self):
+    def trigger(self):
         if isinstance(self.inlets[0], MethodCall):
             self.inlets[0].call(self)
         elif self.argcount:
@@ -436,7 +436,7 @@ class PyCompareRoute(Processor):
         if len(initargs) == 1:
             self.inlets[1] = initargs[0]
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             cmpval = bool(self.function(self.inlets[0], self.inlets[1]))
         else:
@@ -463,7 +463,7 @@ class PyBinary(Processor):
         if len(initargs) == 1:
             self.inlets[1] = initargs[0]
 
-    async def trigger(self):
+    def trigger(self):
         if self.inlets[1] is not Uninit:
             self.outlets[0] = self.function(self.inlets[0], self.inlets[1])
         else:
@@ -480,7 +480,7 @@ class PyUnary(Processor):
         if self.function.__doc__:
             self.doc_tooltip_obj = self.function.__doc__.split("\n")[0]
 
-    async def trigger(self):
+    def trigger(self):
         self.outlets[0] = self.function(self.inlets[0])
 
 class PyNullary(Processor):
@@ -491,7 +491,7 @@ class PyNullary(Processor):
         if self.function.__doc__:
             self.doc_tooltip_obj = self.function.__doc__.split("\n")[0]
 
-    async def trigger(self):
+    def trigger(self):
         self.outlets[0] = self.function()
 
 
@@ -5,10 +5,11 @@ replay.py: Metronome control processor
 Copyright (c) Bill Gribble <grib@billgribble.com>
 '''
 
+from bisect import bisect_right
+
 from ..timer import MultiTimer
 from ..processor import Processor
 from ..mfp_app import MFPApp
-from datetime import datetime, timedelta
 from .. import Bang, Uninit
 from mfp import log
 
@@ -24,87 +25,130 @@ class Replay (Processor):
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
         Processor.__init__(self, 1, 1, init_type, init_args, patch, scope, name, defs)
 
+        # [payload, offset] in offset order, with the offsets alone
+        # in a parallel list for bisect
         self.buffer = []
+        self.offsets = []
         self.playing = False
         self.playing_start = None
         self.recording = False
         self.recording_start = None
         self.loop_length = None
+        self.looping = False
 
-        self.playing_ids = []
+        # index of the next event to play, and the one timer item
+        # waiting for it
+        self.cursor = 0
+        self.play_id = None
 
         if Replay._timer is None:
-            Replay._timer = MultiTimer()
+            Replay._timer = MultiTimer("replay")
 
         extra=defs or {}
         parsed_args, kwargs = self.parse_args(init_args, **extra)
 
+        # events due within 'lookahead' ms of the one that woke the
+        # timer are sent with it
+        self.lookahead = kwargs.get("lookahead", 0) / 1000.0
+
     def record(self):
         self.recording = True
-        self.recording_start = datetime.now()
+        self.recording_start = MultiTimer.now()
 
     def record_stop(self):
-        self.loop_length = datetime.now() - self.recording_start
+        self.loop_length = MultiTimer.now() - self.recording_start
         self.recording = False
         self.recording_start = None
 
     def play(self):
+        self._start(False)
+
+    def loop(self, data=None):
+        self._start(bool(self.loop_length))
+
+    def _start(self, looping):
         if self.playing:
             self.play_stop()
 
         self.playing = True
-        self.playing_start = datetime.now()
-        for payload, delta in self.buffer:
-            item_id = self._timer.schedule(
-                self.playing_start + delta,
-                self.timer_cb,
-                [payload]
-            )
-            self.playing_ids.append(item_id)
-
-    def loop(self, data=None):
-        self.play()
-        if self.loop_length is None:
-            return
-
-        loop_id = self._timer.schedule(
-            self.playing_start + self.loop_length,
-            self.loop,
-            [])
-        self.playing_ids.append(loop_id)
+        self.looping = looping
+        self.playing_start = MultiTimer.now()
+        self.cursor = 0
+        self._schedule_next()
 
     def play_stop(self):
         self.playing = False
-        ids = self.playing_ids
-        self.playing_ids = []
-        for item in ids:
-            self._timer.cancel(item)
+        self.looping = False
+        if self.play_id is not None:
+            self._timer.cancel(self.play_id)
+            self.play_id = None
 
     def clear(self):
         self.play_stop()
         self.buffer = []
+        self.offsets = []
+
+    def _schedule_next(self):
+        if self.play_id is not None:
+            self._timer.cancel(self.play_id)
+            self.play_id = None
+
+        deadline = None
+        if self.cursor < len(self.offsets):
+            deadline = self.playing_start + self.offsets[self.cursor]
+        if self.looping:
+            loop_end = self.playing_start + self.loop_length
+            if deadline is None or loop_end < deadline:
+                deadline = loop_end
+
+        if deadline is not None:
+            self.play_id = self._timer.schedule(deadline, self._play_cb)
+
+    async def _play_cb(self):
+        self.play_id = None
+        due_by = MultiTimer.now() + self.lookahead
+
+        if (
+            self.looping
+            and self.playing_start + self.loop_length <= due_by
+            and (
+                self.cursor >= len(self.offsets)
+                or self.offsets[self.cursor] >= self.loop_length
+            )
+        ):
+            # wrap around to the start of the loop
+            self.playing_start += self.loop_length
+            self.cursor = 0
+
+        due = []
+        while (
+            self.cursor < len(self.offsets)
+            and self.playing_start + self.offsets[self.cursor] <= due_by
+        ):
+            due.append(self.buffer[self.cursor][0])
+            self.cursor += 1
+
+        self._schedule_next()
+        for payload in due:
+            await self.send(TimerTick(payload))
 
     async def trigger(self):
         if isinstance(self.inlets[0], TimerTick):
             self.outlets[0] = self.inlets[0].payload
         elif self.recording:
-            event_delta = datetime.now() - self.recording_start
+            event_delta = MultiTimer.now() - self.recording_start
             log.debug("[replay] recording", self.inlets[0], event_delta)
-            self.buffer.append(
-                [self.inlets[0], event_delta]
-            )
+            pos = bisect_right(self.offsets, event_delta)
+            self.offsets.insert(pos, event_delta)
+            self.buffer.insert(pos, [self.inlets[0], event_delta])
             if self.playing:
-                item = self._timer.schedule(
-                    self.playing_start + event_delta,
-                    self.timer_cb,
-                    [self.inlets[0]]
-                )
-                self.playing_ids.append(item)
+                if pos < self.cursor:
+                    self.cursor += 1
+                elif pos == self.cursor:
+                    # new event is the next one due
+                    self._schedule_next()
             self.started = False
 
-    async def timer_cb(self, data):
-        await self.send(TimerTick(data))
-
     def show_buffer(self):
         log.debug(self.buffer)
 
@@ -16,6 +16,7 @@ class Snap(Processor):
     doc_tooltip_inlet = ["Signal to snapshot", 
                          "Snapshot interval (ms) (default: initarg 0)"]
     doc_tooltip_outlet = ["Value output"]
+    dsp_level_responses = (0,)
 
     def __init__(self, init_type, init_args, patch, scope, name, defs=None):
         Processor.__init__(self, 2, 1, init_type, init_args, patch, scope, name, defs)
@@ -0,0 +1,56 @@
+"""
+dsp_response.py -- decode batches of responses from the DSP engine
+
+The DSP engine collects the numeric responses made during a block
+(see mfp_request.c) and sends them as packed mfp_response_record
+structs in one MFPCommand.dsp_response_batch call.
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import numpy as np
+
+# matches mfp_response_record in mfp_dsp.h
+RESPONSE_DTYPE = np.dtype([
+    ('obj_id', '=i4'),
+    ('resp_type', '=i2'),
+    ('value_type', '=i2'),
+    ('value', '=f8'),
+])
+
+# value types, from PARAMTYPE_* in mfp_dsp.h
+VALUE_FLT = 1
+VALUE_BOOL = 4
+VALUE_INT = 5
+
+
+def unpack_responses(packed, is_level=None):
+    """
+    List of (obj_id, resp_type, value) from a packed batch, in the
+    order they arrived. For (obj_id, resp_type) pairs that
+    is_level(obj_id, resp_type) says are levels (a meter reading, the
+    DSP load) only the last value is kept. Anything else is an event
+    (a trigger edge, a loop start) and every one is delivered
+    """
+    records = np.frombuffer(packed, dtype=RESPONSE_DTYPE)
+    if not len(records):
+        return []
+
+    if is_level is not None:
+        keys = (records['obj_id'].astype(np.int64) << 16) | records['resp_type'].astype(np.uint16)
+        unique, from_end = np.unique(keys[::-1], return_index=True)
+        last = len(records) - 1 - from_end
+        keep = np.ones(len(records), dtype=bool)
+        for key, last_pos in zip(unique.tolist(), last.tolist()):
+            if is_level(key >> 16, key & 0xffff):
+                keep[keys == key] = False
+                keep[last_pos] = True
+        records = records[keep]
+
+    responses = []
+    for obj_id, resp_type, value_type, value in records.tolist():
+        # bools arrive as 0/1, as they always have
+        if value_type in (VALUE_BOOL, VALUE_INT):
+            value = int(value)
+        responses.append((obj_id, resp_type, value))
+    return responses
@@ -6,7 +6,9 @@ Copyright (c) 2011 Bill Gribble <grib@billgribble.com>
 '''
 
 import tokenize
+import importlib
 import inspect
+from collections import OrderedDict
 from io import StringIO
 
 from mfp import log
@@ -25,8 +27,85 @@ class LazyExpr(object):
         return self.thunk()
 
 
+def _eval_collect_args(*args, **kwargs):
+    return (args, kwargs)
+
+
+class EvalNamespace (dict):
+    """
+    Layered namespace for eval()
+
+    The dict itself holds the per-call bindings, and lookups that
+    miss fall through to the parent mappings in order (like a
+    ChainMap). It has to be a real dict to be usable as eval()
+    globals, which is also what lambdas and comprehensions in the
+    evaluated code see.
+    """
+    def __init__(self, bindings, *parents):
+        super().__init__(bindings)
+        self.parents = parents
+
+    def __missing__(self, key):
+        for p in self.parents:
+            if key in p:
+                return p[key]
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if dict.__contains__(self, key):
+            return True
+        return any(key in p for p in self.parents)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
+class GlobalNames (dict):
+    """
+    Evaluator globals. Names bound with bind_lazy() are looked up in
+    their module the first time they are used, so binding them doesn't
+    import the module
+    """
+    def __init__(self):
+        super().__init__()
+        self.lazy = {}
+
+    def bind_lazy(self, name, modname, attr=None):
+        self.pop(name, None)
+        self.lazy[name] = (modname, attr)
+
+    def __missing__(self, key):
+        if key not in self.lazy:
+            raise KeyError(key)
+        modname, attr = self.lazy.pop(key)
+        value = importlib.import_module(modname)
+        if attr:
+            value = getattr(value, attr)
+        self[key] = value
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.lazy
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+
 class Evaluator (object):
-    global_names = {}
+    global_names = GlobalNames()
+
+    # compiled code objects for rewritten expressions, keyed on
+    # (source string, collect flag)
+    code_cache = OrderedDict()
+    code_cache_size = 1024
+    code_cache_hits = 0
+    code_cache_misses = 0
 
     def __init__(self, local_bindings=None):
         self.local_names = {}
@@ -35,11 +114,35 @@ class Evaluator (object):
 
     @classmethod
     def bind_global(self, name, obj):
+        self.global_names.lazy.pop(name, None)
         self.global_names[name] = obj
 
+    @classmethod
+    def bind_global_lazy(self, name, modname, attr=None):
+        """
+        Bind 'name' to module 'modname' (or its attribute 'attr'),
+        importing it when the name is first used
+        """
+        self.global_names.bind_lazy(name, modname, attr)
+
     def bind_local(self, name, obj):
         self.local_names[name] = obj
 
+    @classmethod
+    def cache_info(cls):
+        return dict(
+            hits=cls.code_cache_hits,
+            misses=cls.code_cache_misses,
+            size=len(cls.code_cache),
+            maxsize=cls.code_cache_size
+        )
+
+    @classmethod
+    def cache_clear(cls):
+        cls.code_cache.clear()
+        cls.code_cache_hits = 0
+        cls.code_cache_misses = 0
+
     def eval_arglist(self, evalstr, **extra_bindings):
         return self.eval(evalstr, True, **extra_bindings)
 
@@ -51,13 +154,41 @@ class Evaluator (object):
         return rv
 
     def eval(self, evalstr, collect=False, **extra_bindings):
-        def _eval_collect_args(*args, **kwargs):
-            return (args, kwargs)
-
         str2eval = evalstr.strip()
         if not len(str2eval):
             return None
 
+        cache_key = (str2eval, collect)
+        code = self.code_cache.get(cache_key)
+        if code is not None:
+            self.code_cache.move_to_end(cache_key)
+            Evaluator.code_cache_hits += 1
+        else:
+            code = self.compile_expr(str2eval, collect)
+            Evaluator.code_cache_misses += 1
+            self.code_cache[cache_key] = code
+            if len(self.code_cache) > self.code_cache_size:
+                self.code_cache.popitem(last=False)
+
+        if collect:
+            extra_bindings['_eval_collect_args'] = _eval_collect_args
+
+        environ = EvalNamespace(extra_bindings, self.local_names, self.global_names)
+        if "__self__" in environ:
+            environ["self"] = environ["__self__"]
+        if "__patch__" in environ:
+            environ["patch"] = environ["__patch__"]
+
+        return eval(code, environ)
+
+    @classmethod
+    def compile_expr(cls, str2eval, collect=False):
+        """
+        Rewrite MFP special forms into Python and compile the result.
+        Depends only on the source text, so the code object can be
+        cached and reused with any bindings.
+        """
+
         # lazy evaluation special form
         #   ,expression
         # rewrites to:
@@ -111,7 +242,6 @@ class Evaluator (object):
 
         if collect:
             str2eval = "_eval_collect_args(%s)" % str2eval
-            extra_bindings['_eval_collect_args'] = _eval_collect_args
         elif len(tokens) > 2 and tokens[1][1] == '=':
             # setparam special form:
             #   foo='bar', bax='baz'
@@ -119,28 +249,18 @@ class Evaluator (object):
             #   dict(foo='bar', bax='baz')
             str2eval = ''.join(["dict("] + [t[1] for t in tokens] + [')'])
 
-        environ = {
-            name: val
-            for name, val in (
-                list(self.global_names.items()) + list(self.local_names.items())
-                + list(extra_bindings.items())
-            )
-        }
-        if "__self__" in environ:
-            environ["self"] = environ["__self__"]
-        if "__patch__" in environ:
-            environ["patch"] = environ["__patch__"]
-
-        rv = eval(str2eval, environ)
-        return rv
+        return compile(str2eval, "<string>", "eval")
 
     def exec_str(self, pystr, global_vars=None):
         try:
             if global_vars is not None:
-                for name, value in self.global_names.items():
-                    if name not in global_vars:
-                        global_vars[name] = value
-                exec(pystr, global_vars)
+                # names bound by the code end up in global_vars, and
+                # lazy globals it doesn't use are left unimported
+                namespace = EvalNamespace(global_vars, self.global_names)
+                try:
+                    exec(pystr, namespace)
+                finally:
+                    global_vars.update(namespace)
             else:
                 exec(pystr, self.global_names)
         except SyntaxError as syn:
@@ -11,11 +11,12 @@ import math
 from .mark_style import MarkStyle
 from .xyplot import XYPlot
 from mfp import log
+from mfp.point_store import PointStore, unpack_points
 
 
 class ScatterPlot (XYPlot):
     def __init__(self, element, width, height):
-        # data points
+        # data points, curve: PointStore
         self.points = {}
         self.points_by_tile = {}
 
@@ -29,10 +30,9 @@ class ScatterPlot (XYPlot):
         def stroke_to(styler, curve, px, ptnum, delta):
             points = self.points.get(curve)
             dst_ptnum = ptnum + delta
-            if dst_ptnum < 0 or dst_ptnum > points[-1][0]:
+            if dst_ptnum < 0 or dst_ptnum >= len(points):
                 return
-            dst_num, dst_pt = points[dst_ptnum]
-            dst_px = self.pt2px(dst_pt)
+            dst_px = self.pt2px((points.x()[dst_ptnum], points.y()[dst_ptnum]))
             dst_px[0] -= px_min[0]
             dst_px[1] -= px_min[1]
             styler.stroke(ctxt, dst_px, px)
@@ -90,9 +90,11 @@ class ScatterPlot (XYPlot):
 
     def append(self, point, curve=0):
         curve = int(curve)
-        pts = self.points.setdefault(curve, [])
+        pts = self.points.get(curve)
+        if pts is None:
+            pts = self.points[curve] = PointStore()
         ptnum = len(pts)
-        pts.append([ptnum, point])
+        pts.append(point[0], point[1])
 
         tiles = self.index_point(point, curve, ptnum)
 
@@ -116,7 +118,7 @@ class ScatterPlot (XYPlot):
         curve = int(curve)
 
         tiles = []
-        pts = self.points.setdefault(curve, {})
+        pts = self.points.get(curve)
         bytile = self.points_by_tile.setdefault(curve, {})
 
         style = self.style.get(curve)
@@ -133,8 +135,7 @@ class ScatterPlot (XYPlot):
                     tiles.append(tid)
 
         if style.stroke_style and ptnum > 0:
-            prev_pt = pts[ptnum - 1][1]
-            prev_px = self.pt2px(prev_pt)
+            prev_px = self.pt2px((pts.x()[ptnum - 1], pts.y()[ptnum - 1]))
             if prev_px is not None:
                 tid = tile_id(prev_px)
                 if tid not in tiles:
@@ -149,7 +150,7 @@ class ScatterPlot (XYPlot):
     def reindex(self):
         self.points_by_tile = {}
         for curve, curvepoints in self.points.items():
-            for ptnum, point in curvepoints:
+            for ptnum, point in enumerate(curvepoints.points()):
                 self.index_point(point, curve, ptnum)
 
     def clear(self, curve=None):
@@ -228,6 +229,12 @@ class ScatterPlot (XYPlot):
                 for p in data[c]:
                     self.append(p, c)
             return True
+        elif action == "points":
+            for c, packed in data.items():
+                xs, ys = unpack_points(packed)
+                for p in zip(xs.tolist(), ys.tolist()):
+                    self.append(p, c)
+            return True
         elif action == "roll":
             self.set_bounds(None, None, data, None)
             self.set_scroll_rate(1.0, 0)
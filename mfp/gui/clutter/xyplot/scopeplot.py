@@ -7,11 +7,9 @@ buffers
 Copyright (c) 2012 Bill Gribble <grib@billgribble.com>
 '''
 
-import os
-import numpy
 from gi.repository import Clutter
-from posix_ipc import SharedMemory
 from mfp import log
+from mfp.shm_buffer import SharedBuffer
 from mfp.utils import catchall
 from .xyplot import XYPlot
 
@@ -133,20 +131,15 @@ class ScopePlot (XYPlot):
         return {}
 
     def _grab(self):
-        def offset(channel):
-            return channel * self.buf_info.size * self.FLOAT_SIZE
-
         if self.buf_info is None:
             return None
         if self.shm_obj is None:
-            self.shm_obj = SharedMemory(self.buf_info.buf_id)
+            self.shm_obj = SharedBuffer(self.buf_info.buf_id, readonly=True)
 
         self.data = []
         try:
             for c in range(self.buf_info.channels):
-                os.lseek(self.shm_obj.fd, offset(c), os.SEEK_SET)
-                slc = os.read(self.shm_obj.fd, int(self.buf_info.size * self.FLOAT_SIZE))
-                self.data.append(list(numpy.fromstring(slc, dtype=numpy.float32)))
+                self.data.append(self.shm_obj.channel(c, self.buf_info.size).tolist())
                 self.set_bounds(0, None, len(self.data[0])*1000/self.samplerate, None)
         except Exception as e:
             log.debug("scopeplot: error grabbing data", e)
@@ -201,6 +201,14 @@ def render(app_window):
                 render_activity_tab(app_window)
                 imgui.end_child()
                 imgui.end_tab_item()
+
+        if imgui.begin_tab_item("Profile")[0]:
+            imgui.begin_child("profile_scroller", (0,0))
+            if imgui.is_window_hovered(imgui.FocusedFlags_.child_windows):
+                app_window.zone_hovered("info")
+            render_profile_tab(app_window)
+            imgui.end_child()
+            imgui.end_tab_item()
         imgui.end_tab_bar()
     imgui.end_child()
     if imgui.is_item_hovered():
@@ -1044,6 +1052,13 @@ def render_activity_tab(app_window):
     imgui.text(f"Messages in: {info.get('messages_in')}")
     imgui.text(f"Messages out: {info.get('messages_out')}")
     imgui.text(f"Times triggered: {info.get('trigger_count')}")
+    profile = info.get('profile')
+    if profile:
+        imgui.text(f"Trigger time total: {profile['total_ms']:.3f} ms")
+        imgui.text(f"Trigger time mean: {profile['mean_ms']:.3f} ms")
+        imgui.text(f"Trigger time max: {profile['max_ms']:.3f} ms")
+        for label, count in profile['histogram'].items():
+            imgui.text(f"    {label}: {count}")
     imgui.text('')
     imgui.text(f"Error count: {info.get('error_count')}")
 
@@ -1076,3 +1091,106 @@ def render_activity_tab(app_window):
 
     imgui.pop_style_var()
     imgui.end_group()
+
+
+# latest profile report from the app, refreshed while the
+# Profile tab is showing
+profile_state = dict(report=None, timestamp=None, pending=False)
+
+PROFILE_COLUMNS = [
+    ("Object", "name"),
+    ("Patch", "patch"),
+    ("Count", "count"),
+    ("Total ms", "total_ms"),
+    ("Mean ms", "mean_ms"),
+    ("Max ms", "max_ms"),
+]
+
+
+async def profile_report_update():
+    try:
+        profile_state['report'] = await MFPGUI().mfp.get_profile_report(0)
+        profile_state['timestamp'] = datetime.now()
+    finally:
+        profile_state['pending'] = False
+
+
+def render_profile_tab(app_window):
+    if not profile_state['pending'] and (
+        not profile_state['timestamp']
+        or (datetime.now() - profile_state['timestamp']).total_seconds() > 0.5
+    ):
+        profile_state['pending'] = True
+        MFPGUI().async_task(profile_report_update())
+
+    ######################
+    # a little padding
+    imgui.dummy(app_window.scaled(1, TAB_PADDING_Y))
+    imgui.dummy(app_window.scaled(TAB_PADDING_X, 1))
+    imgui.same_line()
+
+    imgui.begin_group()
+    imgui.push_style_var(imgui.StyleVar_.item_spacing, (4.0, 8.0))
+
+    report = profile_state['report']
+    enabled = report and report.get('enabled')
+    if imgui.button("Stop profiling" if enabled else "Start profiling"):
+        MFPGUI().async_task(MFPGUI().mfp.profile_enable(not enabled))
+        profile_state['timestamp'] = None
+    imgui.same_line()
+    if imgui.button("Reset"):
+        MFPGUI().async_task(MFPGUI().mfp.get_profile_report(0, "total_ms", True))
+        profile_state['timestamp'] = None
+
+    if not report:
+        imgui.pop_style_var()
+        imgui.end_group()
+        return
+
+    imgui.text("Patches:")
+    for patch_id, totals in report.get('patches', {}).items():
+        imgui.text(
+            f"    {totals['name']} ({patch_id}): {totals['count']} triggers, "
+            f"{totals['total_ms']:.3f} ms total, {totals['max_ms']:.3f} ms max"
+        )
+
+    imgui.text("Top objects:")
+    if imgui.begin_table(
+        "##profile_objects",
+        len(PROFILE_COLUMNS),
+        (
+            imgui.TableFlags_.row_bg
+            | imgui.TableFlags_.borders
+            | imgui.TableFlags_.borders_h
+            | imgui.TableFlags_.borders_v
+            | imgui.TableFlags_.sizing_fixed_fit
+            | imgui.TableFlags_.sortable
+        )
+    ):
+        for title, _ in PROFILE_COLUMNS:
+            imgui.table_setup_column(title)
+        imgui.table_headers_row()
+
+        rows = list(report.get('objects', []))
+        sort_specs = imgui.table_get_sort_specs()
+        if sort_specs and sort_specs.specs_count:
+            spec = sort_specs.get_specs(0)
+            key = PROFILE_COLUMNS[spec.column_index][1]
+            rows.sort(
+                key=lambda row: (row.get(key) is not None, row.get(key) or 0),
+                reverse=(spec.sort_direction != imgui.SortDirection.ascending)
+            )
+
+        for row in rows:
+            imgui.table_next_row()
+            for column, (_, key) in enumerate(PROFILE_COLUMNS):
+                imgui.table_set_column_index(column)
+                value = row.get(key)
+                if isinstance(value, float):
+                    imgui.text(f"{value:.3f}")
+                else:
+                    imgui.text(str(value))
+        imgui.end_table()
+
+    imgui.pop_style_var()
+    imgui.end_group()
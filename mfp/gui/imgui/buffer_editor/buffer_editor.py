@@ -2,7 +2,6 @@
 buffer_editor.py -- BufferEditor() class definition
 """
 import asyncio
-import os
 import math
 from datetime import datetime
 from imgui_bundle import implot, imgui
@@ -11,7 +10,6 @@ import numpy as np
 from mfp import log
 from mfp.gui import image_utils
 from mfp.gui.colordb import ColorDB
-from posix_ipc import SharedMemory
 
 
 class BufferEditor:
@@ -51,7 +49,7 @@ class BufferEditor:
         self.buffer_info = None
         self.buffer_data = None
         self.buffer_data_last_update = None
-        self.buffer_peaks = {}
+        self.buffer_peaks = []               # PeakPyramid per channel
 
         self.working_patch_id = None
         self.working_patch_info = None
@@ -106,7 +104,6 @@ class BufferEditor:
         plot_height = None
         num_channels = len(self.buffer_data or [])
         peak_scale = None
-        peaks = None
 
         line_height = imgui.get_text_line_height()
         imgui.set_next_window_size([
@@ -127,12 +124,10 @@ class BufferEditor:
 
         channel_ampls = [0] * (4 * self.buffer_info.channels)
         if self.working_ampl_buf_obj:
-            os.lseek(self.working_ampl_buf_obj.fd, 0, os.SEEK_SET)
-            slc = os.read(
-                self.working_ampl_buf_obj.fd,
-                int(self.working_ampl_buf_info.channels * self.FLOAT_SIZE)
+            ampls = self.working_ampl_buf_obj.channel(
+                0, self.working_ampl_buf_info.channels
             )
-            for ind, ampl in enumerate(np.fromstring(slc, dtype=np.float32)):
+            for ind, ampl in enumerate(ampls):
                 if ind >= len(channel_ampls):
                     continue
                 channel_ampls[ind] = float(ampl)
@@ -356,12 +351,13 @@ class BufferEditor:
                             self.channel_selections_active[channel] = False
 
                     if channel > 0:
-                        # use the right subsampled data
+                        # use the right subsampled data, and only the
+                        # part that is in view
                         if peak_scale is None:
-                            peak_scale = self.get_peak_scale(self.implot_limits)
-                            peaks = self.buffer_peaks[peak_scale]
-                        y_values = peaks[0][channel - 1]
-                        x_values = peaks[1]
+                            peak_scale = self.get_peak_scale(chan_limits)
+                        x_values, y_values = self.buffer_peaks[channel - 1].visible(
+                            peak_scale, chan_limits.x.min, chan_limits.x.max
+                        )
 
                         # the actual line!
                         implot.plot_line("Buffer edit", x_values, y_values)
@@ -548,7 +544,7 @@ class BufferEditor:
         if self.rec_recording:
             now = datetime.now()
             if (now - self.buffer_data_last_update).total_seconds() > 1:
-                self.buffer_grab(self.working_buf_obj)
+                self.buffer_grab(self.working_buf_obj, changed=True)
 
         imgui.pop_style_var(3)
 
@@ -5,37 +5,67 @@ Copyright (c) Bill Gribble <grib@billgribble.com>
 """
 
 import asyncio
-import os
 from datetime import datetime
 import numpy as np
-from posix_ipc import SharedMemory
 from imgui_bundle import implot
 
 from mfp import log
 from mfp.gui_main import MFPGUI
 from mfp.utils import extends
 from mfp.buffer_info import BufferInfo
+from mfp.shm_buffer import SharedBuffer
 from .buffer_editor import BufferEditor
+from .peak_pyramid import PeakPyramid
 
 
 ########################################
 # buffer operations
 @extends(BufferEditor)
-def buffer_grab(self, shm_obj=None, buffer_info=None):
+def buffer_grab(self, shm_obj=None, buffer_info=None, changed=False):
+    """
+    Copy buffer contents into buffer_data. With 'changed', if the
+    buffer is the same shape only the span of samples that differ
+    from buffer_data is copied and re-peaked
+    """
     if buffer_info is None:
         buffer_info = self.buffer_info
 
-    def offset(channel):
-        return channel * buffer_info.size * self.FLOAT_SIZE
-
     if buffer_info is None:
         return None
 
     if shm_obj is None:
         if self.shm_obj is None:
-            self.shm_obj = SharedMemory(buffer_info.buf_id)
+            self.shm_obj = SharedBuffer(buffer_info.buf_id)
         shm_obj = self.shm_obj
 
+    if (
+        changed
+        and self.buffer_data
+        and len(self.buffer_data) == buffer_info.channels
+        and len(self.buffer_data[0]) == buffer_info.size
+    ):
+        # compare rather than guess from the playhead, which can't see
+        # loops shorter than the grab interval or wraps between grabs.
+        # Anything written after the compare shows up on the next grab
+        start = end = None
+        for c, chan in enumerate(self.buffer_data):
+            live = shm_obj.channel(c, buffer_info.size)
+            if len(live) != len(chan):
+                start = end = None
+                break
+            diff = np.flatnonzero(live != chan)
+            if len(diff):
+                start = diff[0] if start is None else min(start, diff[0])
+                end = diff[-1] + 1 if end is None else max(end, diff[-1] + 1)
+        else:
+            if start is not None:
+                start, end = int(start), int(end)
+                for c, chan in enumerate(self.buffer_data):
+                    chan[start:end] = shm_obj.channel(c, buffer_info.size, start, end)
+                self.buffer_compute_peaks(start, end)
+            self.buffer_data_last_update = datetime.now()
+            return
+
     self.buffer_data = []
     self.channel_selections = [None] * (buffer_info.channels + 1)
     self.channel_selections_active = [False] * (buffer_info.channels + 1)
@@ -48,10 +78,11 @@ def buffer_grab(self, shm_obj=None, buffer_info=None):
     self.implot_limits_need_set = [None] * (buffer_info.channels + 1)
 
     try:
+        # the editor modifies buffer_data in place and the working
+        # buffer can be reshaped under it, so this is one copy out
+        # of the mapping rather than a view
         for c in range(buffer_info.channels):
-            os.lseek(shm_obj.fd, offset(c), os.SEEK_SET)
-            slc = os.read(shm_obj.fd, int(buffer_info.size * self.FLOAT_SIZE))
-            self.buffer_data.append(np.fromstring(slc, dtype=np.float32))
+            self.buffer_data.append(np.array(shm_obj.channel(c, buffer_info.size)))
     except Exception as e:
         log.debug("[grab]: error grabbing data", e)
         import traceback
@@ -72,67 +103,52 @@ def buffer_sync(self, from_obj, from_info, to_obj, to_info, data=None):
 
 @extends(BufferEditor)
 def buffer_sync_channel(self, channel, from_obj, from_info, to_obj, to_info, data=None):
-    def offset(buf_info, channel):
-        return channel * buf_info.size * self.FLOAT_SIZE
+    dest = to_obj.channel(channel, to_info.size)
 
     if from_obj:
-        os.lseek(from_obj.fd, offset(from_info, channel), os.SEEK_SET)
-        slc = os.read(from_obj.fd, int(from_info.size * self.FLOAT_SIZE))
+        src = from_obj.channel(channel, from_info.size)
     elif data is not None:
-        slc = data.tobytes()
+        src = data
     elif len(self.buffer_data) > channel:
-        slc = self.buffer_data[channel].tobytes()
+        src = self.buffer_data[channel]
     else:
-        slc = np.zeros(len(self.buffer_data[0]), dtype=np.float32)
+        dest[:len(self.buffer_data[0])] = 0
+        return
 
-    os.lseek(to_obj.fd, offset(to_info, channel), os.SEEK_SET)
-    os.write(to_obj.fd, slc)
+    count = min(len(src), len(dest))
+    dest[:count] = src[:count]
 
 
 @extends(BufferEditor)
-def buffer_compute_peaks(self):
-    self.buffer_peaks = {}
-    padding = 10 - len(self.buffer_data[0]) % 10
-    padded = [
-        np.pad(chan, (0, padding), mode='constant')
+def buffer_compute_peaks(self, start=None, end=None):
+    """
+    Update the peak pyramids for samples [start, end) of buffer_data,
+    or rebuild them (and reset the view) if no range is given or the
+    buffer has changed shape
+    """
+    if (
+        start is not None
+        and len(self.buffer_peaks) == len(self.buffer_data)
+        and all(
+            len(peaks.data) == len(chan)
+            for peaks, chan in zip(self.buffer_peaks, self.buffer_data)
+        )
+    ):
+        for peaks, chan in zip(self.buffer_peaks, self.buffer_data):
+            peaks.update(chan, start, end)
+        return
+
+    self.buffer_peaks = [
+        PeakPyramid(chan, self.buffer_info.rate)
         for chan in self.buffer_data
     ]
-    total_time = len(padded[0]) / self.buffer_info.rate
-    sample_time = 1/self.buffer_info.rate
+    total_time = len(self.buffer_data[0]) / self.buffer_info.rate
     self.implot_total_time = total_time
     self.implot_limits = implot.Rect(
         x_min=0, x_max=total_time, y_min=-1, y_max=1
     )
     self.implot_limits_need_set = [True] * (self.buffer_info.channels + 1)
     self.implot_limits_counter = 5
-    self.buffer_peaks["1"] = (
-        padded,
-        np.arange(0, total_time, sample_time, dtype=np.float32)
-    )
-    last_peaks = padded
-
-    for peak_factor in (10, 100, 1000, 10000):
-        if peak_factor == 10:
-            shape = 10
-        else:
-            shape = 20
-        next_peaks = []
-        for channel in last_peaks:
-            maxima = channel.reshape(-1, shape).max(axis=1)
-            minima = channel.reshape(-1, shape).min(axis=1)
-            combined = np.ravel(np.column_stack((maxima, minima)))
-            padding = 20 - len(combined) % 20
-            padded = np.pad(combined, (0, padding), mode='constant')
-            next_peaks.append(padded)
-
-        x_values = np.arange(
-            0, sample_time * peak_factor * len(padded) / 2,
-            peak_factor * sample_time / 2, dtype=np.float32
-        )
-        self.buffer_peaks[str(peak_factor)] = (
-            next_peaks, x_values
-        )
-        last_peaks = next_peaks
 
 
 @extends(BufferEditor)
@@ -160,7 +176,7 @@ async def buffer_trim_to_selection(self):
         channels=len(self.buffer_data) + 2
     )
     self.working_buf_id = working_buf.buf_id
-    self.working_buf_obj = SharedMemory(self.working_buf_id)
+    self.working_buf_obj = SharedBuffer(self.working_buf_id)
     self.working_buf_info = working_buf
 
     self.buffer_sync(None, None, self.working_buf_obj, self.working_buf_info)
@@ -188,15 +204,15 @@ def get_peak_scale(self, plot_limits):
     )
 
     if compress < 10:
-        peak_scale = "1"
+        peak_scale = 1
     elif compress < 100:
-        peak_scale = "10"
+        peak_scale = 10
     elif compress < 1000:
-        peak_scale = "100"
+        peak_scale = 100
     elif compress < 10000:
-        peak_scale = "1000"
+        peak_scale = 1000
     else:
-        peak_scale = "10000"
+        peak_scale = 10000
     return peak_scale
 
 
@@ -302,7 +318,7 @@ async def buffer_apply(self):
             size=bufsize,
         )
         buf_id = buf_info.buf_id
-        buf_obj = SharedMemory(buf_id)
+        buf_obj = SharedBuffer(buf_id)
         self.buffer_sync(None, None, buf_obj, buf_info)
 
     await MFPGUI().mfp.send(
@@ -327,7 +343,7 @@ async def buffer_import(self, filename):
         self.buffer_data = None
         self.buffer_selected = BufferInfo(**bufdata)
         self.working_buf_id = bufdata.get("buf_id")
-        self.working_buf_obj = SharedMemory(self.working_buf_id)
+        self.working_buf_obj = SharedBuffer(self.working_buf_id)
         self.buffer_grab(self.working_buf_obj, self.buffer_selected)
 
         # buffer_data only should include the audio data
@@ -344,7 +360,7 @@ async def buffer_import(self, filename):
             file_name=filename,
         )
         self.working_buf_id = working_buf.buf_id
-        self.working_buf_obj = SharedMemory(self.working_buf_id)
+        self.working_buf_obj = SharedBuffer(self.working_buf_id)
         self.working_buf_info = working_buf
 
         await self.buffer_reshape(
@@ -4,7 +4,7 @@ buffer_editor/clipboard_ops.py -- manipulate the clipboard
 Copyright (c) Bill Gribble <grib@billgribble.com>
 """
 
-from posix_ipc import SharedMemory
+from mfp.shm_buffer import SharedBuffer
 import numpy as np
 
 from mfp import log
@@ -51,7 +51,7 @@ async def clipboard_cut(self):
         channels=len(self.buffer_data) + 2
     )
     self.working_buf_id = working_buf.buf_id
-    self.working_buf_obj = SharedMemory(self.working_buf_id)
+    self.working_buf_obj = SharedBuffer(self.working_buf_id)
     self.working_buf_info = working_buf
 
     self.buffer_sync(None, None, self.working_buf_obj, self.working_buf_info)
@@ -110,7 +110,7 @@ async def clipboard_delete(self):
         channels=len(self.buffer_data) + 2
     )
     self.working_buf_id = working_buf.buf_id
-    self.working_buf_obj = SharedMemory(self.working_buf_id)
+    self.working_buf_obj = SharedBuffer(self.working_buf_id)
     self.working_buf_info = working_buf
 
     # sink buffer just needs to point to the new segment and
@@ -168,7 +168,7 @@ async def clipboard_paste(self):
             channels=len(self.buffer_data) + 2
         )
         self.working_buf_id = working_buf.buf_id
-        self.working_buf_obj = SharedMemory(self.working_buf_id)
+        self.working_buf_obj = SharedBuffer(self.working_buf_id)
         self.working_buf_info = working_buf
 
         # sink buffer just needs to point to the new segment and
@@ -187,7 +187,7 @@ async def clipboard_paste(self):
         chan[sel_start:sel_start+clip_size] = self.clipboard_data[chan_number]
 
     self.buffer_sync(None, None, self.working_buf_obj, self.working_buf_info)
-    self.buffer_compute_peaks()
+    self.buffer_compute_peaks(sel_start, sel_start + clip_size)
 
 
 @extends(BufferEditor)
@@ -218,4 +218,4 @@ async def clipboard_paste_to_fit(self):
         chan[sel_start:sel_start+sel_size] = new_data[chan_num]
 
     self.buffer_sync(None, None, self.working_buf_obj, self.working_buf_info)
-    self.buffer_compute_peaks()
+    self.buffer_compute_peaks(sel_start, sel_start + sel_size)
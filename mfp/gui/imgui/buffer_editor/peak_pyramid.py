@@ -0,0 +1,95 @@
+"""
+peak_pyramid.py -- multi-resolution min/max summary of a waveform
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import numpy as np
+
+
+class PeakPyramid:
+    """
+    Min/max peaks of one channel of samples at several decimation
+    factors. Each level keeps its peaks interleaved (max, min, max,
+    min...) so it can be handed to implot.plot_line as-is. After an
+    edit or a recording pass only the bins covering the changed
+    samples are recomputed
+    """
+    FACTORS = (10, 100, 1000, 10000)
+
+    def __init__(self, data, rate):
+        self.rate = rate
+        self.data = None
+        self.maxima = {}
+        self.minima = {}
+        self.peaks = {}
+        self.x_values = {}
+        self.update(data)
+
+    def update(self, data, start=None, end=None):
+        """
+        'data' is the channel's samples, of which [start, end) have
+        changed. A size change or no range means recompute everything
+        """
+        if self.data is None or len(data) != len(self.data) or start is None:
+            self.data = data
+            self._allocate()
+            start, end = 0, len(data)
+        else:
+            self.data = data
+            start = max(0, start)
+            end = min(len(data), len(data) if end is None else end)
+            if start >= end:
+                return
+
+        source_max = source_min = data
+        lo, hi = start, end
+        step = self.FACTORS[0]
+        for factor in self.FACTORS:
+            # bins of this level that cover [start, end)
+            lo = lo // step
+            hi = (hi + step - 1) // step
+            src_lo = lo * step
+            src_hi = min(hi * step, len(source_max))
+            offsets = np.arange(0, src_hi - src_lo, step)
+
+            maxima = self.maxima[factor]
+            minima = self.minima[factor]
+            if len(offsets):
+                maxima[lo:hi] = np.maximum.reduceat(source_max[src_lo:src_hi], offsets)
+                minima[lo:hi] = np.minimum.reduceat(source_min[src_lo:src_hi], offsets)
+                self.peaks[factor][2*lo:2*hi:2] = maxima[lo:hi]
+                self.peaks[factor][2*lo+1:2*hi:2] = minima[lo:hi]
+
+            source_max = maxima
+            source_min = minima
+            step = 10
+
+    def _allocate(self):
+        size = len(self.data)
+        sample_time = 1.0 / self.rate
+        self.x_values[1] = np.arange(size, dtype=np.float32) * sample_time
+        for factor in self.FACTORS:
+            bins = (size + factor - 1) // factor
+            self.maxima[factor] = np.zeros(bins, dtype=np.float32)
+            self.minima[factor] = np.zeros(bins, dtype=np.float32)
+            self.peaks[factor] = np.zeros(2 * bins, dtype=np.float32)
+            self.x_values[factor] = (
+                np.arange(2 * bins, dtype=np.float32) * (factor * sample_time / 2)
+            )
+
+    def visible(self, factor, x_min, x_max):
+        """
+        (x_values, y_values) of the level for 'factor' that fall
+        within [x_min, x_max] seconds, plus one point either side
+        """
+        if factor == 1:
+            y_values = self.data
+            points_per_second = self.rate
+        else:
+            y_values = self.peaks[factor]
+            points_per_second = 2.0 * self.rate / factor
+
+        first = max(0, int(x_min * points_per_second) - 1)
+        last = min(len(y_values), int(x_max * points_per_second) + 2)
+        return (self.x_values[factor][first:last], y_values[first:last])
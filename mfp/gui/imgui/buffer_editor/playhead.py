@@ -8,7 +8,7 @@ import asyncio
 from datetime import datetime
 import math
 import numpy as np
-from posix_ipc import SharedMemory
+from mfp.shm_buffer import SharedBuffer
 from imgui_bundle import implot
 
 from mfp import log
@@ -95,7 +95,7 @@ async def playhead_pause(self, new_pos=None):
                 need_update = 1
         if need_update:
             self.rec_recording_updated = now
-            self.buffer_grab(self.working_buf_obj)
+            self.buffer_grab(self.working_buf_obj, changed=True)
 
     self.implot_playhead_start_time = None
     self.implot_playhead_looping = False
@@ -236,7 +236,7 @@ async def playhead_insert_data(self, data):
         channels=len(self.buffer_data) + 2
     )
     self.working_buf_id = working_buf.buf_id
-    self.working_buf_obj = SharedMemory(self.working_buf_id)
+    self.working_buf_obj = SharedBuffer(self.working_buf_id)
     self.working_buf_info = working_buf
 
     # sink buffer just needs to point to the new segment and
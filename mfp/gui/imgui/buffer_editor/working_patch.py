@@ -6,7 +6,7 @@ Copyright (c) Bill Gribble <grib@billgribble.com>
 
 import asyncio
 
-from posix_ipc import SharedMemory
+from mfp.shm_buffer import SharedBuffer
 from mfp import log
 from mfp.utils import extends
 from .buffer_editor import BufferEditor
@@ -82,7 +82,7 @@ async def init_working_patch(self):
     self.working_source_info['name'] = self.buffer_source_info['proc_name']
 
     self.working_buf_id = source_buf.buf_id
-    self.working_buf_obj = SharedMemory(source_buf.buf_id)
+    self.working_buf_obj = SharedBuffer(source_buf.buf_id)
     self.working_buf_info = source_buf
 
     # copy inputs to the original buffer
@@ -146,7 +146,7 @@ async def init_working_patch(self):
     source = await wait_for_buffer("ampl_buffer")
     source_buf = source.get("buf_info")
 
-    self.working_ampl_buf_obj = SharedMemory(source_buf.buf_id)
+    self.working_ampl_buf_obj = SharedBuffer(source_buf.buf_id, readonly=True)
     self.working_ampl_buf_info = source_buf
 
     for chan in range(self.buffer_info.channels):
@@ -6,11 +6,11 @@ Copyright (c) Bill Gribble <grib@billgribble.com>
 
 from datetime import datetime
 import asyncio
-import os
 
 from flopsy import mutates, saga
 import numpy as np
-from posix_ipc import SharedMemory
+from mfp.shm_buffer import SharedBuffer
+from mfp.point_store import PointStore, combined_bounds, unpack_points
 
 from imgui_bundle import imgui_node_editor as nedit, ImVec4, implot, imgui
 from mfp.gui_main import MFPGUI
@@ -24,39 +24,6 @@ from ..plot_element import (
 )
 
 
-def find_data_bounds(data_array, point_accessor):
-    min_x = min_y = max_x = max_y = None
-
-    for data in data_array:
-        for datapoint in data:
-            point = point_accessor(datapoint)
-            x = point[0]
-            y = point[1]
-
-            if x is not None:
-                if min_x is None or x < min_x:
-                    min_x = x
-                if max_x is None or x > max_x:
-                    max_x = x
-
-            if y is not None:
-                if min_y is None or y < min_y:
-                    min_y = y
-                if max_y is None or y > max_y:
-                    max_y = y
-
-    if min_x is not None:
-        dx = (max_x - min_x) * 0.1
-        dy = (max_y - min_y) * 0.1
-
-        min_x = min_x - dx
-        max_x = max_x + dx
-        min_y = min_y - dy
-        max_y = max_y + dy
-
-    return (min_x, min_y, max_x, max_y)
-
-
 class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
     backend_name = "imgui"
     FLOAT_SIZE = 4
@@ -91,7 +58,9 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
 
         self.implot_context = implot.create_context()
 
+        # curve: PointStore
         self.message_data = {}
+        self.scroll_x = np.zeros(0, dtype=np.float64)
         self.buffer_data = []
         self.buf_info = None
         self.shm_obj = None
@@ -300,16 +269,17 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
             if self.last_message and self.last_bounds and self.last_bounds > self.last_message:
                 return self.last_bounds_cache
 
-            data_x_min, data_y_min, data_x_max, data_y_max = find_data_bounds(
-                self.message_data.values(), lambda pt: pt[1]
+            data_x_min, data_y_min, data_x_max, data_y_max = combined_bounds(
+                self.message_data.values()
             )
         if self.plot_type == "scope":
             if self.last_bounds and self.last_buffer and self.last_bounds > self.last_buffer:
                 return self.last_bounds_cache
 
-            data_x_min, data_y_min, data_x_max, data_y_max = find_data_bounds(
-                self.buffer_data, lambda pt: [None, pt]
-            )
+            channels = [c for c in self.buffer_data if len(c)]
+            if channels:
+                data_y_min = float(min(c.min() for c in channels))
+                data_y_max = float(max(c.max() for c in channels))
 
         x_min = self.x_min
         x_max = self.x_max
@@ -351,17 +321,12 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
         Histogram in a bar chart. Uses auto binning, should set up to have this
         parameterized
         """
-        if not self.message_data:
+        if not self.message_data.get(0):
             return
-        data = self.message_data[0]
-        bin_data = [
-            p[1] if isinstance(p[1], (int, float, str)) else p[1][1]
-            for p in data
-        ]
         title = self.curve_label.get(0, f"Curve {0}")
         spec = self.get_plot_spec(0)
         implot.plot_histogram(
-            title, np.array(bin_data), spec=spec
+            title, self.message_data[0].y(), spec=spec
         )
         return
 
@@ -376,22 +341,18 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
 
         # single set of bars
         if len(self.message_data) == 1:
-            data = self.message_data[0]
-            x_data = np.array([float(p[1][0]) for p in data])
-            y_data = np.array([float(p[1][1]) for p in data])
+            store = next(iter(self.message_data.values()))
             title = self.curve_label.get(0, f"Curve {0}")
             implot.plot_bars(
-                title, x_data, y_data, 0.9, spec=self.get_plot_spec(0)
+                title, store.x(), store.y(), 0.9, spec=self.get_plot_spec(0)
             )
             return
 
         # multiple sets of bars
         groups = {}
         num_curves = len(self.curve_label)
-        for curve, points in self.message_data.items():
-            for p in points:
-                px = float(p[1][0])
-                py = float(p[1][1])
+        for curve, store in self.message_data.items():
+            for px, py in store.points():
                 bargroup = groups.setdefault(px, num_curves * [0])
                 bargroup[curve] = py
 
@@ -420,71 +381,72 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
         )
 
     def render_scatter(self, x_min, y_min, x_max, y_max):
-        for curve, points in self.message_data.items():
+        # in roll mode points are drawn 'elapsed' seconds to the left
+        # of where they were recorded
+        elapsed = 0
+        if self.scroll_timebase is not None:
+            elapsed = (datetime.now() - self.scroll_timebase).total_seconds()
+
+        for curve, store in self.message_data.items():
             spec = self.get_plot_spec(curve)
             mark_name = self.mark_type.get(curve, None)
             mark = None
             if mark_name and hasattr(implot.Marker_, mark_name):
                 mark = getattr(implot.Marker_, mark_name)
 
-            time_adjusted = [
-                p[1]
-                if self.scroll_timebase is None
-                else [
-                    (p[1][0] - (datetime.now() - self.scroll_timebase).total_seconds()),
-                    p[1][1]
-                ]
-                for p in points
-            ]
-
-            x_data = [
-                float(p[0]) for p in time_adjusted
-                if ((x_min is None or p[0] >= x_min) and (x_max is None or p[0] <= x_max))
-            ]
-            y_data = [
-                float(p[1]) for p in time_adjusted
-                if ((x_min is None or p[0] >= x_min) and (x_max is None or p[0] <= x_max))
-            ]
+            x_data, y_data = store.visible(
+                None if x_min is None else x_min + elapsed,
+                None if x_max is None else x_max + elapsed
+            )
+            if elapsed:
+                if len(self.scroll_x) < len(x_data):
+                    self.scroll_x = np.zeros(2 * len(x_data), dtype=np.float64)
+                x_data = np.subtract(x_data, elapsed, out=self.scroll_x[:len(x_data)])
+
             title = self.curve_label.get(curve, f"Curve {curve}")
             if mark:
                 implot.set_next_marker_style(mark)
 
-            implot.plot_scatter(
-                title, np.array(x_data), np.array(y_data), spec=spec
-            )
+            implot.plot_scatter(title, x_data, y_data, spec=spec)
 
     def draw_ports(self):
         super().draw_ports()
 
     # append scatter data
+    def curve_points(self, curve):
+        store = self.message_data.get(curve)
+        if store is None:
+            store = self.message_data[curve] = PointStore(self.max_points, self.max_seconds)
+        return store
+
     def append(self, point, curve=0):
-        curve = int(curve)
-        pts = self.message_data.setdefault(curve, [])
-        ptnum = len(pts)
-        pts.append([ptnum, point])
+        try:
+            self.curve_points(int(curve)).append(point[0], point[1])
+        except (TypeError, ValueError, IndexError) as e:
+            log.debug("[imgui/plot]: bad point", point, e)
 
     def replace(self, point, curve=0):
-        curve = int(curve)
-        pts = self.message_data.setdefault(curve, [])
-        pts[point[0]] = [point[0], point]
+        try:
+            self.curve_points(int(curve)).replace(point[0], point[0], point[1])
+        except (TypeError, ValueError, IndexError) as e:
+            log.debug("[imgui/plot]: bad point", point, e)
 
     # grab scope data from buffer
     def buffer_grab(self):
-        def offset(channel):
-            return channel * self.buf_info.size * self.FLOAT_SIZE
-
         if self.buf_info is None:
             return None
         if self.shm_obj is None:
-            self.shm_obj = SharedMemory(self.buf_info.buf_id)
+            self.shm_obj = SharedBuffer(self.buf_info.buf_id, readonly=True)
 
         self.last_buffer = datetime.now()
         self.buffer_data = []
         try:
             for c in range(self.buf_info.channels):
-                os.lseek(self.shm_obj.fd, offset(c), os.SEEK_SET)
-                slc = os.read(self.shm_obj.fd, int(self.buf_info.size * self.FLOAT_SIZE))
-                self.buffer_data.append(np.fromstring(slc, dtype=np.float32))
+                # copy out of shared memory, the plot draws from this
+                # on every frame until the next grab
+                self.buffer_data.append(
+                    np.array(self.shm_obj.channel(c, self.buf_info.size))
+                )
                 self.set_bounds(0, None, len(self.buffer_data[0])*1000/self.samplerate, None)
         except Exception as e:
             log.debug("[imgui/plot]: error grabbing data", e)
@@ -508,6 +470,12 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
                     self.append(p, c)
             self.last_message = datetime.now()
             return True
+        if action == "points":
+            # packed batch from a streaming scatter
+            for c, packed in data.items():
+                self.curve_points(int(c)).extend_arrays(*unpack_points(packed))
+            self.last_message = datetime.now()
+            return True
         if action == "set":
             self.buffer_data = []
             self.message_data = {}
@@ -550,11 +518,9 @@ class ImguiPlotElementImpl(PlotElementImpl, ImguiBaseElementImpl, PlotElement):
     async def configure(self, params):
         await super().configure(params)
         if self.plot_editable:
-            oldpts = self.message_data.setdefault(0, [])
-            newpts = [[p, (p, 0)] for p in range(self.x_max)]
-            for p in oldpts:
-                newpts[p[0]] = [p[0], p]
-            self.message_data[0] = newpts
+            store = self.curve_points(0)
+            for p in range(len(store), int(self.x_max or 0)):
+                store.append(p, 0)
 
     def make_control_mode(self):
         if self.plot_editable:
@@ -153,6 +153,11 @@ class GlobalMode (InputMode):
             "toggle-pause", cls.toggle_pause, helptext="Pause/unpause execution",
             keysym="C-A-.", menupath="File > ||[]Pause/unpause execution"
         )
+        cls.bind(
+            "toggle-profile", cls.toggle_profile,
+            helptext="Start/stop timing of object execution",
+            keysym=cls.NO_KEY, menupath="File > ||[]Profile object execution"
+        )
         cls.bind(
             "reset-input", cls.force_reset, helptext="Reset all modifier keys and input modes",
             keysym="C-.", menupath="File > ||Reset input modes"
@@ -855,6 +860,16 @@ class GlobalMode (InputMode):
         except Exception as e:
             print("Caught exception", e)
 
+    async def toggle_profile(self):
+        try:
+            profiling = await MFPGUI().mfp.profile_enable()
+            if profiling:
+                log.warning("Object execution profiling started")
+            else:
+                log.warning("Object execution profiling stopped")
+        except Exception as e:
+            print("Caught exception", e)
+
     async def toggle_snoop(self):
         from mfp.gui.connection_element import ConnectionElement
 
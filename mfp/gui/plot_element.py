@@ -47,6 +47,8 @@ class PlotElement (BaseElement):
         'curve_color': ParamInfo(label="Curve colors", param_type=DictOfRGBAColor, show=True),
         'mark_type': ParamInfo(label="Mark types", param_type=dict, show=True),
         'stroke_type': ParamInfo(label="Stroke types", param_type=dict, show=True),
+        'max_points': ParamInfo(label="Points kept per curve", param_type=int, null=True, show=True),
+        'max_seconds': ParamInfo(label="X range kept per curve", param_type=float, null=True, show=True),
     }
 
     store_attrs = {
@@ -89,6 +91,8 @@ class PlotElement (BaseElement):
         self.stroke_type = {}
         self.curve_label = {}
         self.curve_color = {}
+        self.max_points = None
+        self.max_seconds = None
 
         self.min_interval = 75
         self.last_draw = None
@@ -163,6 +167,8 @@ class PlotElement (BaseElement):
         self.plot_type = params.get('plot_type', self.plot_type)
         self.plot_editable = params.get('plot_editable', self.plot_editable)
         self.plot_edit_draw = params.get('plot_edit_draw', self.plot_edit_draw)
+        self.max_points = params.get('max_points', self.max_points)
+        self.max_seconds = params.get('max_seconds', self.max_seconds)
 
         self.set_bounds(x_min, y_min, x_max, y_max)
 
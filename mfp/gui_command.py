@@ -1,9 +1,46 @@
 import asyncio
+import importlib
 
 from datetime import datetime
 from carp.service import apiclass, noresp
 
 
+# display_type: (module in mfp.gui, class name). Element modules
+# are imported the first time an element of that type is created
+element_types = {
+    'processor': ('processor_element', 'ProcessorElement'),
+    'message': ('message_element', 'MessageElement'),
+    'patch_message': ('message_element', 'PatchMessageElement'),
+    'text': ('text_element', 'TextElement'),
+    'enum': ('enum_element', 'EnumElement'),
+    'plot': ('plot_element', 'PlotElement'),
+    'slidemeter': ('slidemeter_element', 'FaderElement'),
+    'fader': ('slidemeter_element', 'FaderElement'),
+    'barmeter': ('slidemeter_element', 'BarMeterElement'),
+    'dial': ('slidemeter_element', 'DialElement'),
+    'patch': ('patch_display', 'PatchDisplay'),
+    'sendvia': ('via_element', 'SendViaElement'),
+    'recvvia': ('via_element', 'ReceiveViaElement'),
+    'sendsignalvia': ('via_element', 'SendSignalViaElement'),
+    'recvsignalvia': ('via_element', 'ReceiveSignalViaElement'),
+    'toggle': ('button_element', 'ToggleButtonElement'),
+    'button': ('button_element', 'BangButtonElement'),
+    'indicator': ('button_element', 'ToggleIndicatorElement'),
+}
+element_classes = {}
+
+
+def element_class(elementtype):
+    if elementtype not in element_types:
+        elementtype = 'processor'
+    element_cls = element_classes.get(elementtype)
+    if element_cls is None:
+        mod_name, cls_name = element_types[elementtype]
+        module = importlib.import_module(".gui." + mod_name, "mfp")
+        element_cls = element_classes[elementtype] = getattr(module, cls_name)
+    return element_cls
+
+
 @apiclass
 class GUICommand:
     def ready(self):
@@ -14,14 +51,24 @@ class GUICommand:
             return False
 
     @noresp
-    def log_write(self, msg, level):
+    def log_write(self, msg, level=0):
+        """
+        Write a log message, or a list of (msg, level) entries
+        """
         from .gui_main import MFPGUI
-        MFPGUI().appwin.last_activity_time = datetime.now()
+        if isinstance(msg, str):
+            entries = [(msg, level)]
+        else:
+            entries = msg
+
         window = MFPGUI().appwin
         if window:
-            MFPGUI().appwin.log_write(msg, level)
+            window.last_activity_time = datetime.now()
+            for entry_msg, entry_level in entries:
+                window.log_write(entry_msg, entry_level)
         else:
-            print(msg)
+            for entry_msg, _ in entries:
+                print(entry_msg)
 
     def dsp_info(self, info):
         from .gui_main import MFPGUI
@@ -97,44 +144,12 @@ class GUICommand:
         from .gui_main import MFPGUI
         from .gui.patch_display import PatchDisplay
         from .gui.base_element import BaseElement
-        from .gui.processor_element import ProcessorElement
-        from .gui.message_element import MessageElement, PatchMessageElement
-        from .gui.text_element import TextElement
-        from .gui.enum_element import EnumElement
-        from .gui.plot_element import PlotElement
-        from .gui.slidemeter_element import FaderElement, BarMeterElement, DialElement
-        from .gui.via_element import SendViaElement, ReceiveViaElement
-        from .gui.via_element import SendSignalViaElement, ReceiveSignalViaElement
-        from .gui.button_element import ToggleButtonElement
-        from .gui.button_element import ToggleIndicatorElement
-        from .gui.button_element import BangButtonElement
         from mfp import log
 
         MFPGUI().appwin.last_activity_time = datetime.now()
 
         elementtype = params.get('display_type', 'processor')
-
-        ctors = {
-            'processor': ProcessorElement,
-            'message': MessageElement,
-            'patch_message': PatchMessageElement,
-            'text': TextElement,
-            'enum': EnumElement,
-            'plot': PlotElement,
-            'slidemeter': FaderElement,
-            'fader': FaderElement,
-            'barmeter': BarMeterElement,
-            'dial': DialElement,
-            'patch': PatchDisplay,
-            'sendvia': SendViaElement,
-            'recvvia': ReceiveViaElement,
-            'sendsignalvia': SendSignalViaElement,
-            'recvsignalvia': ReceiveSignalViaElement,
-            'toggle': ToggleButtonElement,
-            'button': BangButtonElement,
-            'indicator': ToggleIndicatorElement
-        }
-        element_cls = ctors.get(elementtype, ProcessorElement)
+        element_cls = element_class(elementtype)
         if element_cls:
             o = element_cls.build(MFPGUI().appwin, params.get('position_x', 0), params.get('position_y', 0))
             o.obj_id = obj_id
@@ -214,6 +229,28 @@ class GUICommand:
         obj_2.connections_in.append(c)
         await c.update()
 
+    async def configure_batch(self, updates):
+        """
+        Apply several configure() updates in one call. Each update
+        is (obj_id, params) with only the params that changed
+        """
+        from .gui_main import MFPGUI
+        for obj_id, params in updates:
+            if MFPGUI().recall(obj_id) is not None:
+                await self.configure(obj_id, **params)
+
+    async def create_batch(self, items):
+        """
+        Create several elements in one call. Each item is the
+        argument list for create()
+        """
+        for item in items:
+            await self.create(*item)
+
+    async def connect_batch(self, connections):
+        for conn in connections:
+            await self.connect(*conn)
+
     async def disconnect(self, obj_1_id, obj_1_port, obj_2_id, obj_2_port):
         from .gui_main import MFPGUI
         from .gui.patch_display import PatchDisplay
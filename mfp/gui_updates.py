@@ -0,0 +1,99 @@
+"""
+gui_updates.py - coalesce configure() updates bound for the GUI
+
+Processor.conf() records changed params here instead of sending an
+RPC per change. Params changed since the last flush are merged per
+object and sent to the GUI at most once per frame.
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import asyncio
+
+from mfp import log
+from .utils import FlushScheduler
+
+
+class GUIUpdateQueue:
+    # these change an element's size, ports or identity, so they are
+    # sent on the next pass of the event loop instead of waiting for
+    # the next frame
+    PRIORITY_PARAMS = frozenset([
+        "num_inlets", "num_outlets", "dsp_inlets", "dsp_outlets",
+        "name", "scope", "width", "height", "panel_mode"
+    ])
+
+    def __init__(self, rate=60):
+        self.rate = rate
+        self.loop = asyncio.get_event_loop()
+
+        # obj_id: [params, number of conf() calls merged into params]
+        self.pending = {}
+        self.priority_ids = set()
+        self.flusher = FlushScheduler(self.flush, self._flush_delay)
+        self.last_flush = 0
+        self.stats = dict(updates=0, merged=0, dropped=0, sent=0, flushes=0)
+
+    def configure(self, obj_id, params):
+        try:
+            self.loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # called from outside the event loop thread
+            self.loop.call_soon_threadsafe(self.configure, obj_id, params)
+            return
+
+        self.stats['updates'] += 1
+        entry = self.pending.get(obj_id)
+        if entry is None:
+            self.pending[obj_id] = [dict(params), 1]
+        else:
+            entry[0].update(params)
+            entry[1] += 1
+            self.stats['merged'] += 1
+
+        if not self.PRIORITY_PARAMS.isdisjoint(params):
+            self.priority_ids.add(obj_id)
+        self.flusher.schedule(self.loop)
+
+    def discard(self, obj_id):
+        """
+        Forget pending updates for an object whose GUI is going away
+        """
+        entry = self.pending.pop(obj_id, None)
+        self.priority_ids.discard(obj_id)
+        if entry is not None:
+            self.stats['dropped'] += entry[1]
+
+    def _flush_delay(self):
+        if self.priority_ids or not self.rate:
+            # flush on the next pass instead of waiting for the frame
+            return 0
+        return self.last_flush + 1.0 / self.rate - self.loop.time()
+
+    async def flush(self):
+        """
+        Send all pending updates in one RPC, structural changes first
+        """
+        from .mfp_app import MFPApp
+
+        pending = self.pending
+        priority = self.priority_ids
+        self.pending = {}
+        self.priority_ids = set()
+        self.last_flush = self.loop.time()
+        if not pending:
+            return
+
+        order = [obj_id for obj_id in pending if obj_id in priority]
+        order.extend(obj_id for obj_id in pending if obj_id not in priority)
+        updates = [(obj_id, pending[obj_id][0]) for obj_id in order]
+        count = sum(entry[1] for entry in pending.values())
+
+        try:
+            await MFPApp().gui_command.configure_batch(updates)
+            self.stats['sent'] += len(updates)
+            self.stats['flushes'] += 1
+        except Exception as e:
+            self.stats['dropped'] += count
+            log.debug("[gui_updates] error sending", len(updates), "updates:", e)
+            log.debug_traceback(e)
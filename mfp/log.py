@@ -3,6 +3,7 @@ import inspect
 import sys
 import string
 import threading
+from collections import deque
 from datetime import datetime
 
 log_time_base = datetime.now()
@@ -22,11 +23,11 @@ ts_trans = str.maketrans("0123456789", "xxxxxxxxxx")
 
 
 def make_log_entry(tag, *parts):
-
-    msg = ' '.join([str(p) for p in parts])
     if log_quiet and not log_verbose and tag != "print":
         return None
 
+    msg = ' '.join([str(p) for p in parts])
+
     if log_raw and not log_verbose:
         return msg + '\n'
 
@@ -58,6 +59,67 @@ def write_log_entry(msg, level=0):
         log_file.write(msg)
 
 
+class LogBuffer:
+    """
+    log_func that collects entries in a bounded ring buffer and
+    passes them to 'func' as a list of (msg, level) every 'interval'
+    seconds. If the buffer overflows, the oldest entries are replaced
+    by a count of dropped messages
+    """
+    def __init__(self, func, size=1000, interval=0.05):
+        from .utils import FlushScheduler
+        self.func = func
+        self.interval = interval
+        self.entries = deque(maxlen=size)
+        self.dropped = 0
+        self.flush_pending = False
+        self.flusher = FlushScheduler(self.flush, lambda: self.interval)
+        self.lock = threading.Lock()
+
+    def __call__(self, msg, level=0):
+        with self.lock:
+            if len(self.entries) == self.entries.maxlen:
+                self.dropped += 1
+            self.entries.append((msg, level))
+            if self.flush_pending:
+                return
+            self.flush_pending = True
+
+        if log_loop is None:
+            # no event loop to schedule on, so write through
+            return self.func(self._take_entries())
+        if threading.get_ident() == log_thread:
+            self.flusher.schedule(log_loop)
+        else:
+            log_loop.call_soon_threadsafe(self.flusher.schedule, log_loop)
+
+    def _take_entries(self):
+        with self.lock:
+            entries = list(self.entries)
+            dropped = self.dropped
+            self.entries.clear()
+            self.dropped = 0
+            self.flush_pending = False
+
+        if dropped:
+            marker = "%d messages dropped" % dropped
+            entries.insert(0, (make_log_entry("log", marker) or marker + '\n', 1))
+        return entries
+
+    async def flush(self):
+        entries = self._take_entries()
+        if not entries:
+            return
+
+        try:
+            rv = self.func(entries)
+            if inspect.isawaitable(rv):
+                await rv
+        except Exception as e:
+            if log_file:
+                log_file.write("[log] could not write %d entries: %s\n" % (len(entries), e))
+
+
 def rpclog(msg, level):
     levels = {0: "DEBUG", 1: "WARNING", 2: "ERROR", 3: "FATAL"}
     if msg:
@@ -93,19 +155,22 @@ def info(* parts, **kwargs):
 
 
 def debug(*parts, **kwargs):
+    if not log_debug:
+        return
+
     if "module" in kwargs:
         module = kwargs["module"]
     else:
         module = log_module
 
-    if not log_debug:
-        return
-    else:
-        write_log_entry(make_log_entry(module, *parts), level=0)
+    write_log_entry(make_log_entry(module, *parts), level=0)
 
 
 def debug_traceback(exc=None):
     import traceback
+    if not log_debug:
+        return
+
     if exc:
         tb = traceback.format_exception(exc)
         for l in tb:
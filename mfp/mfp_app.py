@@ -9,6 +9,7 @@ import inspect
 import os
 import os.path
 import configparser
+import time
 import simplejson as json
 
 from .patch import Patch
@@ -20,6 +21,8 @@ from .processor import Processor
 from .method import MethodCall
 from .utils import QuittableThread, AsyncExecMonitor, AsyncTaskManager, SignalMixin
 from .bang import Unbound
+from .gui_updates import GUIUpdateQueue
+from .patch_cache import PatchFileCache
 
 from pluginfo import PlugInfo
 
@@ -52,6 +55,8 @@ class MFPApp (Singleton, SignalMixin):
         self.dsp_outputs = 2
         self.midi_inputs = 1
         self.midi_outputs = 1
+        self.midi_output_latency = 0
+        self.gui_update_rate = 60
         self.samplerate = 44100
         self.blocksize = 256
         self.max_blocksize = 2048
@@ -86,21 +91,33 @@ class MFPApp (Singleton, SignalMixin):
 
         self.leftover_threads = []
 
-        # processor class registry
+        # processor class registry, and names that are registered
+        # by calling a loader the first time they are needed
         self.registry = {}
+        self.lazy_registry = {}
+
+        # seconds spent in each phase of startup
+        self.startup_timings = {}
 
         # objects we have given IDs to
         self.objects = {}
         self.next_obj_id = 0
 
+        # parsed .mfp files and search path lookups
+        self.patch_files = PatchFileCache()
+
         # plugin info database
         self.pluginfo = PlugInfo()
+        self.plugins_indexing = False
         self.app_scope = LexicalScope("__app__")
         self.patches = {}
 
         # helper to run async task
         self.async_task = AsyncTaskManager()
 
+        # coalesced configure() updates to the GUI
+        self.gui_updates = GUIUpdateQueue()
+
     async def setup(self):
         from .mfp_command import MFPCommand
         from .gui_command import GUICommand
@@ -162,9 +179,10 @@ class MFPApp (Singleton, SignalMixin):
             GUICommandFactory = await self.rpc_host.require(GUICommand)
 
             self.gui_command = await GUICommandFactory()
+            self.gui_updates.rate = self.gui_update_rate
 
             log.debug("Switching logging to GUI. Start with -v to always log to console.")
-            log.log_func = self.gui_command.log_write
+            log.log_func = log.LogBuffer(self.gui_command.log_write)
 
             self.console = Interpreter(dict(app=self))
 
@@ -182,16 +200,34 @@ class MFPApp (Singleton, SignalMixin):
 
             # crawl plugins
             log.debug("Collecting information about installed plugins...")
+            self.plugins_indexing = True
             self.async_task(self.index_plugins())
 
 
     async def index_plugins(self):
         self.pluginfo.samplerate = self.samplerate
-        await asyncio.to_thread(self.pluginfo.index_ladspa)
+        self.pluginfo.cache_path = PlugInfo.default_cache_path()
+        self.plugins_indexing = True
+        try:
+            await asyncio.to_thread(self.pluginfo.index_ladspa)
+        finally:
+            self.plugins_indexing = False
         log.debug(
             "Found %d LADSPA plugins in %d files" % (
                 len(self.pluginfo.pluginfo), len(self.pluginfo.libinfo))
         )
+        for fullpath in self.pluginfo.failed:
+            log.warning(f"[plugins] Could not read LADSPA library {fullpath}")
+
+    async def find_plugin(self, name):
+        """
+        Plugin info for 'name', waiting for the plugin index to get
+        to it if it's still being built
+        """
+        pinfo = self.pluginfo.find(name)
+        if pinfo is None and self.plugins_indexing:
+            pinfo = await asyncio.to_thread(self.pluginfo.wait_for, name)
+        return pinfo
 
     async def exec_batch(self):
         # configure logging
@@ -247,7 +283,10 @@ class MFPApp (Singleton, SignalMixin):
         from . import midi
         if self.midi_mgr:
             self.midi_mgr.finish()
-        self.midi_mgr = midi.MFPMidiManager(self.midi_inputs, self.midi_outputs)
+        self.midi_mgr = midi.MFPMidiManager(
+            self.midi_inputs, self.midi_outputs,
+            output_latency=self.midi_output_latency / 1000.0
+        )
         self.async_task(self.midi_mgr.run())
         log.debug("MIDI started (ALSA Sequencer)")
 
@@ -294,6 +333,16 @@ class MFPApp (Singleton, SignalMixin):
     def register(self, name, ctor):
         self.registry[name] = ctor
 
+    def register_lazy(self, name, loader):
+        self.lazy_registry[name] = loader
+
+    def lookup_type(self, name):
+        ctor = self.registry.get(name)
+        if ctor is None and name in self.lazy_registry:
+            self.lazy_registry.pop(name)()
+            ctor = self.registry.get(name)
+        return ctor
+
     async def on_host_exports(self, event, peer_id, exports, metadata):
         from .dsp_object import DSPContext
         if "DSPObject" in exports:
@@ -400,10 +449,16 @@ class MFPApp (Singleton, SignalMixin):
 
         self.patches[patch.name] = patch
         if show_gui:
+            guistart = time.monotonic()
             await patch.create_gui(**kwargs)
+            patch.add_load_timing('gui', guistart)
         patch.mark_ready()
         loadtime = datetime.now() - starttime
-        log.debug("Patch loaded, elapsed time %s" % loadtime)
+        phases = ", ".join(
+            "%s %.1fms" % (phase, seconds * 1000)
+            for phase, seconds in patch.load_timings.items()
+        )
+        log.debug("Patch loaded, elapsed time %s (%s)" % (loadtime, phases))
         if show_gui and patch.gui_created:
             await MFPApp().gui_command.select(patch.obj_id)
         return patch
@@ -439,12 +494,12 @@ class MFPApp (Singleton, SignalMixin):
             load_type = patch.parse_obj(init_type[1:-1], **defs)
 
         # first try: is a factory registered?
-        ctor = self.registry.get(load_type)
+        ctor = self.lookup_type(load_type)
 
         # second try: is there a .mfp patch file in the search path?
         if ctor is None:
             filename = load_type + ".mfp"
-            filepath = utils.find_file_in_path(filename, self.searchpath)
+            filepath = self.patch_files.find(filename, self.searchpath)
 
             if filepath:
                 (_, ctor) = Patch.register_file(filepath)
@@ -596,6 +651,8 @@ class MFPApp (Singleton, SignalMixin):
         return None
 
     async def finish(self):
+        if isinstance(log.log_func, log.LogBuffer):
+            await log.log_func.flush()
         log.log_func = None
         if self.console:
             self.console.write_cb = None
@@ -764,3 +821,85 @@ class MFPApp (Singleton, SignalMixin):
         else:
             Processor.paused = True
         return Processor.paused
+
+    def timer_jitter(self, reset=False):
+        """
+        Late-by statistics for control-rate timers (metro, delay, etc),
+        for use from the console: app.timer_jitter()
+        """
+        from .timer import MultiTimer
+        report = MultiTimer.jitter_report()
+        if reset:
+            for timer in MultiTimer.all_timers:
+                timer.stats.reset()
+        return report
+
+    def gui_update_stats(self, reset=False):
+        """
+        Counts of GUI configure updates merged, dropped and sent,
+        for use from the console: app.gui_update_stats()
+        """
+        stats = dict(self.gui_updates.stats)
+        if reset:
+            for key in self.gui_updates.stats:
+                self.gui_updates.stats[key] = 0
+        return stats
+
+    def profile(self, enable=None):
+        """
+        Turn per-object trigger timing on or off (toggle with no
+        argument), for use from the console: app.profile()
+        """
+        from . import profiler
+        if enable is None:
+            enable = not profiler.is_enabled()
+        if enable:
+            profiler.enable()
+        else:
+            profiler.disable()
+        return profiler.is_enabled()
+
+    def profile_report(self, count=20, sort_key="total_ms", reset=False):
+        """
+        Objects taking the most trigger time, and totals per patch,
+        for use from the console: app.profile_report()
+        """
+        from . import profiler
+        objects = list(self.objects.values())
+        report = dict(
+            enabled=profiler.is_enabled(),
+            objects=profiler.top(objects, count, sort_key),
+            patches=profiler.patch_totals(objects)
+        )
+        if reset:
+            profiler.reset(objects)
+        return report
+
+    def reload_patch_files(self, filename=None):
+        """
+        Re-read .mfp files used as object types (and re-check the search
+        path) on next use, for use from the console: app.reload_patch_files()
+        """
+        self.patch_files.reload(os.path.abspath(filename) if filename else None)
+        return dict(self.patch_files.stats)
+
+    def add_startup_timing(self, phase, start):
+        self.startup_timings[phase] = (
+            self.startup_timings.get(phase, 0) + time.monotonic() - start
+        )
+
+    def startup_report(self):
+        """
+        Milliseconds spent in each phase of startup, and in loading
+        each builtin module so far. From the console: app.startup_report()
+        """
+        return dict(
+            phases={
+                phase: round(seconds * 1000, 2)
+                for phase, seconds in self.startup_timings.items()
+            },
+            builtins={
+                mod_name: round(seconds * 1000, 2)
+                for mod_name, seconds in builtins.load_times.items()
+            },
+        )
@@ -9,6 +9,7 @@ from carp.service import apiclass, noresp
 
 from mfp import log
 from .bang import Bang, Unbound
+from .dsp_response import unpack_responses
 from .patch import Patch
 from .method import MethodCall
 from .processor import Processor
@@ -79,6 +80,21 @@ class MFPCommand:
             except Exception as e:
                 log.error(f"[dsp_response] Sending to obj {obj.name} (id={obj_id}) type={resp_type} value='{resp_value}'... error {e}")
 
+    @noresp
+    async def dsp_response_batch(self, packed):
+        from .mfp_app import MFPApp
+        def is_level(obj_id, resp_type):
+            obj = MFPApp().recall(obj_id)
+            return resp_type in getattr(obj, 'dsp_level_responses', ())
+
+        for obj_id, resp_type, resp_value in unpack_responses(packed, is_level):
+            obj = MFPApp().recall(obj_id)
+            if isinstance(obj, Processor):
+                try:
+                    await obj.send((resp_type, resp_value), -1)
+                except Exception as e:
+                    log.error(f"[dsp_response] Sending to obj {obj.name} (id={obj_id}) type={resp_type} value='{resp_value}'... error {e}")
+
     @noresp
     async def send_bang(self, obj_id, port):
         from .mfp_app import MFPApp
@@ -442,3 +458,11 @@ class MFPCommand:
     def toggle_pause(self):
         from .mfp_app import MFPApp
         return MFPApp().toggle_pause()
+
+    def profile_enable(self, state=None):
+        from .mfp_app import MFPApp
+        return MFPApp().profile(state)
+
+    def get_profile_report(self, count=20, sort_key="total_ms", reset=False):
+        from .mfp_app import MFPApp
+        return MFPApp().profile_report(count, sort_key, reset)
@@ -5,7 +5,11 @@ main.py: main routine for mfp
 Copyright (c) 2010-2016 Bill Gribble <grib@billgribble.com>
 '''
 
+import time
+import_start = time.monotonic()
+
 import asyncio
+import importlib.util
 import math
 import random
 import re
@@ -21,19 +25,14 @@ from .evaluator import Evaluator, LazyExpr
 from .utils import QuittableThread
 from .bang import Bang, Uninit
 from .method import MethodCall
-from .midi import (
-    NoteOn, NoteOff, NotePress,
-    MidiCC, MidiUndef, MidiPitchbend, MidiPgmChange,
-    MidiClock, MidiSPP, MidiQFrame, MidiSysex
-)
-from .builtins.file import EOF
 
 from .mfp_app import MFPApp, StartupError
 
 from . import log
 from . import builtins
 from . import utils
-from . import scale
+
+import_done = time.monotonic()
 
 mfp_banner = "MFP - Music For Programmers, version %s"
 
@@ -72,26 +71,32 @@ def add_evaluator_defaults():
     Evaluator.bind_global("MethodCall", MethodCall)
     Evaluator.bind_global("LazyExpr", LazyExpr)
 
-    Evaluator.bind_global("EOF", EOF)
+    # these modules are only imported if a name from them is used
+    Evaluator.bind_global_lazy("EOF", "mfp.builtins.file", "EOF")
 
-    Evaluator.bind_global("NoteOn", NoteOn)
-    Evaluator.bind_global("NoteOff", NoteOff)
-    Evaluator.bind_global("NotePress", NotePress)
-    Evaluator.bind_global("MidiCC", MidiCC)
-    Evaluator.bind_global("MidiPgmChange", MidiPgmChange)
-    Evaluator.bind_global("MidiPitchbend", MidiPitchbend)
-    Evaluator.bind_global("MidiUndef", MidiUndef)
-    Evaluator.bind_global("MidiQFrame", MidiQFrame)
-    Evaluator.bind_global("MidiSPP", MidiSPP)
-    Evaluator.bind_global("MidiClock", MidiClock)
-    Evaluator.bind_global("MidiSysex", MidiSysex)
+    for name in (
+        "NoteOn", "NoteOff", "NotePress", "MidiCC", "MidiPgmChange",
+        "MidiPitchbend", "MidiUndef", "MidiQFrame", "MidiSPP", "MidiClock",
+        "MidiSysex"
+    ):
+        Evaluator.bind_global_lazy(name, "mfp.midi", name)
 
     Evaluator.bind_global("builtins", builtins)
     Evaluator.bind_global("color", lambda v: ColorDB.from_int(v))
-    Evaluator.bind_global("scale", scale)
+    Evaluator.bind_global_lazy("scale", "mfp.scale")
     Evaluator.bind_global("app", MFPApp())
 
 
+def log_startup_timings(app):
+    report = app.startup_report()
+    phases = ", ".join(
+        "%s %.1fms" % (phase, ms) for phase, ms in report['phases'].items()
+    )
+    log.debug("Startup complete, %.1fms (%s, %d builtin modules loaded)" % (
+        sum(report['phases'].values()), phases, len(report['builtins'])
+    ))
+
+
 def exit_sighandler(signum, frame):
     log.log_force_console = True
     log.debug("Received terminating signal %s, exiting" % signum)
@@ -113,13 +118,15 @@ def test_imports(cmdline_args):
             gi.require_version('Clutter', '1.0')
             from gi.repository import Clutter, GObject, Gtk, Gdk, GtkClutter, Pango  # noqa: F401
 
+        # only check that these can be found; importing them here
+        # would cost startup time even if they are never used
+        required = ["simplejson", "numpy", "nose", "posix_ipc"]
         if backend == "imgui":
-            import imgui_bundle
+            required.append("imgui_bundle")
 
-        import simplejson  # noqa: F401
-        import numpy  # noqa: F401
-        import nose  # noqa: F401
-        import posix_ipc  # noqa: F401
+        for modname in required:
+            if importlib.util.find_spec(modname) is None:
+                raise ImportError(f"No module named '{modname}'")
     except Exception:
         import traceback
         traceback.print_exc()
@@ -159,6 +166,10 @@ async def main():
                         help="Number of MIDI input ports")
     parser.add_argument("--midi-outs", default=1, type=int,
                         help="Number of MIDI output ports")
+    parser.add_argument("--midi-latency", default=0, type=float,
+                        help="Max time (ms) to hold MIDI output for batching (default: 0)")
+    parser.add_argument("--gui-rate", default=60, type=float,
+                        help="Max updates per second sent to each GUI element (default: 60)")
     parser.add_argument("-u", "--osc-udp-port", default=5555, type=int,
                         help="UDP port to listen for OSC (default: 5555)")
     parser.add_argument("-m", "--magnification", default=1.0, type=float,
@@ -222,6 +233,8 @@ async def main():
     app.dsp_outputs = args.get("outputs")
     app.midi_inputs = args.get("midi_ins")
     app.midi_outputs = args.get("midi_outs")
+    app.midi_output_latency = args.get("midi_latency")
+    app.gui_update_rate = args.get("gui_rate")
     app.osc_port = args.get("osc_udp_port")
     app.searchpath = ':'.join(args.get("patch_path"))
     app.extpath = ':'.join(args.get("lib_path"))
@@ -290,14 +303,18 @@ async def main():
     import signal
     signal.signal(signal.SIGTERM, exit_sighandler)
 
+    app.startup_timings['import'] = import_done - import_start
+    phase_start = time.monotonic()
     try:
         await app.setup()
     except (StartupError, KeyboardInterrupt, SystemExit):
         log.debug("Setup did not complete properly, exiting")
         await app.finish()
         return
+    app.add_startup_timing('setup', phase_start)
 
     # ok, now start configuring the running system
+    phase_start = time.monotonic()
     add_evaluator_defaults()
     builtins.register()
 
@@ -324,6 +341,7 @@ async def main():
         except Exception as e:
             log.debug("initfile: Exception while loading initfile", f)
             log.debug(e)
+    app.add_startup_timing('init', phase_start)
 
     if app.debug:
         import yappi
@@ -338,6 +356,7 @@ async def main():
         log.log_debug = None
         log.log_file = None
         await app.open_file(None)
+        builtins.register_all()
         for name, factory in sorted(app.registry.items()):
             if hasattr(factory, 'doc_tooltip_obj'):
                 print("%-12s : %s" % ("[%s]" % name, factory.doc_tooltip_obj))
@@ -374,11 +393,14 @@ async def main():
 
         else:
             # create initial patch
+            phase_start = time.monotonic()
             if len(patchfiles):
                 for p in patchfiles:
                     await app.open_file(p)
             elif not app.no_default:
                 await app.open_file(None)
+            app.add_startup_timing('open', phase_start)
+            log_startup_timings(app)
             # allow session management
             app.session_management_setup()
 
@@ -6,37 +6,60 @@ Copyright (c) 2012 Bill Gribble <grib@billgribble.com>
 '''
 
 import asyncio
+import inspect
+import time
 from threading import Lock
 from datetime import datetime
 import alsa_midi
 from . import lv2midi
 from . import log
-from .utils import isiterable
+from .utils import isiterable, FlushScheduler
 from .patch_json import ext_encode
 
 
 class LV2MidiEvent:
+    __slots__ = ('value',)
+
     def __init__(self, raw_value):
         self.value = raw_value
 
 @ext_encode
 class MidiEvent:
+    """
+    Base of MIDI event types
+
+    Events made from an ALSA sequencer event keep the raw event and
+    only pull out source and channel up front (what dispatch needs).
+    The remaining fields are decoded the first time one of them is
+    read, see __getattr__
+    """
+    __slots__ = ('event', 'channel', 'source', 'dest', 'timestamp', 'port')
+
     _lv2_registry = {}
     _alsa_registry = {}
 
     alsa_type = None
     lv2_type = None
 
+    # per-class fields and their defaults
+    _defaults = {}
+
     def __init__(self, event=None):
         self.event = event
         self.channel = 0
         self.source = None
+
+        if event and isinstance(event, alsa_midi.Event):
+            self.source = event.source
+            self.channel = getattr(event, 'channel', None)
+            return
+
         self.dest = None
+        for attr, value in self._defaults.items():
+            setattr(self, attr, value)
 
-        if self.event and isinstance(self.event, alsa_midi.Event):
-            self.from_alsaseq(self.event)
-        elif self.event and isinstance(self.event, LV2MidiEvent):
-            self.from_lv2(self.event.value)
+        if event and isinstance(event, LV2MidiEvent):
+            self.from_lv2(event.value)
 
     def __init_subclass__(cls, **kwargs):
         super().__init_subclass__(**kwargs)
@@ -45,12 +68,68 @@ class MidiEvent:
         if hasattr(cls, 'alsa_type'):
             MidiEvent._alsa_registry[cls.alsa_type] = cls
 
+    def __getattr__(self, attr):
+        # only called for empty slots
+        if attr in self._defaults or attr in ('dest', 'timestamp'):
+            event = object.__getattribute__(self, 'event')
+            if isinstance(event, alsa_midi.Event):
+                self._decode(event)
+                return object.__getattribute__(self, attr)
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{attr}'"
+        )
+
+    def _slot_values(self):
+        values = {}
+        for klass in type(self).__mro__:
+            for attr in getattr(klass, '__slots__', ()):
+                try:
+                    values[attr] = object.__getattribute__(self, attr)
+                except AttributeError:
+                    pass
+        return values
+
+    def _decode(self, seqevent):
+        # fields written before the first read (e.g. midi_out setting
+        # the channel) keep their new values
+        written = self._slot_values()
+        self.from_alsaseq(seqevent)
+        for attr, value in written.items():
+            setattr(self, attr, value)
+
+    def copy(self):
+        """
+        Shallow copy that leaves the ALSA event undecoded
+        """
+        event = object.__new__(type(self))
+        for attr, value in self._slot_values().items():
+            setattr(event, attr, value)
+        return event
+
+    def ext_dict(self):
+        """
+        Attribute dict for JSON encoding (there is no __dict__)
+        """
+        attrs = {}
+        for klass in reversed(type(self).__mro__):
+            for attr in getattr(klass, '__slots__', ()):
+                try:
+                    attrs[attr] = getattr(self, attr)
+                except AttributeError:
+                    pass
+        return attrs
+
     def seq_type(self):
         if self.event is not None:
             return self.event.etype
         return self.alsa_type
 
+    def learn_source(self):
+        return (self.source, type(self).__name__, self.channel, None)
+
     def from_alsaseq(self, seqevent):
+        for attr, value in self._defaults.items():
+            setattr(self, attr, value)
         self.source = seqevent.source
         self.dest = seqevent.dest
         self.channel = None
@@ -73,19 +152,20 @@ class MidiEvent:
 
 @ext_encode
 class MidiUndef (MidiEvent):
+    __slots__ = ()
+
     def __repr__(self):
         return "<MidiUndef %s>" % self.event
 
 
 @ext_encode
 class Note (MidiEvent):
+    __slots__ = ('key', 'velocity', 'duration')
     alsa_type = alsa_midi.EventType.NOTE
+    _defaults = dict(key=0, velocity=0, duration=0)
 
-    def __init__(self, seqevent=None):
-        self.key = 0
-        self.velocity = 0
-        self.duration = 0
-        super().__init__(seqevent)
+    def learn_source(self):
+        return (self.source, type(self).__name__, self.channel, self.key)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -108,23 +188,10 @@ class Note (MidiEvent):
 
 @ext_encode
 class NoteOn (Note):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.NOTEON
     lv2_type = lv2midi.LV2_MIDI_MSG_NOTE_ON
 
-    def __init__(self, seqevent=None):
-        self.key = 0
-        self.velocity = 0
-
-        super().__init__(seqevent)
-
-    def source(self):
-        return (self.event.dst, NoteOn.__name__, self.channel, self.key)
-
-    def from_alsaseq(self, seqevent):
-        super().from_alsaseq(seqevent)
-        self.key = seqevent.note
-        self.velocity = seqevent.velocity
-
     def to_alsaseq(self):
         return alsa_midi.NoteOnEvent(
             channel=self.channel,
@@ -147,25 +214,13 @@ class NoteOn (Note):
 
 @ext_encode
 class NoteOff (Note):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.NOTEOFF
     lv2_type = lv2midi.LV2_MIDI_MSG_NOTE_OFF
 
-    def __init__(self, seqevent=None):
-        self.key = 0
-        self.velocity = 0
-        super().__init__(seqevent)
-
     def seq_data(self):
         return (self.channel-1, self.key, 0, self.velocity, 0)
 
-    def source(self):
-        return (self.event.dst, NoteOff.__name__, self.channel, self.key)
-
-    def from_alsaseq(self, seqevent):
-        super().from_alsaseq(seqevent)
-        self.key = seqevent.note
-        self.velocity = seqevent.velocity
-
     def to_alsaseq(self):
         return alsa_midi.NoteOffEvent(
             channel=self.channel,
@@ -189,24 +244,18 @@ class NoteOff (Note):
 
 @ext_encode
 class NotePress (Note):
+    __slots__ = ()
     lv2_type = lv2midi.LV2_MIDI_MSG_NOTE_PRESSURE
     alsa_type = alsa_midi.EventType.KEYPRESS
-
-    def __init__(self, seqevent=None):
-        self.key = -1
-        self.velocity = 0
-        super().__init__(seqevent)
-
-    def source(self):
-        return (self.event.dst, NotePress.__name__, self.channel, self.key)
+    _defaults = dict(key=-1, velocity=0, duration=0)
 
     def from_alsaseq(self, seqevent):
-        super().from_alsaseq(seqevent)
+        MidiEvent.from_alsaseq(self, seqevent)
         if seqevent.type == alsa_midi.EventType.KEYPRESS:
             self.key = seqevent.note
             self.velocity = seqevent.velocity
         elif seqevent.type == alsa_midi.EventType.CHANPRESS:
-            self.velocity = seqevent.velocity
+            self.velocity = seqevent.value
 
     def to_alsaseq(self):
         if self.key >= 0:
@@ -218,7 +267,7 @@ class NotePress (Note):
         else:
             return alsa_midi.ChannelPressureEvent(
                 channel=self.channel,
-                velocity=self.velocity,
+                value=self.velocity,
             )
 
     def from_lv2(self, msg):
@@ -237,25 +286,21 @@ class NotePress (Note):
 
 @ext_encode
 class ChannelPress (NotePress):
+    __slots__ = ()
     lv2_type = lv2midi.LV2_MIDI_MSG_CHANNEL_PRESSURE
     alsa_type = alsa_midi.EventType.CHANPRESS
 
 
 @ext_encode
 class MidiPgmChange (MidiEvent):
+    __slots__ = ('program',)
     alsa_type = alsa_midi.EventType.PGMCHANGE
     lv2_type = lv2midi.LV2_MIDI_MSG_PGM_CHANGE
-
-    def __init__(self, seqevent=None):
-        self.program = None
-        super().__init__(seqevent)
+    _defaults = dict(program=None)
 
     def seq_data(self):
         return (self.channel-1, 0, 0, 0, 0, self.program)
 
-    def source(self):
-        return (self.event.dst, MidiPgmChange.__name__, self.channel, None)
-
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
         self.program = seqevent.value
@@ -278,19 +323,16 @@ class MidiPgmChange (MidiEvent):
 
 @ext_encode
 class MidiCC (MidiEvent):
+    __slots__ = ('controller', 'value')
     alsa_type = alsa_midi.EventType.CONTROLLER
     lv2_type = lv2midi.LV2_MIDI_MSG_CONTROLLER
-
-    def __init__(self, seqevent=None):
-        self.controller = 0
-        self.value = 0
-        super().__init__(seqevent)
+    _defaults = dict(controller=0, value=0)
 
     def seq_data(self):
         return (self.channel-1, 0, 0, 0, self.controller, self.value)
 
-    def source(self):
-        return (self.event.dst, MidiCC.__name__, self.channel, self.controller)
+    def learn_source(self):
+        return (self.source, type(self).__name__, self.channel, self.controller)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -319,19 +361,14 @@ class MidiCC (MidiEvent):
 
 @ext_encode
 class MidiPitchbend (MidiEvent):
+    __slots__ = ('value',)
     alsa_type = alsa_midi.EventType.PITCHBEND
     lv2_type = lv2midi.LV2_MIDI_MSG_BENDER
-
-    def __init__(self, seqevent=None):
-        self.value = 0
-        super().__init__(seqevent)
+    _defaults = dict(value=0)
 
     def seq_data(self):
         return (self.channel-1, self.note, 0, 0, 1, self.value)
 
-    def source(self):
-        return (self.event.dst, MidiPitchbend.__name__, self.channel, self.note)
-
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
         self.value = seqevent.value
@@ -355,8 +392,48 @@ class MidiPitchbend (MidiEvent):
         return "<MidiPitchbend %s %s>" % (self.channel, self.value)
 
 
+class MidiRealtime (MidiEvent):
+    """
+    System realtime messages carry no data, so events from the same
+    source can share one read-only instance (see from_alsaseq()).
+    Consumers that need to change a shared event copy() it first
+    """
+    __slots__ = ()
+    _flyweights = {}
+
+    # ids of the shared instances, which live as long as _flyweights
+    _frozen = set()
+
+    def __setattr__(self, attr, value):
+        if id(self) in MidiRealtime._frozen:
+            raise AttributeError(
+                f"shared '{type(self).__name__}' is read-only, copy() it first"
+            )
+        object.__setattr__(self, attr, value)
+
+    def __delattr__(self, attr):
+        if id(self) in MidiRealtime._frozen:
+            raise AttributeError(
+                f"shared '{type(self).__name__}' is read-only, copy() it first"
+            )
+        object.__delattr__(self, attr)
+
+    @classmethod
+    def shared(cls, raw_event):
+        key = (cls, raw_event.source, raw_event.dest)
+        event = MidiRealtime._flyweights.get(key)
+        if event is None:
+            event = cls(raw_event)
+            event.from_alsaseq(raw_event)
+            event.event = None
+            MidiRealtime._flyweights[key] = event
+            MidiRealtime._frozen.add(id(event))
+        return event
+
+
 @ext_encode
-class MidiClock(MidiEvent):
+class MidiClock(MidiRealtime):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.CLOCK
     lv2_type = lv2midi.LV2_MIDI_MSG_CLOCK
 
@@ -366,13 +443,10 @@ class MidiClock(MidiEvent):
 
 @ext_encode
 class MidiQFrame(MidiEvent):
+    __slots__ = ('field', 'value')
     alsa_type = alsa_midi.EventType.QFRAME
     lv2_type = lv2midi.LV2_MIDI_MSG_MTC_QUARTER
-
-    def __init__(self, seqevent=None):
-        self.field = 0
-        self.value = 0
-        super().__init__(seqevent)
+    _defaults = dict(field=0, value=0)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -398,7 +472,8 @@ class MidiQFrame(MidiEvent):
 
 
 @ext_encode
-class MidiStart(MidiEvent):
+class MidiStart(MidiRealtime):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.START
     lv2_type = lv2midi.LV2_MIDI_MSG_START
 
@@ -407,7 +482,8 @@ class MidiStart(MidiEvent):
 
 
 @ext_encode
-class MidiStop(MidiEvent):
+class MidiStop(MidiRealtime):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.STOP
     lv2_type = lv2midi.LV2_MIDI_MSG_STOP
 
@@ -416,7 +492,8 @@ class MidiStop(MidiEvent):
 
 
 @ext_encode
-class MidiContinue(MidiEvent):
+class MidiContinue(MidiRealtime):
+    __slots__ = ()
     alsa_type = alsa_midi.EventType.CONTINUE
     lv2_type = lv2midi.LV2_MIDI_MSG_CONTINUE
 
@@ -426,12 +503,10 @@ class MidiContinue(MidiEvent):
 
 @ext_encode
 class MidiSPP(MidiEvent):
+    __slots__ = ('position',)
     alsa_type = alsa_midi.EventType.SONGPOS
     lv2_type = lv2midi.LV2_MIDI_MSG_SONG_POS
-
-    def __init__(self, seqevent=None):
-        self.position = 0
-        super().__init__(seqevent)
+    _defaults = dict(position=0)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -455,12 +530,10 @@ class MidiSPP(MidiEvent):
 
 @ext_encode
 class MidiTimeSignature(MidiEvent):
+    __slots__ = ('value',)
     alsa_type = alsa_midi.EventType.TIMESIGN
     #lv2_type = lv2midi.LV2_MIDI_MSG_SONG_POS
-
-    def __init__(self, seqevent=None):
-        self.value = 0
-        super().__init__(seqevent)
+    _defaults = dict(value=0)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -472,12 +545,10 @@ class MidiTimeSignature(MidiEvent):
 
 @ext_encode
 class MidiSysex(MidiEvent):
+    __slots__ = ('data',)
     alsa_type = alsa_midi.EventType.SYSEX
     lv2_type = lv2midi.LV2_MIDI_MSG_SYSTEM_EXCLUSIVE
-
-    def __init__(self, seqevent=None):
-        self.data = None
-        super().__init__(seqevent)
+    _defaults = dict(data=None)
 
     def from_alsaseq(self, seqevent):
         super().from_alsaseq(seqevent)
@@ -496,6 +567,10 @@ def from_alsaseq(raw_event):
         if raw_event.velocity == 0:
             return NoteOff(raw_event)
 
+    # untimestamped realtime messages are shared
+    if issubclass(ctor, MidiRealtime) and raw_event.time is None:
+        return ctor.shared(raw_event)
+
     return ctor(raw_event)
 
 
@@ -509,21 +584,39 @@ def from_lv2(raw_event):
 
 
 class MFPMidiManager:
+    # flush output right away once this many events are queued
+    OUTPUT_QUEUE_MAX = 256
 
-    def __init__(self, inports, outports):
+    def __init__(self, inports, outports, output_latency=0):
         self.num_inports = inports
         self.num_outports = outports
         self.start_time = None
         self.event_loop = asyncio.get_event_loop()
         self.handlers_by_id = {}
-        self.handlers_by_filter = {None: {None: {None: {None: []}}}}
+        self.handlers_by_path = {}
         self.handlers_lock = Lock()
         self.handlers_next_id = 0
 
+        # (port, event class, channel, unit) --> handlers, rebuilt
+        # lazily after any register/unregister
+        self.dispatch_index = {}
+
         self.client = None
         self.input_ports = []
         self.output_ports = []
 
+        # events sent in one pass of the event loop are queued per
+        # port and drained together. With output_latency (seconds)
+        # they may wait up to that long to join a larger batch
+        self.output_latency = output_latency
+        self.output_queues = {}
+        self.output_depth = 0
+        self.output_flush = FlushScheduler(self.flush_output, self._flush_delay)
+        self.output_stats = dict(
+            events=0, batches=0, max_depth=0,
+            drain_ms_total=0.0, drain_ms_max=0.0,
+        )
+
         self.quit_req = False
 
     def _filt2paths(self, filters):
@@ -550,21 +643,25 @@ class MFPMidiManager:
         return paths
 
     def _savepath(self, path, value):
-        typeinfo = self.handlers_by_filter.setdefault(path[0], {})
-        chaninfo = typeinfo.setdefault(path[1], {})
-        unitinfo = chaninfo.setdefault(path[2], {})
-        dest = unitinfo.setdefault(path[3], [])
+        dest = self.handlers_by_path.setdefault(path, [])
         dest.append(value)
 
     def _delpath(self, path, value):
-        typeinfo = self.handlers_by_filter.setdefault(path[0], {})
-        chaninfo = typeinfo.setdefault(path[1], {})
-        unitinfo = chaninfo.setdefault(path[2], {})
-        dest = unitinfo.setdefault(path[3], [])
-        if value in dest:
+        dest = self.handlers_by_path.get(path)
+        if dest and value in dest:
             dest.remove(value)
-
-    def register(self, callback, data=None, filters=None):
+            if not dest:
+                del self.handlers_by_path[path]
+
+    def register(self, callback, data=None, filters=None, inline=False):
+        """
+        Call callback(event, data) for each event matching filters
+
+        An inline callback is a coroutine function awaited by the
+        dispatch loop, so events reach it in order without a task
+        being created per event. Other callbacks may also be
+        coroutine functions; each call then runs in its own task
+        """
         import copy
         from .utils import isiterable
         if filters is None:
@@ -583,21 +680,24 @@ class MFPMidiManager:
         with self.handlers_lock:
             cb_id = self.handlers_next_id
             self.handlers_next_id += 1
-            self.handlers_by_id[cb_id] = (cb_id, callback, copy.copy(filters), data)
+            self.handlers_by_id[cb_id] = (cb_id, callback, copy.copy(filters), data, inline)
             paths = self._filt2paths(filters)
             for p in paths:
                 self._savepath(p, cb_id)
+            self.dispatch_index = {}
         return cb_id
 
     def unregister(self, cb_id):
-        cbinfo = self.handlers_by_id.get(cb_id)
-        if cbinfo is None:
-            return None
-
-        cb_id, callback, filters, data = cbinfo
-        paths = self._filt2paths(filters)
-        for p in paths:
-            self._delpath(p, cb_id)
+        with self.handlers_lock:
+            cbinfo = self.handlers_by_id.pop(cb_id, None)
+            if cbinfo is None:
+                return None
+
+            cb_id, callback, filters, data, inline = cbinfo
+            paths = self._filt2paths(filters)
+            for p in paths:
+                self._delpath(p, cb_id)
+            self.dispatch_index = {}
         return None
 
     async def run(self):
@@ -628,74 +728,120 @@ class MFPMidiManager:
             event = await self.client.event_input()
             if event:
                 mfp_event = from_alsaseq(event)
-                self.dispatch_event(mfp_event)
+                await self.dispatch_event(mfp_event)
 
         self.client.close()
 
     def finish(self):
         self.quit_req = True
 
-    def dispatch_event(self, event):
-        port = event.source.port_id
-        unit = event.source.client_id
-        channel = event.channel
-        typeinfo = None
-
-        handlers = []
-        port_by_name = None if port is None else self.handlers_by_filter.get(port)
-        port_default = self.handlers_by_filter.get(None)
+    def _find_handlers(self, port, event_class, channel, unit):
+        # an etype filter matches the event's class or any MidiEvent
+        # class it derives from
+        type_names = [None] + [
+            c.__name__ for c in event_class.__mro__
+            if issubclass(c, MidiEvent)
+        ]
+
+        cb_ids = set()
+        for p in {None, port}:
+            for t in type_names:
+                for c in {None, channel}:
+                    for u in {None, unit}:
+                        cb_ids.update(self.handlers_by_path.get((p, t, c, u), ()))
+
+        return tuple(
+            self.handlers_by_id[cb_id]
+            for cb_id in sorted(cb_ids)
+            if cb_id in self.handlers_by_id
+        )
 
-        for portdict in port_by_name, port_default:
-            if portdict is None:
-                continue
-            type_by_name = None if typeinfo is None else portdict.get(typeinfo)
-            type_default = portdict.get(None)
-
-            for typedict in type_by_name, type_default:
-                if typedict is None:
-                    continue
-                channel_by_name = None if channel is None else typedict.get(channel)
-                channel_default = typedict.get(None)
-
-                for chandict in channel_by_name, channel_default:
-                    if chandict is None:
-                        continue
-                    unit_by_name = None if unit is None else chandict.get(unit)
-                    unit_default = chandict.get(None)
-
-                    for unitlist in unit_by_name, unit_default:
-                        if not unitlist:
-                            continue
-                        handlers.extend(unitlist)
-
-        # now handlers should have all the relevant (cb_id, callback) pairs
-        for h in handlers:
-            cbinfo = self.handlers_by_id.get(h)
-            if cbinfo is not None:
-                cb_id, callback, filters, data = cbinfo
-                try:
-                    callback(event, data)
-                except Exception as e:
-                    log.debug("Error in MIDI event handler:", e)
+    def handlers_for(self, event):
+        source = event.source
+        port = source.port_id if source is not None else None
+        unit = source.client_id if source is not None else None
+        key = (port, type(event), event.channel, unit)
+
+        index = self.dispatch_index
+        handlers = index.get(key)
+        if handlers is None:
+            with self.handlers_lock:
+                handlers = self._find_handlers(*key)
+            index[key] = handlers
+        return handlers
+
+    async def dispatch_event(self, event):
+        for cb_id, callback, filters, data, inline in self.handlers_for(event):
+            try:
+                if inline:
+                    await callback(event, data)
+                else:
+                    rv = callback(event, data)
+                    if inspect.isawaitable(rv):
+                        from .mfp_app import MFPApp
+                        MFPApp().async_task(rv)
+            except Exception as e:
+                log.debug("Error in MIDI event handler:", e)
 
     async def send(self, portnum, event):
-        from datetime import datetime, timedelta
-        starttime = datetime.now()
-
         try:
-            port = self.output_ports[portnum]
             seq_event = event.to_alsaseq()
-            if seq_event:
-                seq_event.tick = 0
-                seq_event.relative = True
-                await self.client.event_output(seq_event, port=port)
-                await self.client.drain_output()
-            elapsed = datetime.now() - starttime
-
-            if elapsed > timedelta(microseconds=3000):
-                log.debug(f"[midi] send took {elapsed.total_seconds()*1000} milliseconds")
-
+            if not seq_event:
+                return
+            seq_event.tick = 0
+            seq_event.relative = True
         except Exception as e:
             log.debug("[midi] error on output of", event, e)
             log.debug_traceback(e)
-
+            return
+
+        self.output_queues.setdefault(portnum, []).append(seq_event)
+        self.output_depth += 1
+        if self.output_depth > self.output_stats['max_depth']:
+            self.output_stats['max_depth'] = self.output_depth
+
+        self.output_flush.schedule()
+
+    def _flush_delay(self):
+        if self.output_depth >= self.OUTPUT_QUEUE_MAX or not self.output_latency:
+            return 0
+        return self.output_latency
+
+    async def flush_output(self):
+        """
+        Write all queued events and drain the sequencer once
+        """
+        while self.output_depth:
+            queues = self.output_queues
+            depth = self.output_depth
+            self.output_queues = {}
+            self.output_depth = 0
+
+            starttime = time.perf_counter()
+            for portnum, events in queues.items():
+                if portnum >= len(self.output_ports):
+                    log.debug("[midi] no output port", portnum, "for", len(events), "events")
+                    continue
+                port = self.output_ports[portnum]
+                for seq_event in events:
+                    try:
+                        await self.client.event_output(seq_event, port=port)
+                    except Exception as e:
+                        log.debug("[midi] error on output of", seq_event, e)
+                        log.debug_traceback(e)
+            try:
+                await self.client.drain_output()
+            except Exception as e:
+                log.debug("[midi] error draining", depth, "events:", e)
+                log.debug_traceback(e)
+
+            elapsed_ms = (time.perf_counter() - starttime) * 1000
+            stats = self.output_stats
+            stats['events'] += depth
+            stats['batches'] += 1
+            stats['drain_ms_total'] += elapsed_ms
+            if elapsed_ms > stats['drain_ms_max']:
+                stats['drain_ms_max'] = elapsed_ms
+
+            if elapsed_ms > 3:
+                log.debug(f"[midi] output of {depth} events took {elapsed_ms} milliseconds")
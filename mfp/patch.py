@@ -28,6 +28,7 @@ class Patch(Processor):
 
     RESP_FREEWHEEL = 8
     RESP_DSP_LOAD = 9
+    dsp_level_responses = (RESP_DSP_LOAD,)
 
     task_nibbler = None
 
@@ -50,6 +51,7 @@ class Patch(Processor):
 
         self.file_origin = None
         self.dsp_embed = False   # set to True if in an LV2 host
+        self.load_timings = {}   # seconds spent in each phase of the last load
 
         self.objects = {}
         self.scopes = {'__patch__': LexicalScope('__patch__')}
@@ -478,31 +480,62 @@ class Patch(Processor):
         if self.gui_params.get("top_level"):
             await MFPApp().gui_command.load_start()
 
-            for oid, obj in list(self.objects.items()):
-                if obj.display_type != "hidden":
-                    await obj.create_gui()
-
-            for oid, obj in self.objects.items():
-                for srcport, connections in enumerate(obj.connections_out):
-                    for dstobj, dstport in connections:
-                        if (
-                            dstobj.gui_created
-                            and obj.display_type not in (
-                                "hidden", "sendvia", "sendsignalvia"
-                            )
-                            and dstobj.display_type not in (
-                                "hidden", "recvvia", "recvsignalvia"
-                            )
-                        ):
-                            await MFPApp().gui_command.connect(
-                                obj.obj_id, srcport, dstobj.obj_id, dstport
-                            )
+            await self.create_gui_batch(
+                obj for obj in list(self.objects.values())
+                if obj.display_type != "hidden"
+            )
+
+            connections = self.gui_connections(
+                (obj, srcport, dstobj, dstport)
+                for obj in self.objects.values()
+                for srcport, port_conns in enumerate(obj.connections_out)
+                for dstobj, dstport in port_conns
+            )
+            if connections:
+                await MFPApp().gui_command.connect_batch(connections)
             await MFPApp().gui_command.load_complete()
             await MFPApp().gui_command.select(self.obj_id)
         else:
             await self.create_export_gui()
         return True
 
+    @staticmethod
+    def gui_connections(connections):
+        """
+        Filter (srcobj, outlet, dstobj, inlet) connections down to the
+        ones the GUI shows, as (src_id, outlet, dst_id, inlet) for
+        gui_command.connect_batch()
+        """
+        return [
+            (srcobj.obj_id, outlet, dstobj.obj_id, inlet)
+            for srcobj, outlet, dstobj, inlet in connections
+            if (
+                srcobj.gui_created and dstobj.gui_created
+                and srcobj.display_type not in ("hidden", "sendvia", "sendsignalvia")
+                and dstobj.display_type not in ("hidden", "recvvia", "recvsignalvia")
+            )
+        ]
+
+    async def create_gui_batch(self, objects, **kwargs):
+        """
+        Create GUI elements for several objects, sending runs of plain
+        processors in a single create_batch() call. Patches build their
+        own children, so they are created one at a time in order
+        """
+        from .mfp_app import MFPApp
+
+        batch = []
+        for obj in objects:
+            if isinstance(obj, Patch):
+                if batch:
+                    await MFPApp().gui_command.create_batch(batch)
+                    batch = []
+                await obj.create_gui(**kwargs)
+            else:
+                batch.append(obj.gui_create_args(**kwargs))
+        if batch:
+            await MFPApp().gui_command.create_batch(batch)
+
     async def delete_gui(self):
         if not self.gui_created:
             return True
@@ -540,6 +573,7 @@ class Patch(Processor):
         return False
 
     async def save_file(self, filename):
+        from .mfp_app import MFPApp
         basefile = os.path.basename(filename)
         parts = os.path.splitext(basefile)
 
@@ -552,6 +586,8 @@ class Patch(Processor):
         with open(filename, "w") as savefile:
             savefile.write(await self.json_serialize())
 
+        # a new file may now be found in the search path
+        MFPApp().patch_files.reload(os.path.abspath(filename))
         self.file_origin = filename
 
     async def save_lv2(self, plugname, filename):
@@ -565,26 +601,27 @@ class Patch(Processor):
 
     async def _load_file(self, filename):
         from .mfp_app import MFPApp
-        from .utils import splitpath
 
         searchpath = MFPApp().searchpath or ""
-        searchdirs = splitpath(searchpath)
-        jsdata = None
-        filepath = None
+        document = None
+        if os.path.isabs(filename):
+            filepath = filename
+        else:
+            # as before the lookup was cached, a file found in more
+            # than one search path directory is loaded from the last
+            filepath = MFPApp().patch_files.find(filename, searchpath, last=True)
 
-        for d in searchdirs:
-            path = os.path.join(d, filename)
+        if filepath is not None:
             try:
-                os.stat(path)
-                jsdata = open(path, 'r').read()
-                filepath = path
-            except OSError:
-                pass
-
-        if jsdata is not None:
-            await self.json_deserialize(jsdata)
+                document = MFPApp().patch_files.load(filepath)
+            except OSError as e:
+                log.error(f"Could not read patch file {filepath}: {e}")
+                MFPApp().patch_files.forget(filepath)
+
+        if document is not None:
+            await self.json_unpack(document)
             self.file_origin = filepath
-            self.gui_params["dsp_context"] = self.context.context_name
+            self.gui_params["dsp_context"] = self.context.context_name if self.context else ""
             self.gui_params["file_origin"] = filepath
             if not MFPApp().no_onload:
                 await self._run_onload(list(self.objects.values()))
@@ -663,9 +700,10 @@ class Patch(Processor):
         from .mfp_app import MFPApp
         # non-toplevel Patch means show the Export UI layer only
         await MFPApp().gui_command.load_start()
-        for oid, obj in list(self.objects.items()):
-            if self.obj_is_exportable(obj):
-                await obj.create_gui(is_export=True)
+        await self.create_gui_batch(
+            (obj for obj in list(self.objects.values()) if self.obj_is_exportable(obj)),
+            is_export=True
+        )
         await MFPApp().gui_command.load_complete()
 
     async def delete(self):
@@ -0,0 +1,104 @@
+"""
+patch_cache.py -- parsed .mfp files and search path lookups
+
+Patches used as object types are loaded once per instance. The
+parsed document of each file is kept here and only re-read when the
+file's mtime or size changes. Lookups of names in the search path
+are also remembered, including names that aren't found, until
+reload() is called, a patch is saved, or the file found can't be read.
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import copy
+import os
+
+import simplejson as json
+
+from . import utils
+from .bang import Bang, Uninit
+
+
+def copy_document(value):
+    """
+    Copy of a parsed patch document, which loading modifies. Faster
+    than copy.deepcopy for the plain dicts and lists that make up
+    almost all of it
+    """
+    vtype = type(value)
+    if vtype is dict:
+        return {key: copy_document(item) for key, item in value.items()}
+    if vtype is list:
+        return [copy_document(item) for item in value]
+    if vtype in (str, int, float, bool) or value is None or value is Bang or value is Uninit:
+        return value
+    return copy.deepcopy(value)
+
+
+class PatchFileCache:
+    def __init__(self):
+        # path: (st_mtime_ns, st_size, document)
+        self.documents = {}
+
+        # (filename, searchpath, last): path, or None if not found
+        self.lookups = {}
+
+        self.stats = dict(hits=0, misses=0, lookup_hits=0, lookup_misses=0)
+
+    def find(self, filename, searchpath, last=False):
+        """
+        utils.find_file_in_path, remembering the answer. With last=True,
+        the match in the last search path directory wins
+        """
+        key = (filename, searchpath, last)
+        if key in self.lookups:
+            self.stats['lookup_hits'] += 1
+            return self.lookups[key]
+
+        self.stats['lookup_misses'] += 1
+        if last:
+            searchpath = utils.joinpath(reversed(utils.splitpath(searchpath)))
+        path = utils.find_file_in_path(filename, searchpath)
+        self.lookups[key] = path
+        return path
+
+    def forget(self, path):
+        """
+        Drop the parsed document for 'path' and lookups that found
+        it, after it turns out not to be readable
+        """
+        self.documents.pop(path, None)
+        self.lookups = {
+            key: found for key, found in self.lookups.items() if found != path
+        }
+
+    def load(self, path):
+        """
+        A fresh copy of the parsed document in 'path'. Raises OSError
+        if the file can't be read
+        """
+        from .patch_json import extended_decoder_hook
+
+        st = os.stat(path)
+        entry = self.documents.get(path)
+        if entry is not None and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+            self.stats['hits'] += 1
+        else:
+            self.stats['misses'] += 1
+            with open(path, 'r') as jsfile:
+                document = json.loads(jsfile.read(), object_hook=extended_decoder_hook)
+            entry = (st.st_mtime_ns, st.st_size, document)
+            self.documents[path] = entry
+
+        return copy_document(entry[2])
+
+    def reload(self, path=None):
+        """
+        Forget cached lookups, and the parsed document for 'path' (or
+        all documents)
+        """
+        self.lookups = {}
+        if path is None:
+            self.documents = {}
+        else:
+            self.documents.pop(path, None)
@@ -4,14 +4,118 @@ patch_clonescope.py: methods for cloning a scope within a patch
 (aka hygienic subpatch copying)
 '''
 
+import time
+from collections import defaultdict
+
 from .utils import extends
 from .patch import Patch
 from . import log
 from .bang import Uninit
 
+
+class ScopeTemplate:
+    '''
+    A scope compiled once for cloning: the saved state of each
+    object, and the connections to make for each copy. Connection
+    endpoints are object names for objects inside the scope and
+    Processors for objects outside it
+    '''
+    def __init__(self, patch, scope):
+        self.scope = scope
+        self.specs = []
+        self.connections = []
+
+        names = {}
+        for name, srcobj in scope.bindings.items():
+            if not srcobj.save_to_patch:
+                continue
+            names[srcobj.obj_id] = name
+            self.specs.append((name, srcobj.save(), srcobj.gui_created))
+
+        def endpoint(obj):
+            name = names.get(obj.obj_id)
+            if name is not None:
+                return name
+            if obj.scope != scope:
+                return obj
+            return None
+
+        # the same connection can be found from both ends, so dedupe,
+        # keeping the order the connections are first seen in
+        seen = set()
+
+        def add(src, outlet, dst, inlet):
+            if src is None or dst is None:
+                return
+            key = (
+                src if isinstance(src, str) else src.obj_id, outlet,
+                dst if isinstance(dst, str) else dst.obj_id, inlet
+            )
+            if key not in seen:
+                seen.add(key)
+                self.connections.append((src, outlet, dst, inlet))
+
+        for name, srcobj in scope.bindings.items():
+            if not srcobj.save_to_patch:
+                continue
+            if srcobj.clone_connect_inbound:
+                for port_num, port_conn in enumerate(srcobj.connections_in):
+                    for tobj, tport in port_conn:
+                        add(endpoint(tobj), tport, name, port_num)
+
+            if srcobj.clone_connect_outbound:
+                for port_num, port_conn in enumerate(srcobj.connections_out):
+                    for tobj, tport in port_conn:
+                        add(name, port_num, endpoint(tobj), tport)
+
+    async def instantiate(self, patch, newscope, offset=None, ui_items=()):
+        '''
+        Create the objects of one copy in newscope, without running
+        setup() or making connections. Returns (name, object, params)
+        for each object, params being what to pass to setup()
+        '''
+        from .mfp_app import MFPApp
+
+        clones = []
+        for name, spec, _ in self.specs:
+            # the same copies save() would make for each clone
+            prms = dict(
+                spec,
+                gui_params=dict(spec['gui_params']),
+                presets=dict(spec['presets']),
+                properties=dict(spec['properties'] or {}),
+            )
+            newobj = await MFPApp().create(
+                prms.get("type"), prms.get("initargs"), patch, newscope, name,
+                prms.get('gui_params'), setup=False
+            )
+            if not newobj:
+                log.error(f"clonescope: could not create '{name}' in {newscope.name}")
+                continue
+            newobj.load(prms)
+            if offset and name in ui_items:
+                newobj.gui_params["panel_x"] += offset[0]
+                newobj.gui_params["panel_y"] += offset[1]
+            clones.append((name, newobj, prms.get('gui_params')))
+        return clones
+
+    def copy_connections(self, clones):
+        '''
+        (srcobj, outlet, dstobj, inlet) for one copy's connections
+        '''
+        connections = []
+        for src, outlet, dst, inlet in self.connections:
+            srcobj = clones.get(src) if isinstance(src, str) else src
+            dstobj = clones.get(dst) if isinstance(dst, str) else dst
+            if srcobj is not None and dstobj is not None:
+                connections.append((srcobj, outlet, dstobj, inlet))
+        return connections
+
+
 @extends(Patch)
 async def clonescope(self, scopename, num_copies, **kwargs):
     from .mfp_app import MFPApp
+    from .patch_json import gather_logged
 
     scope = self.scopes.get(scopename)
     parts = scopename.split('_')
@@ -67,17 +171,17 @@ async def clonescope(self, scopename, num_copies, **kwargs):
         bbox_w = bbox_max_x - bbox_min_x + 2
         bbox_h = bbox_max_y - bbox_min_y + 2
 
-    if MFPApp().gui_command:
-        await MFPApp().gui_command.load_start()
+    clone_start = phase_start = time.monotonic()
+    template = ScopeTemplate(self, scope)
+    gui_names = set(name for name, _, gui_created in template.specs if gui_created)
 
     need_gui = []
     all_clones = []
+    need_setup = []
+    connections = []
 
     # make copies of elements in scope
     for copynum in range(num_copies):
-        obj_copied = {}
-        obj_idmap = {}
-
         fmt = "%%s_%%0%dd" % cdigits
         newscope = self.add_scope(fmt % (basename, copynum + ccount))
         newscope.clonenum = copynum + 1
@@ -93,53 +197,47 @@ async def clonescope(self, scopename, num_copies, **kwargs):
                 grid_col = 0
                 grid_row += 1
 
-        # remake objects
-        for name, srcobj in scope.bindings.items():
-            if not srcobj.save_to_patch:
-                continue
-            newobj = await srcobj.clone(self, newscope, name)
-            all_clones.append(newobj)
-            obj_copied[name] = newobj
-            obj_idmap[srcobj.obj_id] = newobj
-
-            if name in ui_items:
-                dx = grid_col * bbox_w
-                dy = grid_row * bbox_h
-                newobj.gui_params["panel_x"] += dx
-                newobj.gui_params["panel_y"] += dy
+        offset = None
+        if bbox_w is not None:
+            offset = (grid_col * bbox_w, grid_row * bbox_h)
 
-            if srcobj.gui_created:
+        clones = {}
+        for name, newobj, params in await template.instantiate(
+            self, newscope, offset, ui_items
+        ):
+            clones[name] = newobj
+            all_clones.append(newobj)
+            need_setup.append((newobj, params))
+            if name in gui_names:
                 need_gui.append(newobj)
+        connections.extend(template.copy_connections(clones))
+    self.add_load_timing('clone', phase_start)
 
-        # remake connections
-        for name, srcobj in scope.bindings.items():
-            if not srcobj.save_to_patch:
-                continue
-            newobj = obj_copied[name]
+    # setup() is mostly DSP object creation; send all the requests
+    # before waiting on any of the replies
+    phase_start = time.monotonic()
+    await gather_logged(
+        "setting up", [obj for obj, _ in need_setup],
+        [obj.setup(params=params) for obj, params in need_setup]
+    )
+    self.add_load_timing('setup', phase_start)
 
-            if srcobj.clone_connect_inbound:
-                for port_num, port_conn in enumerate(srcobj.connections_in):
-                    for tobj, tport in port_conn:
-                        tobj_newid = obj_idmap.get(tobj.obj_id)
-                        if not tobj_newid:
-                            if tobj.scope != scope:
-                                tobj_newid = tobj
-                            else:
-                                continue
-                        if (newobj, port_num) not in tobj_newid.connections_out[tport]:
-                            await tobj_newid.connect(tport, newobj, port_num)
+    # connections out of one object are made in order, different
+    # sources are all in flight at once
+    phase_start = time.monotonic()
+    by_source = defaultdict(list)
+    for srcobj, outlet, dstobj, inlet in connections:
+        by_source[srcobj].append((outlet, dstobj, inlet))
 
-            if srcobj.clone_connect_outbound:
-                for port_num, port_conn in enumerate(srcobj.connections_out):
-                    for tobj, tport in port_conn:
-                        tobj_newid = obj_idmap.get(tobj.obj_id)
-                        if not tobj_newid:
-                            if tobj.scope != scope:
-                                tobj_newid = tobj
-                            else:
-                                continue
-                        if (tobj_newid, tport) not in newobj.connections_out[port_num]:
-                            await newobj.connect(port_num, tobj_newid, tport)
+    async def connect_all(srcobj, conns):
+        for outlet, dstobj, inlet in conns:
+            await srcobj.connect(outlet, dstobj, inlet, show_gui=False)
+
+    await gather_logged(
+        "connecting", list(by_source),
+        [connect_all(srcobj, conns) for srcobj, conns in by_source.items()]
+    )
+    self.add_load_timing('connect', phase_start)
 
     for name, srcobj in ui_items.items():
         # kludge -- change labels in the UI template objects
@@ -155,5 +253,19 @@ async def clonescope(self, scopename, num_copies, **kwargs):
             self._run_onload([obj for obj in all_clones])
         )
 
-    for obj in need_gui:
-        await obj.create_gui()
+    if need_gui and MFPApp().gui_command:
+        phase_start = time.monotonic()
+        await MFPApp().gui_command.load_start()
+        await self.create_gui_batch(need_gui)
+        gui_connections = self.gui_connections(connections)
+        if gui_connections:
+            await MFPApp().gui_command.connect_batch(gui_connections)
+        await MFPApp().gui_command.load_complete()
+        self.add_load_timing('gui', phase_start)
+
+    if num_copies > 0:
+        elapsed = time.monotonic() - clone_start
+        log.debug(
+            f"clonescope: {num_copies} copies of {scopename} in {elapsed:.3f}s"
+            f" ({1000 * elapsed / num_copies:.1f}ms per copy)"
+        )
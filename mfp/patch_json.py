@@ -6,6 +6,10 @@ Methods to save and load JSON patch data
 Copyright (c) 2012 Bill Gribble <grib@billgribble.com>
 '''
 
+import asyncio
+import time
+from collections import defaultdict
+
 import simplejson as json
 from .patch import Patch
 from .utils import extends
@@ -70,6 +74,30 @@ class ExtendedEncoder (json.JSONEncoder):
 
     DUMBTYPES = (ScaleType,)
 
+    # DICTTYPES added with @ext_encode by modules that aren't imported
+    # up front, and the module to import the first time one is loaded.
+    # test-midi checks this against mfp.midi
+    EXT_TYPES = {
+        '__MidiEvent__': "mfp.midi",
+        '__MidiUndef__': "mfp.midi",
+        '__Note__': "mfp.midi",
+        '__NoteOn__': "mfp.midi",
+        '__NoteOff__': "mfp.midi",
+        '__NotePress__': "mfp.midi",
+        '__ChannelPress__': "mfp.midi",
+        '__MidiPgmChange__': "mfp.midi",
+        '__MidiCC__': "mfp.midi",
+        '__MidiPitchbend__': "mfp.midi",
+        '__MidiClock__': "mfp.midi",
+        '__MidiQFrame__': "mfp.midi",
+        '__MidiStart__': "mfp.midi",
+        '__MidiStop__': "mfp.midi",
+        '__MidiContinue__': "mfp.midi",
+        '__MidiSPP__': "mfp.midi",
+        '__MidiTimeSignature__': "mfp.midi",
+        '__MidiSysex__': "mfp.midi",
+    }
+
     def default(self, obj):
         if isinstance(obj, tuple([t[0] for t in ExtendedEncoder.ATTRTYPES.values()])):
             key = "__%s__" % obj.__class__.__name__
@@ -77,6 +105,8 @@ class ExtendedEncoder (json.JSONEncoder):
             return {key: {a: getattr(obj, a) for a in attrs}}
         elif isinstance(obj, tuple(ExtendedEncoder.DICTTYPES.values())):
             key = "__%s__" % obj.__class__.__name__
+            if hasattr(obj, 'ext_dict'):
+                return {key: obj.ext_dict()}
             return {key: obj.__dict__}
         elif isinstance(obj, self.DUMBTYPES):
             return str(obj)
@@ -106,14 +136,29 @@ def extended_decoder_hook(saved):
                 ctor = tinfo[0]
                 loaded = ctor(**tdict)
                 return loaded
+        elif tname in ExtendedEncoder.EXT_TYPES:
+            import importlib
+            mod_name = ExtendedEncoder.EXT_TYPES[tname]
+            try:
+                importlib.import_module(mod_name)
+            except ImportError as e:
+                log.debug(f"[load] can't import {mod_name} for {tname}: {e}")
+                return saved
+            if tname in ExtendedEncoder.DICTTYPES:
+                return extended_decoder_hook(saved)
     return saved
 
 
 @extends(Patch)
 async def json_deserialize(self, json_data):
+    f = json.loads(json_data, object_hook=extended_decoder_hook)
+    await self.json_unpack(f)
+
+
+@extends(Patch)
+async def json_unpack(self, f):
     from .scope import NaiveScope
 
-    f = json.loads(json_data, object_hook=extended_decoder_hook)
     self.init_type = f.get('type')
 
     # don't swap Patch gui_params if this isn't a top-level patch
@@ -135,6 +180,8 @@ async def json_deserialize(self, json_data):
     self.gui_params["obj_id"] = self.obj_id
     self.gui_params["name"] = self.name
 
+    self.load_timings = {}
+
     # clear old objects
     for o in self.objects.values():
         await o.delete()
@@ -192,12 +239,40 @@ async def json_deserialize(self, json_data):
     if hot is not None:
         self.hot_inlets = hot
 
+    phase_start = time.monotonic()
     for oid, obj in self.objects.items():
         await obj.onload(-1)
+    self.add_load_timing('onload', phase_start)
+
+
+async def gather_logged(action, objects, coros):
+    """
+    Await coros together, logging the failure of any of them instead
+    of raising. objects[n] is the object coros[n] works on
+    """
+    results = await asyncio.gather(*coros, return_exceptions=True)
+    for obj, result in zip(objects, results):
+        if isinstance(result, Exception):
+            log.error(f"[patch] error {action} '{obj.name}': {result}")
+            log.debug_traceback(result)
+
+
+@extends(Patch)
+def add_load_timing(self, phase, start):
+    self.load_timings[phase] = (
+        self.load_timings.get(phase, 0) + time.monotonic() - start
+    )
 
 
 @extends(Patch)
 async def json_unpack_connections(self, data, idmap):
+    phase_start = time.monotonic()
+
+    # connections out of one object are made in saved order, since
+    # that sets the order of its outlet connection lists. Different
+    # source objects don't interact, so their DSP connect calls are
+    # all in flight at once
+    by_source = defaultdict(list)
     for oid, prms in data.get('objects', {}).items():
         oid = int(oid)
         conn = prms.get("connections", [])
@@ -210,7 +285,17 @@ async def json_unpack_connections(self, data, idmap):
                 dstobj = idmap.get(c[0])
                 inlet = c[1]
                 if dstobj is not None:
-                    await srcobj.connect(outlet, dstobj, inlet)
+                    by_source[srcobj].append((outlet, dstobj, inlet))
+
+    async def connect_all(srcobj, connections):
+        for outlet, dstobj, inlet in connections:
+            await srcobj.connect(outlet, dstobj, inlet)
+
+    await gather_logged(
+        "connecting", list(by_source),
+        [connect_all(srcobj, connections) for srcobj, connections in by_source.items()]
+    )
+    self.add_load_timing('connect', phase_start)
 
 
 @extends(Patch)
@@ -220,8 +305,10 @@ async def json_unpack_objects(self, data, scope):
     idlist = list(data.get('objects').keys())
     idlist.sort(key=lambda x: int(x))
     need_gui = []
+    need_setup = []
 
     skipped_objects = 0
+    phase_start = time.monotonic()
 
     for oid in idlist:
         prms = data.get('objects')[oid]
@@ -252,9 +339,19 @@ async def json_unpack_objects(self, data, scope):
         newobj.load(prms)
         if self.gui_created:
             need_gui.append(newobj)
-        await newobj.setup(params=prms.get('gui_params'))
+        need_setup.append((newobj, prms.get('gui_params')))
 
         idmap[int(oid)] = newobj
+    self.add_load_timing('create', phase_start)
+
+    # setup() is mostly DSP object creation; send all the requests
+    # before waiting on any of the replies
+    phase_start = time.monotonic()
+    await gather_logged(
+        "setting up", [newobj for newobj, _ in need_setup],
+        [newobj.setup(params=gui_params) for newobj, gui_params in need_setup]
+    )
+    self.add_load_timing('setup', phase_start)
 
     # find mapping for self to catch vias
     defscope = data.get('scopes').get('__patch__')
@@ -262,8 +359,10 @@ async def json_unpack_objects(self, data, scope):
     idmap[selfid] = self
 
     self.update_export_bounds()
-    for obj in need_gui:
-        await obj.create_gui()
+    if need_gui:
+        phase_start = time.monotonic()
+        await self.create_gui_batch(need_gui)
+        self.add_load_timing('gui', phase_start)
 
     if skipped_objects:
         log.debug(f"[{self.init_type}] Could not create {skipped_objects} component objects. Check your search path (-p option)")
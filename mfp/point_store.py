@@ -0,0 +1,302 @@
+"""
+point_store.py -- columnar storage for the points of a plot curve
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+import math
+
+import numpy as np
+
+
+class PointStore:
+    """
+    x and y values of one curve as float64 columns. With no capacity
+    the columns grow as needed; with a capacity the oldest points are
+    dropped to make room for new ones. The ring is kept twice over so
+    the live points are always one contiguous slice, and x(), y() and
+    visible() return views without copying.
+
+    With a window, points more than 'window' below the x of the
+    newest point are dropped as well (for rolling plots where x is
+    time).
+
+    Bounds are kept up to date as points are added, and only
+    recomputed when a point at the edge of the data is dropped or
+    replaced
+    """
+    INIT_SIZE = 64
+
+    def __init__(self, capacity=None, window=None):
+        self.capacity = int(capacity) if capacity else None
+        self.window = window or None
+        self.clear()
+
+    def clear(self):
+        size = self.capacity or self.INIT_SIZE
+        rows = 2 * size if self.capacity else size
+        self.columns = np.zeros((2, rows), dtype=np.float64)
+        self.start = 0
+        self.count = 0
+        self.total = 0
+        self.x_sorted = True
+        self.bounds_stale = False
+        self.x_min = self.x_max = self.y_min = self.y_max = None
+
+    def __len__(self):
+        return self.count
+
+    def x(self):
+        return self.columns[0, self.start:self.start + self.count]
+
+    def y(self):
+        return self.columns[1, self.start:self.start + self.count]
+
+    def points(self):
+        return list(zip(self.x().tolist(), self.y().tolist()))
+
+    def append(self, x, y):
+        x = float(x)
+        y = float(y)
+        if self.count and x < self.columns[0, self.start + self.count - 1]:
+            self.x_sorted = False
+
+        if self.capacity is None:
+            self._reserve(1)
+            self.columns[:, self.start + self.count] = (x, y)
+        else:
+            if self.count == self.capacity:
+                self._drop(1)
+            pos = (self.start + self.count) % self.capacity
+            self.columns[:, pos] = (x, y)
+            self.columns[:, pos + self.capacity] = (x, y)
+        self.count += 1
+        self.total += 1
+        self._extend_bounds(x, y)
+
+        if self.window is not None:
+            self._apply_window(x)
+
+    def extend(self, points):
+        for x, y in points:
+            self.append(x, y)
+
+    def extend_arrays(self, xs, ys):
+        """
+        Append the points (xs[n], ys[n]) in one step
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        added = len(xs)
+        if not added:
+            return
+
+        if self.capacity is not None and added > self.capacity:
+            xs = xs[-self.capacity:]
+            ys = ys[-self.capacity:]
+        count = len(xs)
+
+        if (
+            (self.count and xs[0] < self.columns[0, self.start + self.count - 1])
+            or np.any(xs[1:] < xs[:-1])
+        ):
+            self.x_sorted = False
+
+        if self.capacity is None:
+            self._reserve(count)
+            end = self.start + self.count
+            self.columns[0, end:end + count] = xs
+            self.columns[1, end:end + count] = ys
+        else:
+            overflow = self.count + count - self.capacity
+            if overflow > 0:
+                self._drop(overflow)
+            pos = (self.start + self.count + np.arange(count)) % self.capacity
+            for offset in (0, self.capacity):
+                self.columns[0, pos + offset] = xs
+                self.columns[1, pos + offset] = ys
+        self.count += count
+        self.total += added
+        self._extend_bounds(float(xs.min()), float(ys.min()))
+        self._extend_bounds(float(xs.max()), float(ys.max()))
+
+        if self.window is not None:
+            self._apply_window(float(xs[-1]))
+
+    def replace(self, index, x, y):
+        """
+        Set the point 'index' places from the oldest one kept
+        """
+        if not 0 <= index < self.count:
+            raise IndexError(f"PointStore: no point {index}")
+        x = float(x)
+        y = float(y)
+        pos = self.start + index
+        old_x, old_y = self.columns[:, pos]
+        if self.capacity is not None:
+            pos = pos % self.capacity
+            self.columns[:, pos + self.capacity] = (x, y)
+        self.columns[:, pos] = (x, y)
+
+        if self.x_sorted and x != old_x:
+            xs = self.x()
+            if (index > 0 and xs[index - 1] > x) or (index < self.count - 1 and xs[index + 1] < x):
+                self.x_sorted = False
+        if old_x in (self.x_min, self.x_max) or old_y in (self.y_min, self.y_max):
+            self.bounds_stale = True
+        self._extend_bounds(x, y)
+
+    def _reserve(self, count):
+        # make room for 'count' more points after the live ones
+        # (growable stores only)
+        size = self.columns.shape[1]
+        if self.start + self.count + count <= size:
+            return
+        needed = self.count + count
+        if needed > size // 2:
+            while needed > size // 2:
+                size *= 2
+            grown = np.zeros((2, size), dtype=np.float64)
+            grown[:, :self.count] = self.columns[:, self.start:self.start + self.count]
+            self.columns = grown
+        else:
+            self.columns[:, :self.count] = self.columns[:, self.start:self.start + self.count]
+        self.start = 0
+
+    def _drop(self, count):
+        # forget the 'count' oldest points
+        dropped = self.columns[:, self.start:self.start + count]
+        if (
+            dropped[0].min() <= self.x_min or dropped[0].max() >= self.x_max
+            or dropped[1].min() <= self.y_min or dropped[1].max() >= self.y_max
+        ):
+            self.bounds_stale = True
+        self.start += count
+        self.count -= count
+        if self.capacity is not None and self.start >= self.capacity:
+            # the same points are in the first half
+            self.start -= self.capacity
+
+    def _apply_window(self, newest):
+        cutoff = newest - self.window
+        xs = self.x()
+        if not len(xs) or xs[0] >= cutoff:
+            return
+        if self.x_sorted:
+            count = int(np.searchsorted(xs, cutoff, side='left'))
+        else:
+            # only the run of old points at the front
+            keep = xs >= cutoff
+            count = int(np.argmax(keep)) if keep.any() else len(xs)
+        if count:
+            self._drop(count)
+
+    def _extend_bounds(self, x, y):
+        if self.x_min is None:
+            self.x_min = self.x_max = x
+            self.y_min = self.y_max = y
+            return
+        if x < self.x_min:
+            self.x_min = x
+        elif x > self.x_max:
+            self.x_max = x
+        if y < self.y_min:
+            self.y_min = y
+        elif y > self.y_max:
+            self.y_max = y
+
+    def bounds(self):
+        """
+        (x_min, y_min, x_max, y_max) of the points kept, or all None
+        """
+        if self.bounds_stale:
+            self.bounds_stale = False
+            if self.count:
+                xs = self.x()
+                ys = self.y()
+                self.x_min = float(xs.min())
+                self.x_max = float(xs.max())
+                self.y_min = float(ys.min())
+                self.y_max = float(ys.max())
+                if self.x_sorted:
+                    self.x_sorted = bool(np.all(xs[1:] >= xs[:-1]))
+            else:
+                self.x_min = self.x_max = self.y_min = self.y_max = None
+        return (self.x_min, self.y_min, self.x_max, self.y_max)
+
+    def visible(self, x_min=None, x_max=None):
+        """
+        (x, y) of the points with x_min <= x <= x_max. Views when x
+        is in increasing order (the usual case), otherwise copies
+        """
+        xs = self.x()
+        ys = self.y()
+        if x_min is None and x_max is None:
+            return (xs, ys)
+
+        if self.x_sorted:
+            first = 0 if x_min is None else int(np.searchsorted(xs, x_min, side='left'))
+            last = self.count if x_max is None else int(np.searchsorted(xs, x_max, side='right'))
+            return (xs[first:last], ys[first:last])
+
+        mask = np.ones(self.count, dtype=bool)
+        if x_min is not None:
+            mask &= xs >= x_min
+        if x_max is not None:
+            mask &= xs <= x_max
+        return (xs[mask], ys[mask])
+
+
+def combined_bounds(stores):
+    """
+    Bounds of a collection of PointStores, padded by 10% on each side
+    as the plot elements like them
+    """
+    min_x = min_y = max_x = max_y = None
+    for store in stores:
+        s_min_x, s_min_y, s_max_x, s_max_y = store.bounds()
+        if s_min_x is None:
+            continue
+        min_x = s_min_x if min_x is None else min(min_x, s_min_x)
+        max_x = s_max_x if max_x is None else max(max_x, s_max_x)
+        min_y = s_min_y if min_y is None else min(min_y, s_min_y)
+        max_y = s_max_y if max_y is None else max(max_y, s_max_y)
+
+    if min_x is not None:
+        dx = (max_x - min_x) * 0.1
+        dy = (max_y - min_y) * 0.1
+        min_x -= dx
+        max_x += dx
+        min_y -= dy
+        max_y += dy
+
+    return (min_x, min_y, max_x, max_y)
+
+
+def pack_points(xs, ys):
+    """
+    Points as little-endian float64 bytes, all x values then all y
+    """
+    return np.concatenate((xs, ys)).astype('<f8').tobytes()
+
+
+def unpack_points(data):
+    values = np.frombuffer(data, dtype='<f8')
+    count = len(values) // 2
+    return (values[:count], values[count:])
+
+
+def decimate(xs, ys, x_step):
+    """
+    Indices of the points to keep so that each x_step-wide column
+    has at most its lowest and highest point, in their original order
+    """
+    if len(xs) <= 2 or not x_step or not math.isfinite(x_step):
+        return np.arange(len(xs))
+
+    columns = np.floor(xs / x_step)
+    order = np.lexsort((ys, columns))
+    sorted_columns = columns[order]
+    firsts = np.flatnonzero(np.r_[True, sorted_columns[1:] != sorted_columns[:-1]])
+    lasts = np.r_[firsts[1:] - 1, len(order) - 1]
+    return np.unique(np.concatenate((order[firsts], order[lasts])))
@@ -7,6 +7,7 @@ Copyright (c) Bill Gribble <grib@billgribble.com>
 
 import inspect
 import asyncio
+from collections import deque
 
 from .dsp_object import DSPObject
 from .method import MethodCall
@@ -80,6 +81,41 @@ class Processor:
     doc_tooltip_outlet = []
     doc_help_patch = None
 
+    # DSP response types that report a level rather than an event;
+    # of several in one DSP batch only the last is delivered
+    dsp_level_responses = ()
+
+    # used by step_debug_manager() for objects not in a patch
+    _null_debugger = None
+
+    # True if the class's trigger() is a plain function rather
+    # than a coroutine; set in __init_subclass__
+    sync_trigger = False
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.sync_trigger = not inspect.iscoroutinefunction(cls.trigger)
+
+    # connections_out and outlet_order are properties so that
+    # replacing them drops the cached propagation plan
+    @property
+    def connections_out(self):
+        return self._connections_out
+
+    @connections_out.setter
+    def connections_out(self, value):
+        self._connections_out = value
+        self._propagate_plan = None
+
+    @property
+    def outlet_order(self):
+        return self._outlet_order
+
+    @outlet_order.setter
+    def outlet_order(self, value):
+        self._outlet_order = value
+        self._propagate_plan = None
+
     def __init__(self, inlets, outlets, init_type, init_args, patch, scope, name, defs=None):
         from .mfp_app import MFPApp
 
@@ -90,6 +126,7 @@ class Processor:
         self.inlets = [Uninit] * inlets
         self.outlets = [Uninit] * outlets
         self.outlet_order = list(reversed(range(outlets)))
+        self._propagate_plan = None
 
         self.status = Processor.CTOR
         self.tags = {}          # tags are labels shown in notify bubble
@@ -106,6 +143,9 @@ class Processor:
         self.count_trigger = 0
         self.count_errors = 0
 
+        # trigger timing, set by the profiler (mfp.profiler) when it's on
+        self.profile = None
+
         # MIDI event listener
         self.midi_mode = None
         self.midi_filters = None
@@ -262,6 +302,8 @@ class Processor:
         info['messages_out'] = self.count_out
         info['trigger_count'] = self.count_trigger
         info['error_count'] = self.count_errors
+        if self.profile is not None:
+            info['profile'] = self.profile.summary()
 
         if self.count_errors:
             info['error_messages'] = []
@@ -529,7 +571,7 @@ class Processor:
         from .midi import Note, NotePress, NoteOff, NoteOn, MidiCC, MidiPgmChange
 
         filters = {}
-        port, etype, channel, unit = event.source()
+        port, etype, channel, unit = event.learn_source()
         port = port[1]
 
         if mode.startswith("note"):
@@ -585,10 +627,7 @@ class Processor:
         MFPApp().midi_mgr.unregister(self.midi_learn_cbid)
         self.midi_learn_cbid = None
         self.midi_cbid = MFPApp().midi_mgr.register(
-            lambda event, data: MFPApp().async_task(
-                self._midi_handler(event, data)
-            ),
-            filters=filters
+            self._midi_handler, filters=filters
         )
         self.midi_filters = filters
         self.midi_mode = mode
@@ -799,6 +838,7 @@ class Processor:
                                     inlet, "-->", in_obj, ",", outlet, "-->", out_obj)
 
                 existing.append((target, inlet))
+                self._propagate_plan = None
         except Exception as e:
             # this can happen normally in a creation race, don't
             # flag it (Patch.connect wil retry)
@@ -844,6 +884,7 @@ class Processor:
         existing = self.connections_out[outlet]
         if (target, inlet) in existing:
             existing.remove((target, inlet))
+            self._propagate_plan = None
 
         existing = target.connections_in[inlet]
         if (self, outlet) in existing:
@@ -890,11 +931,17 @@ class Processor:
 
         w_target = None
         try:
-            work = await self._send(value, inlet)
-
-            while len(work):
-                w_target, w_val, w_inlet = work[0]
-                work[:1] = await w_target._send(w_val, w_inlet)
+            # work is handled depth-first: the outputs of each item
+            # are run before anything else still pending
+            work = deque(await self._send(value, inlet))
+
+            while work:
+                w_target, w_val, w_inlet = work.popleft()
+                more = w_target._send__sync(w_val, w_inlet)
+                if more is None:
+                    more = await w_target._send(w_val, w_inlet)
+                if more:
+                    work.extendleft(reversed(more))
         except Exception as e:
             import traceback
             tb = traceback.format_exc()
@@ -924,21 +971,19 @@ class Processor:
             return []
 
         debugger = self.step_debug_manager()
-        debug = debugger and debugger.enabled
+        if debugger is None or not debugger.enabled:
+            return await self._send__nodebug(value, inlet, step_execute)
+
         debug_tasks = []
-        send_tasks = []
 
         # inlet is -1 for dsp response messages. For regular inlets,
         # put the inbound in the .inlets
         if inlet >= 0:
-            if debug:
-                debug_tasks.append((
-                    self._send__initiate(value, inlet),
-                    f"Receive input to {self.name} inlet {inlet}",
-                    self
-                ))
-            else:
-                await self._send__initiate(value, inlet)
+            debug_tasks.append((
+                self._send__initiate(value, inlet),
+                f"Receive input to {self.name} inlet {inlet}",
+                self
+            ))
 
         self.count_in += 1
 
@@ -949,51 +994,108 @@ class Processor:
             and not isinstance(value, bool)
             and isinstance(value, (float, int))
         ):
-            if debug:
-                debug_tasks.append((
-                    self._send__dsp_params(value, inlet),
-                    "Update parameters of DSP object for {self.name}",
-                    self
-                ))
-            else:
-                await self._send__dsp_params(value, inlet)
+            debug_tasks.append((
+                self._send__dsp_params(value, inlet),
+                "Update parameters of DSP object for {self.name}",
+                self
+            ))
 
         # activate the processor and make a worklist
         # of where to send it next
         if inlet in self.hot_inlets or inlet == -1:
-            if debug:
-                debug_tasks.append((
-                    self._send__activate(value, inlet),
-                    f"Trigger processor {self.name} from inlet {inlet}",
-                    self
-                ))
-            else:
-                await self._send__activate(value, inlet)
+            debug_tasks.append((
+                self._send__activate(value, inlet),
+                f"Trigger processor {self.name} from inlet {inlet}",
+                self
+            ))
+            debug_tasks.append((
+                self._send__propagate(),
+                f"Send outputs from {self.name} to connected processors",
+                self
+            ))
+
+        self._send__debug_tasks(debug_tasks, step_execute)
+        return []
 
-            # step mode could be activated or deactivated in activate
-            debugger = self.step_debug_manager()
-            debug = debugger and debugger.enabled
-            if debug:
-                debug_tasks.append((
-                    self._send__propagate(),
-                    f"Send outputs from {self.name} to connected processors",
-                    self
-                ))
-            else:
-                send_tasks = await self._send__propagate()
+    def _send__sync(self, value, inlet):
+        """
+        Handle a send without awaiting anything, if possible
+
+        Covers input to cold inlets and hot inlets of processors with
+        a synchronous trigger(). Returns None if the full _send is needed
+        """
+        if self.paused:
+            return []
+
+        if inlet < 0 or inlet in self.dsp_inlets:
+            return None
 
-        # step mode could be activated or deactivated in activate
         debugger = self.step_debug_manager()
-        debug = debugger and debugger.enabled
-        if debug:
-            if step_execute:
-                self.step_debug_manager().prepend_tasks(debug_tasks)
-            else:
-                for task in debug_tasks:
-                    self.step_debug_manager().add_task(*task)
+        if debugger and debugger.enabled:
+            return None
+
+        if inlet not in self.hot_inlets:
+            self.inlets[inlet] = value
+            self.count_in += 1
             return []
 
-        return send_tasks
+        if (
+            not self.sync_trigger
+            or isinstance(value, (MethodCall, AsyncOutput))
+        ):
+            return None
+
+        self.inlets[inlet] = value
+        self.count_in += 1
+
+        if self.clear_outlets:
+            self.outlets = [Uninit] * len(self.outlets)
+        self.trigger()
+        self.count_trigger += 1
+
+        return self._send__propagate_work()
+
+    async def _send__nodebug(self, value, inlet, step_execute):
+        """
+        Fast path of _send when the step debugger is not running.
+        """
+        if inlet >= 0:
+            self.inlets[inlet] = value
+
+        self.count_in += 1
+
+        if (
+            (inlet in self.dsp_inlets)
+            and not isinstance(value, bool)
+            and isinstance(value, (float, int))
+        ):
+            await self._send__dsp_params(value, inlet)
+
+        if inlet in self.hot_inlets or inlet == -1:
+            await self._send__activate(value, inlet)
+
+            # step mode could be activated in activate
+            debugger = self.step_debug_manager()
+            if debugger and debugger.enabled:
+                self._send__debug_tasks(
+                    [(
+                        self._send__propagate(),
+                        f"Send outputs from {self.name} to connected processors",
+                        self
+                    )],
+                    step_execute
+                )
+                return []
+            return self._send__propagate_work()
+        return []
+
+    def _send__debug_tasks(self, debug_tasks, step_execute):
+        debugger = self.step_debug_manager()
+        if step_execute:
+            debugger.prepend_tasks(debug_tasks)
+        else:
+            for task in debug_tasks:
+                debugger.add_task(*task)
 
     async def _send__activate(self, value, inlet):
         if self.clear_outlets:
@@ -1011,23 +1113,46 @@ class Processor:
                 self.add_output(value.outlet_num, value.value)
                 self.inlets[inlet] = Uninit
         else:
-            await self.trigger()
+            rv = self.trigger()
+            if inspect.isawaitable(rv):
+                await rv
             self.count_trigger += 1
 
-    async def _send__propagate(self):
+    def _build_propagate_plan(self):
+        """
+        Flatten connections_out into (outlet, targets) pairs in
+        outlet_order. Rebuilt only when connections or ports change
+        """
+        plan = []
+        num_outlets = min(len(self.outlets), len(self.connections_out))
+        for outlet_num in self.outlet_order:
+            if outlet_num >= num_outlets:
+                continue
+            targets = []
+            for target, tinlet in self.connections_out[outlet_num]:
+                if target is None:
+                    log.warning("Bad output connection: obj_id=%s" % self.obj_id)
+                    continue
+                targets.append((target, tinlet))
+            plan.append((outlet_num, tuple(targets)))
+        self._propagate_plan = plan
+        return plan
+
+    def _send__propagate_work(self):
         """
         Pass outputs along the data flow path
 
-        'work' is our trampoline worklist. Note that the contents are
-        different if we are in debugging mode.
+        Returns the list of (target, value, inlet) work for the
+        trampoline in Processor.send
         """
-        output_pairs = list(zip(self.connections_out, self.outlets))
-        work = []
-
-        debugger = self.step_debug_manager()
+        plan = self._propagate_plan
+        if plan is None:
+            plan = self._build_propagate_plan()
 
-        for outlet_num, output_val in [(i, output_pairs[i]) for i in self.outlet_order]:
-            conns, val = output_val
+        work = []
+        outlets = self.outlets
+        for outlet_num, targets in plan:
+            val = outlets[outlet_num]
 
             if val is Uninit:
                 continue
@@ -1035,35 +1160,49 @@ class Processor:
             if isinstance(val, LazyExpr):
                 val = val.call()
 
-            values = MultiOutput.all_values(val)
+            if isinstance(val, MultiOutput):
+                values = MultiOutput.all_values(val)
+            else:
+                values = (val,)
 
             for val in values:
                 self.count_out += 1
-                for target, tinlet in conns:
-                    if target is not None:
-                        if debugger and debugger.enabled:
-                            work.append((
-                                self._send__propagate_value(target, val, tinlet),
-                                f"Send output to {target.name} inlet {tinlet}",
-                                target,
-                            ))
-                        else:
-                            work.append((target, val, tinlet))
-                        if (
-                            self.snoop_target
-                            and self.snoop_target.obj_id == target.obj_id
-                            and tinlet == self.snoop_inlet
-                            and outlet_num == self.snoop_outlet
-                        ):
-                            from .mfp_app import MFPApp
-                            MFPApp().async_task(
-                                MFPApp().gui_command.hud_write(f"[snoop] {str(val)}")
-                            )
-                    else:
-                        log.warning("Bad output connection: obj_id=%s" % self.obj_id)
+                for target, tinlet in targets:
+                    work.append((target, val, tinlet))
+                    if self.snoop_target is not None:
+                        self._snoop(outlet_num, target, tinlet, val)
+        return work
 
+    def _snoop(self, outlet_num, target, tinlet, val):
+        if (
+            self.snoop_target.obj_id == target.obj_id
+            and tinlet == self.snoop_inlet
+            and outlet_num == self.snoop_outlet
+        ):
+            from .mfp_app import MFPApp
+            MFPApp().async_task(
+                MFPApp().gui_command.hud_write(f"[snoop] {str(val)}")
+            )
+
+    async def _send__propagate(self):
+        """
+        Pass outputs along the data flow path
+
+        'work' is our trampoline worklist. Note that the contents are
+        different if we are in debugging mode.
+        """
+        work = self._send__propagate_work()
+
+        debugger = self.step_debug_manager()
         if debugger and debugger.enabled and work:
-            self.step_debug_manager().prepend_tasks(work)
+            debugger.prepend_tasks([
+                (
+                    self._send__propagate_value(target, val, tinlet),
+                    f"Send output to {target.name} inlet {tinlet}",
+                    target,
+                )
+                for target, val, tinlet in work
+            ])
             return []
 
         return work
@@ -1090,7 +1229,9 @@ class Processor:
         if self.patch:
             return self.patch.step_debugger
         # this only happens during tests
-        return StepDebugger()
+        if Processor._null_debugger is None:
+            Processor._null_debugger = StepDebugger()
+        return Processor._null_debugger
 
     def parse_args(self, pystr, **extra_bindings):
         from .patch import Patch
@@ -1166,6 +1307,7 @@ class Processor:
         self.count_errors = 0
         self.error_info = {}
         self.count_trigger = 0
+        self.profile = None
         self.set_tag("errorcount", self.count_errors)
 
     def error(self, msg=None, tb=None):
@@ -1180,8 +1322,11 @@ class Processor:
             for tbline in tb.strip().split('\n'):
                 log.debug(tbline)
 
-    async def create_gui(self, **kwargs):
-        from .mfp_app import MFPApp
+    def gui_create_args(self, **kwargs):
+        """
+        Mark the GUI as created and return the argument list for
+        gui_command.create() (or one item of gui_command.create_batch())
+        """
         parent_id = self.patch.obj_id if self.patch is not None else None
 
         self.gui_created = True
@@ -1214,13 +1359,18 @@ class Processor:
 
             create_params['properties'] = {k: v for k, v in self.properties.items()}
 
-        await MFPApp().gui_command.create(
+        return (
             self.init_type, self.init_args, self.obj_id,
             parent_id, create_params
         )
 
+    async def create_gui(self, **kwargs):
+        from .mfp_app import MFPApp
+        await MFPApp().gui_command.create(*self.gui_create_args(**kwargs))
+
     async def delete_gui(self):
         from .mfp_app import MFPApp
+        MFPApp().gui_updates.discard(self.obj_id)
         await MFPApp().gui_command.delete(self.obj_id)
         self.gui_created = False
 
@@ -1237,9 +1387,7 @@ class Processor:
                 to_send[k] = v
                 self.gui_params[k] = v
         if self.gui_created:
-            MFPApp().async_task(
-                MFPApp().gui_command.configure(self.obj_id, **to_send)
-            )
+            MFPApp().gui_updates.configure(self.obj_id, to_send)
 
     def set_tag(self, tag, value):
         self.tags[tag] = value
@@ -1391,6 +1539,5 @@ class Processor:
 
             self.midi_filters["port"] = [tuple(p) for p in ports]
             self.midi_cbid = MFPApp().midi_mgr.register(
-                lambda event, data: MFPApp().async_task(self._midi_handler(event, data)),
-                filters=self.midi_filters
+                self._midi_handler, filters=self.midi_filters
             )
@@ -0,0 +1,147 @@
+"""
+profiler.py -- per-processor trigger timing
+
+When enabled, the activate step of Processor sends (and the
+synchronous send path) are wrapped to time each trigger. Timing is
+kept in a TriggerProfile on each processor. When disabled the
+original methods are put back, so there is no cost at all.
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+
+from bisect import bisect_left
+import time
+
+from .processor import Processor
+
+
+class TriggerProfile:
+    """
+    Count, total and max time spent in one processor's trigger,
+    with a fixed-bucket histogram
+    """
+    # upper edges of histogram buckets, microseconds
+    BUCKETS = (10, 50, 100, 500, 1000, 5000, 10000, 50000)
+    BUCKETS_NS = tuple(b * 1000 for b in BUCKETS)
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+
+    def record(self, elapsed_ns):
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.histogram[bisect_left(self.BUCKETS_NS, elapsed_ns)] += 1
+
+    def summary(self):
+        labels = [f"<={b}us" for b in self.BUCKETS] + [f">{self.BUCKETS[-1]}us"]
+        return dict(
+            count=self.count,
+            total_ms=self.total_ns / 1e6,
+            mean_ms=(self.total_ns / self.count / 1e6) if self.count else None,
+            max_ms=self.max_ns / 1e6,
+            histogram={
+                label: count for label, count in zip(labels, self.histogram)
+                if count
+            }
+        )
+
+
+_originals = {}
+
+
+def _record(obj, elapsed_ns):
+    profile = obj.profile
+    if profile is None:
+        profile = obj.profile = TriggerProfile()
+    profile.record(elapsed_ns)
+
+
+def _profiled_activate(activate):
+    async def _send__activate(self, value, inlet):
+        start = time.perf_counter_ns()
+        try:
+            await activate(self, value, inlet)
+        finally:
+            _record(self, time.perf_counter_ns() - start)
+    return _send__activate
+
+
+def _profiled_sync(send_sync):
+    def _send__sync(self, value, inlet):
+        triggers = self.count_trigger
+        start = time.perf_counter_ns()
+        rv = send_sync(self, value, inlet)
+        if self.count_trigger != triggers:
+            _record(self, time.perf_counter_ns() - start)
+        return rv
+    return _send__sync
+
+
+def is_enabled():
+    return bool(_originals)
+
+
+def enable():
+    if _originals:
+        return
+    _originals['_send__activate'] = Processor._send__activate
+    _originals['_send__sync'] = Processor._send__sync
+    Processor._send__activate = _profiled_activate(_originals['_send__activate'])
+    Processor._send__sync = _profiled_sync(_originals['_send__sync'])
+
+
+def disable():
+    for name, method in _originals.items():
+        setattr(Processor, name, method)
+    _originals.clear()
+
+
+def reset(objects):
+    for obj in objects:
+        if isinstance(obj, Processor):
+            obj.profile = None
+
+
+def top(objects, count=20, sort_key="total_ms"):
+    """
+    Summaries of the 'count' processors with the highest 'sort_key'
+    """
+    rows = []
+    for obj in objects:
+        if not isinstance(obj, Processor) or obj.profile is None:
+            continue
+        rows.append(dict(
+            obj_id=obj.obj_id,
+            name=obj.name,
+            init_type=obj.init_type,
+            patch=obj.patch.name if obj.patch else None,
+            **obj.profile.summary()
+        ))
+    rows.sort(key=lambda row: row.get(sort_key) or 0, reverse=True)
+    return rows[:count] if count else rows
+
+
+def patch_totals(objects):
+    """
+    Trigger count, total and max time summed over each patch, by
+    patch obj_id (patch names need not be unique)
+    """
+    totals = {}
+    for obj in objects:
+        if not isinstance(obj, Processor) or obj.profile is None or not obj.patch:
+            continue
+        profile = obj.profile
+        patch = totals.get(obj.patch.obj_id)
+        if patch is None:
+            patch = totals[obj.patch.obj_id] = dict(
+                name=obj.patch.name, count=0, total_ms=0.0, max_ms=0.0
+            )
+        patch['count'] += profile.count
+        patch['total_ms'] += profile.total_ns / 1e6
+        patch['max_ms'] = max(patch['max_ms'], profile.max_ns / 1e6)
+    return totals
@@ -0,0 +1,76 @@
+"""
+SharedBuffer -- numpy views of a buffer~ shared memory segment
+
+Copyright (c) Bill Gribble <grib@billgribble.com>
+"""
+import mmap
+import os
+
+import numpy as np
+from posix_ipc import SharedMemory
+
+
+class SharedBuffer:
+    """
+    Maps a POSIX shared memory segment once and hands out numpy
+    views of it. Channels are stored one after another, each 'size'
+    float32 samples long. The segment is remapped if the DSP side
+    has grown it since the last view was made.
+
+    The DSP side never shrinks a segment in place (a resized buffer~
+    gets a new buf_id), since reading a view of a segment that has
+    shrunk under it is a SIGBUS
+    """
+    FLOAT_SIZE = 4
+
+    def __init__(self, buf_id, readonly=False):
+        self.buf_id = buf_id
+        self.readonly = readonly
+        self.shm = SharedMemory(buf_id, read_only=readonly)
+        self.map = None
+        self.samples = np.zeros(0, dtype=np.float32)
+        self._map()
+
+    def _map(self):
+        length = os.fstat(self.shm.fd).st_size
+        if self.map is not None and len(self.map) == length:
+            return
+
+        # the old mapping is unmapped when the last view of it goes away
+        self.map = None
+        self.samples = np.zeros(0, dtype=np.float32)
+        if length:
+            self.map = mmap.mmap(
+                self.shm.fd, length,
+                access=mmap.ACCESS_READ if self.readonly else mmap.ACCESS_WRITE
+            )
+            self.samples = np.frombuffer(
+                self.map, dtype=np.float32, count=length // self.FLOAT_SIZE
+            )
+
+    def channel(self, channel, size, start=0, end=None):
+        """
+        View of samples [start, end) of one channel, clipped to the
+        end of the segment
+        """
+        self._map()
+        base = channel * size
+        if end is None:
+            end = size
+        return self.samples[base + start:base + end]
+
+    def channels(self, count, size):
+        """
+        2D (count, size) view of the first 'count' channels, with
+        fewer rows if the segment is too short for all of them
+        """
+        self._map()
+        if size <= 0:
+            return self.samples[:0].reshape((0, 0))
+        count = min(count, len(self.samples) // size)
+        return self.samples[:count * size].reshape((count, size))
+
+    def close(self):
+        self.map = None
+        self.samples = None
+        self.shm.close_fd()
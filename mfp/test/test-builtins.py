@@ -0,0 +1,81 @@
+"""
+test-builtins -- lazy registration of builtin processor types
+"""
+import asyncio
+import importlib
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log, builtins
+from mfp.mfp_app import MFPApp
+
+
+class BuiltinRegistryTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+
+    def unload(self, mod_name):
+        # forget that mod_name was loaded, as if at startup
+        app = MFPApp()
+        builtins.load_times.pop(mod_name, None)
+        for name in builtins.builtin_names[mod_name]:
+            if builtins.builtin_index[name] == mod_name:
+                builtins._provided.pop(name, None)
+                app.registry.pop(name, None)
+
+    def test_names(self):
+        '''builtin_names lists what each module's register() registers'''
+        app = MFPApp()
+        saved = app.register
+        try:
+            for mod_name, names in builtins.builtin_names.items():
+                registered = []
+                app.register = lambda name, ctor: registered.append(name)
+                importlib.import_module("mfp.builtins." + mod_name).register()
+                self.assertEqual(tuple(registered), names, mod_name)
+        finally:
+            app.register = saved
+
+    def test_lazy(self):
+        '''a builtin module is loaded when one of its types is looked up'''
+        self.unload("noise")
+        builtins.register()
+        app = MFPApp()
+        self.assertNotIn("noise~", app.registry)
+        self.assertIn("noise~", app.lazy_registry)
+
+        ctor = app.lookup_type("noise~")
+        self.assertIs(ctor, builtins.noise.Noise)
+        self.assertIn("noise", builtins.load_times)
+        self.assertNotIn("noise~", app.lazy_registry)
+        self.assertIn("noise", app.startup_report()['builtins'])
+
+    def test_precedence(self):
+        '''later modules and non-builtin registrations win'''
+        app = MFPApp()
+        builtins.register_all()
+        self.assertIs(app.registry["sort"], builtins.listops.Sort)
+
+        def user_zip(*args):
+            pass
+
+        self.unload("listops")
+        app.register("zip", user_zip)
+        try:
+            builtins.load_module("listops")
+            self.assertIs(app.registry["zip"], user_zip)
+            self.assertIs(app.registry["sort"], builtins.listops.Sort)
+
+            # loading pyfunc again doesn't take 'sort' back
+            self.unload("pyfunc")
+            builtins.load_module("pyfunc")
+            self.assertIs(app.registry["sort"], builtins.listops.Sort)
+        finally:
+            self.unload("listops")
+            builtins.load_module("listops")
@@ -0,0 +1,60 @@
+"""
+test-dsp-response -- decoding of packed DSP response batches
+"""
+from unittest import TestCase
+
+import numpy as np
+
+from mfp.dsp_response import (
+    RESPONSE_DTYPE, VALUE_BOOL, VALUE_FLT, VALUE_INT, unpack_responses
+)
+
+
+def pack(*records):
+    return np.array(list(records), dtype=RESPONSE_DTYPE).tobytes()
+
+
+class DSPResponseTests (TestCase):
+    def test_record_size(self):
+        '''records match the C mfp_response_record layout'''
+        self.assertEqual(RESPONSE_DTYPE.itemsize, 16)
+
+    def test_types(self):
+        '''values are converted by value type'''
+        responses = unpack_responses(pack(
+            (3, 0, VALUE_FLT, 0.25),
+            (3, 2, VALUE_INT, 512.0),
+            (4, 6, VALUE_BOOL, 1.0),
+        ))
+        self.assertEqual(responses, [(3, 0, 0.25), (3, 2, 512), (4, 6, 1)])
+        self.assertIsInstance(responses[1][2], int)
+        self.assertEqual(unpack_responses(b''), [])
+
+    def test_coalesce(self):
+        '''only the latest value of each level (obj_id, resp_type) is kept'''
+        responses = unpack_responses(pack(
+            (3, 0, VALUE_FLT, 1.0),
+            (5, 0, VALUE_FLT, 2.0),
+            (3, 0, VALUE_FLT, 3.0),
+            (3, 1, VALUE_INT, 4.0),
+            (5, 0, VALUE_FLT, 5.0),
+        ), lambda obj_id, resp_type: True)
+        self.assertEqual(responses, [(3, 0, 3.0), (3, 1, 4), (5, 0, 5.0)])
+
+    def test_events(self):
+        '''event responses are all delivered, in order'''
+        levels = {(4, 9)}
+        responses = unpack_responses(pack(
+            (3, 0, VALUE_BOOL, 1.0),
+            (4, 9, VALUE_FLT, 0.5),
+            (3, 7, VALUE_BOOL, 1.0),
+            (3, 0, VALUE_BOOL, 0.0),
+            (4, 9, VALUE_FLT, 0.25),
+        ), lambda obj_id, resp_type: (obj_id, resp_type) in levels)
+        self.assertEqual(responses, [(3, 0, 1), (3, 7, 1), (3, 0, 0), (4, 9, 0.25)])
+
+        responses = unpack_responses(pack(
+            (3, 0, VALUE_BOOL, 1.0),
+            (3, 0, VALUE_BOOL, 0.0),
+        ))
+        self.assertEqual(responses, [(3, 0, 1), (3, 0, 0)])
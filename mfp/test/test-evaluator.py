@@ -0,0 +1,79 @@
+"""
+test-evaluator -- special forms and compiled-expression cache
+"""
+from unittest import TestCase
+
+from mfp.evaluator import Evaluator, LazyExpr
+from mfp.method import MethodCall
+
+
+class EvaluatorTests (TestCase):
+    def setUp(self):
+        Evaluator.bind_global("LazyExpr", LazyExpr)
+        Evaluator.bind_global("MethodCall", MethodCall)
+        Evaluator.cache_clear()
+        self.ev = Evaluator(dict(foo=5))
+
+    def test_bindings(self):
+        '''extra bindings override locals, locals override globals'''
+        Evaluator.bind_global("bar", 1)
+        assert self.ev.eval("foo + bar") == 6
+        assert self.ev.eval("foo + bar", foo=10) == 11
+        assert self.ev.eval("[foo * x for x in range(3)]") == [0, 5, 10]
+        assert self.ev.eval("self", __self__="me") == "me"
+
+    def test_special_forms(self):
+        '''@method, ,lazy and key=val rewrites'''
+        m = self.ev.eval("@set 1, 2")
+        assert isinstance(m, MethodCall)
+        assert m.method == "set" and m.args == (1, 2)
+
+        lazy = self.ev.eval(",foo * 2")
+        assert isinstance(lazy, LazyExpr)
+        assert lazy.call() == 10
+
+        assert self.ev.eval("a=1, b=foo") == dict(a=1, b=5)
+        assert self.ev.eval_arglist("1, b=foo") == ((1,), dict(b=5))
+
+    def test_cache(self):
+        '''repeated evaluation reuses the compiled expression'''
+        self.ev.eval("foo + 1")
+        self.ev.eval("foo + 1", foo=2)
+        self.ev.eval_arglist("foo + 1")
+
+        info = Evaluator.cache_info()
+        assert info['misses'] == 2
+        assert info['hits'] == 1
+
+    def test_cache_bounded(self):
+        '''least recently used entries are dropped'''
+        saved = Evaluator.code_cache_size
+        try:
+            Evaluator.code_cache_size = 4
+            for i in range(10):
+                self.ev.eval(str(i))
+            assert Evaluator.cache_info()['size'] == 4
+            assert ("9", False) in Evaluator.code_cache
+            assert ("0", False) not in Evaluator.code_cache
+        finally:
+            Evaluator.code_cache_size = saved
+
+    def test_lazy_global(self):
+        '''lazily bound globals are imported on first use'''
+        Evaluator.bind_global_lazy("lazy_join", "os.path", "join")
+        assert "lazy_join" in Evaluator.global_names
+        assert "lazy_join" in Evaluator.global_names.lazy
+        assert self.ev.eval("lazy_join('a', 'b')") == "a/b"
+        assert self.ev.eval("(lambda: lazy_join('c', 'd'))()") == "c/d"
+        assert "lazy_join" not in Evaluator.global_names.lazy
+
+        Evaluator.bind_global_lazy("lazy_path", "os.path")
+        env = {}
+        assert self.ev.exec_str("x = lazy_path.basename('/a/b')", env) is None
+        assert env['x'] == "b"
+
+        Evaluator.bind_global_lazy("lazy_unused", "os.path", "join")
+        env = {}
+        assert self.ev.exec_str("y = 1", env) is None
+        assert env['y'] == 1
+        assert "lazy_unused" in Evaluator.global_names.lazy
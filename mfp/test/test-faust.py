@@ -0,0 +1,50 @@
+"""
+test-faust -- faust~ factory cache reporting
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log, builtins
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.scope import NaiveScope
+
+
+class FaustFactoryTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+
+    async def faust(self):
+        return await MFPApp().create(
+            "faust~", "code='process = _;'", self.patch, None, "faust", setup=False
+        )
+
+    async def test_not_compiled(self):
+        '''no factory info until the DSP side reports it'''
+        obj = await self.faust()
+        self.assertNotIn('faust_factory', obj.tooltip_info())
+        self.assertFalse(obj.tooltip_info()['tooltip_extra'])
+
+    async def test_cache_hit(self):
+        '''cache source and compile time are shown in the tooltip info'''
+        obj = await self.faust()
+        await obj.dsp_response(obj.RESP_FACTORY_CACHE, 2)
+        await obj.dsp_response(obj.RESP_COMPILE_MS, 3.5)
+
+        info = obj.tooltip_info()
+        self.assertEqual(
+            info['faust_factory'],
+            dict(source="disk cache", cache_hit=True, compile_ms=3.5)
+        )
+        self.assertIn("disk cache in 3.5 ms", info['tooltip_extra'])
+
+        await obj.dsp_response(obj.RESP_FACTORY_CACHE, 0)
+        self.assertFalse(obj.tooltip_info()['faust_factory']['cache_hit'])
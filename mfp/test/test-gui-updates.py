@@ -0,0 +1,76 @@
+"""
+test-gui-updates -- coalescing of configure() updates to the GUI
+"""
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from mfp.gui_updates import GUIUpdateQueue
+from mfp.mfp_app import MFPApp
+
+
+class FakeGUICommand:
+    def __init__(self):
+        self.batches = []
+
+    async def configure_batch(self, updates):
+        self.batches.append(updates)
+
+
+class GUIUpdateTests (IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.saved_gui_command = MFPApp().gui_command
+        MFPApp().gui_command = FakeGUICommand()
+        self.queue = GUIUpdateQueue(rate=50)
+
+    def tearDown(self):
+        MFPApp().gui_command = self.saved_gui_command
+
+    async def test_merge(self):
+        '''updates within a frame are merged per object'''
+        for value in range(10):
+            self.queue.configure(1, dict(value=value))
+        self.queue.configure(1, dict(style={}))
+        self.queue.configure(2, dict(value=0))
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(MFPApp().gui_command.batches, [
+            [(1, dict(value=9, style={})), (2, dict(value=0))]
+        ])
+        self.assertEqual(self.queue.stats['updates'], 12)
+        self.assertEqual(self.queue.stats['merged'], 10)
+        self.assertEqual(self.queue.stats['sent'], 2)
+
+    async def test_rate(self):
+        '''at most one flush per frame'''
+        start = asyncio.get_running_loop().time()
+        for value in range(20):
+            self.queue.configure(1, dict(value=value))
+            await asyncio.sleep(0.005)
+        elapsed = asyncio.get_running_loop().time() - start
+        await asyncio.sleep(0.05)
+
+        batches = MFPApp().gui_command.batches
+        self.assertLessEqual(len(batches), int(elapsed * self.queue.rate) + 2)
+        self.assertLess(len(batches), 20)
+        self.assertEqual(batches[-1], [(1, dict(value=19))])
+
+    async def test_priority(self):
+        '''structural changes skip the frame wait and go first'''
+        self.queue.rate = 1
+        self.queue.configure(1, dict(value=1))
+        self.queue.configure(2, dict(num_inlets=3))
+
+        await asyncio.sleep(0.01)
+        self.assertEqual(MFPApp().gui_command.batches, [
+            [(2, dict(num_inlets=3)), (1, dict(value=1))]
+        ])
+
+    async def test_discard(self):
+        '''updates for deleted objects are dropped'''
+        self.queue.configure(1, dict(value=1))
+        self.queue.configure(1, dict(value=2))
+        self.queue.discard(1)
+
+        await asyncio.sleep(0.05)
+        self.assertEqual(MFPApp().gui_command.batches, [])
+        self.assertEqual(self.queue.stats['dropped'], 2)
@@ -0,0 +1,56 @@
+"""
+test-log -- batched log shipping
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log
+
+
+class Unprintable:
+    def __str__(self):
+        raise AssertionError("formatted a filtered log message")
+
+
+class LogBufferTests (IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.saved = (log.log_thread, log.log_loop, log.log_quiet, log.log_debug)
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        log.log_quiet = False
+        self.batches = []
+
+    def tearDown(self):
+        log.log_thread, log.log_loop, log.log_quiet, log.log_debug = self.saved
+
+    async def write(self, entries):
+        self.batches.append(entries)
+
+    async def test_batch(self):
+        '''entries written together are sent as one list'''
+        buf = log.LogBuffer(self.write, interval=0.01)
+        buf("one\n", 0)
+        buf("two\n", 1)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.batches, [[("one\n", 0), ("two\n", 1)]])
+
+    async def test_overflow(self):
+        '''a full buffer drops the oldest entries and says so'''
+        buf = log.LogBuffer(self.write, size=4, interval=0.01)
+        for n in range(10):
+            buf(f"{n}\n", 0)
+        await asyncio.sleep(0.05)
+
+        entries = self.batches[0]
+        self.assertEqual(len(entries), 5)
+        self.assertTrue(entries[0][0].endswith("6 messages dropped\n"))
+        self.assertEqual(entries[1:], [(f"{n}\n", 0) for n in range(6, 10)])
+
+    async def test_filter_before_format(self):
+        '''disabled messages are never formatted'''
+        log.log_debug = False
+        log.debug(Unprintable())
+        log.log_debug = True
+        log.log_quiet = True
+        log.info(Unprintable())
@@ -0,0 +1,73 @@
+"""
+test-messagerec -- beat index and playback of recorded messages
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase, TestCase
+
+from mfp import log, builtins
+from mfp.bang import Uninit
+from mfp.builtins.messagerec import RecEvent, RecTimeline
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.processor import MultiOutput
+from mfp.scope import NaiveScope
+
+
+def event(beat, value):
+    return RecEvent(beat, None, value, False)
+
+
+class RecTimelineTests (TestCase):
+    def test_order(self):
+        '''events stay in beat order, same-beat events in arrival order'''
+        timeline = RecTimeline()
+        for beat, value in [(2, "a"), (0.5, "b"), (2, "c"), (1, "d")]:
+            timeline.insert(event(beat, value))
+        self.assertEqual([e.event for e in timeline], ["b", "d", "a", "c"])
+        self.assertEqual(timeline.beats, [0.5, 1, 2, 2])
+
+    def test_window(self):
+        '''windows are (after, upto] and leave the cursor at the end'''
+        timeline = RecTimeline()
+        for beat in range(8):
+            timeline.insert(event(beat, beat))
+        self.assertEqual([e.event for e in timeline.window(1, 3)], [2, 3])
+        self.assertEqual(timeline.cursor, 4)
+        self.assertEqual([e.event for e in timeline.window(3, 4.5)], [4])
+        self.assertEqual([e.event for e in timeline.window(None, 0)], [0])
+
+        # an insert before the cursor keeps it on the same event
+        timeline.insert(event(-1, "x"))
+        self.assertEqual(timeline.cursor, 2)
+        self.assertEqual([e.event for e in timeline.window(0, 1)], [1])
+
+
+class MessageRecTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+        self.rec = await MFPApp().create("messagerec", None, self.patch, None, "rec")
+
+    async def tick(self, beat):
+        self.rec.outlets[0] = None
+        await self.rec.send(beat, 1)
+        return self.rec.outlets[0]
+
+    async def test_playback(self):
+        '''recorded events play when the clock reaches them, across a wrap'''
+        await self.rec.send([(0.5, "a"), (1.5, "b"), (1.75, "c"), (3, "d")])
+        self.assertIs(await self.tick(0), Uninit)
+        self.assertEqual(await self.tick(1), "a")
+        out = await self.tick(2)
+        self.assertIsInstance(out, MultiOutput)
+        self.assertEqual(out.values, ["b", "c"])
+        self.assertEqual(await self.tick(3), "d")
+        self.assertIs(await self.tick(0), Uninit)
+        self.assertEqual(await self.tick(1), "a")
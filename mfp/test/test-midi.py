@@ -0,0 +1,247 @@
+"""
+test-midi -- MIDI events, handler dispatch and batched output
+"""
+import asyncio
+from unittest import IsolatedAsyncioTestCase, TestCase, mock
+
+import alsa_midi
+import simplejson as json
+
+from mfp import midi
+from mfp.patch_json import ExtendedEncoder, extended_decoder_hook
+
+
+def note_on(channel=0, note=60, client=20, port=0):
+    return midi.from_alsaseq(alsa_midi.NoteOnEvent(
+        note=note, velocity=100, channel=channel,
+        source=alsa_midi.Address(client, port)
+    ))
+
+
+def cc(channel=0, client=20, port=0):
+    return midi.from_alsaseq(alsa_midi.ControlChangeEvent(
+        param=7, value=64, channel=channel,
+        source=alsa_midi.Address(client, port)
+    ))
+
+
+class MidiEventTests (TestCase):
+    def test_lazy_decode(self):
+        '''alsa fields are decoded on first use'''
+        ev = cc(channel=3, client=21, port=1)
+        self.assertEqual(ev.channel, 3)
+        self.assertEqual(ev.controller, 7)
+        self.assertEqual(ev.value, 64)
+        self.assertEqual(repr(ev), "<MidiCC 3 7 64>")
+        self.assertEqual(ev.to_alsaseq().param, 7)
+        with self.assertRaises(AttributeError):
+            ev.program
+
+    def test_write_before_decode(self):
+        '''fields set before the first read survive the lazy decode'''
+        ev = note_on(channel=3, note=60)
+        ev.channel = 9
+        ev.velocity = 1
+        self.assertEqual(ev.key, 60)
+        self.assertEqual((ev.channel, ev.velocity), (9, 1))
+        self.assertEqual(ev.to_alsaseq().channel, 9)
+
+    def test_copy(self):
+        '''copies are independent and still decode lazily'''
+        ev = note_on(channel=3, note=60)
+        dup = ev.copy()
+        dup.channel = 5
+        self.assertEqual(dup.key, 60)
+        self.assertEqual(dup.channel, 5)
+        self.assertEqual(ev.channel, 3)
+
+    def test_roundtrip(self):
+        '''lv2 and JSON encodings survive a round trip'''
+        ev = midi.NoteOn()
+        ev.channel = 1
+        ev.key = 64
+        ev.velocity = 99
+        self.assertEqual(repr(midi.from_lv2(ev.to_lv2())), repr(ev))
+
+        encoded = json.dumps(ev, cls=ExtendedEncoder)
+        self.assertEqual(
+            json.loads(encoded)["__NoteOn__"],
+            dict(event=None, channel=1, source=None, dest=None,
+                 key=64, velocity=99, duration=0)
+        )
+        decoded = json.loads(encoded, object_hook=extended_decoder_hook)
+        self.assertIsInstance(decoded, midi.NoteOn)
+        self.assertEqual(repr(decoded), repr(ev))
+
+    def test_ext_types(self):
+        '''EXT_TYPES lists every type mfp.midi adds with @ext_encode'''
+        midi_types = {
+            name for name, klass in ExtendedEncoder.DICTTYPES.items()
+            if klass.__module__ == "mfp.midi"
+        }
+        self.assertEqual(midi_types, set(ExtendedEncoder.EXT_TYPES))
+
+    def test_ext_types_unloadable(self):
+        '''unknown or unimportable types load as the saved dict'''
+        saved = {"__NoSuchType__": dict(value=1)}
+        self.assertEqual(json.loads(json.dumps(saved), object_hook=extended_decoder_hook), saved)
+
+        saved = {"__Broken__": dict(value=1)}
+        with mock.patch.dict(ExtendedEncoder.EXT_TYPES, __Broken__="mfp.no_such_module"):
+            loaded = json.loads(json.dumps([saved, 2]), object_hook=extended_decoder_hook)
+        self.assertEqual(loaded, [saved, 2])
+
+    def test_realtime_shared(self):
+        '''clock messages from one source share an instance'''
+        src = alsa_midi.Address(20, 0)
+        first = midi.from_alsaseq(alsa_midi.ClockEvent(source=src))
+        second = midi.from_alsaseq(alsa_midi.ClockEvent(source=src))
+        other = midi.from_alsaseq(alsa_midi.ClockEvent(source=alsa_midi.Address(21, 0)))
+        self.assertIs(first, second)
+        self.assertIsNot(first, other)
+        self.assertIsInstance(first, midi.MidiClock)
+
+    def test_realtime_readonly(self):
+        '''shared realtime events can't be changed, copies can'''
+        src = alsa_midi.Address(22, 0)
+        shared = midi.from_alsaseq(alsa_midi.StartEvent(source=src))
+        with self.assertRaises(AttributeError):
+            shared.channel = 3
+        with self.assertRaises(AttributeError):
+            del shared.source
+
+        dup = shared.copy()
+        dup.channel = 3
+        dup.port = 1
+        self.assertEqual(dup.channel, 3)
+        self.assertEqual(dup.source, src)
+        self.assertNotEqual(shared.channel, 3)
+        self.assertIs(midi.from_alsaseq(alsa_midi.StartEvent(source=src)), shared)
+
+
+class MidiDispatchTests (IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.mgr = midi.MFPMidiManager(1, 1)
+        self.calls = []
+
+    def handler(self, event, data):
+        self.calls.append(data)
+
+    async def test_filters(self):
+        '''etype, channel, port and unit filters narrow dispatch'''
+        self.mgr.register(self.handler, "all")
+        self.mgr.register(self.handler, "noteon", dict(etype=midi.NoteOn))
+        self.mgr.register(self.handler, "note", dict(etype=[midi.Note]))
+        self.mgr.register(self.handler, "cc", dict(etype=midi.MidiCC))
+        self.mgr.register(self.handler, "chan3", dict(channel=3))
+        self.mgr.register(self.handler, "port1", dict(port=1))
+        self.mgr.register(self.handler, "unit21", dict(unit=21))
+
+        await self.mgr.dispatch_event(note_on())
+        self.assertEqual(self.calls, ["all", "noteon", "note"])
+
+        self.calls = []
+        await self.mgr.dispatch_event(cc(channel=3, client=21, port=1))
+        self.assertEqual(self.calls, ["all", "cc", "chan3", "port1", "unit21"])
+
+    async def test_unregister(self):
+        '''unregistering a handler drops it from the dispatch index'''
+        cb_id = self.mgr.register(self.handler, "noteon", dict(etype=midi.NoteOn))
+        await self.mgr.dispatch_event(note_on())
+        self.mgr.unregister(cb_id)
+        await self.mgr.dispatch_event(note_on())
+        self.assertEqual(self.calls, ["noteon"])
+        self.assertEqual(self.mgr.handlers_by_id, {})
+
+    async def test_inline(self):
+        '''inline handlers are awaited in event order'''
+        async def handler(event, data):
+            self.calls.append(event.key)
+
+        self.mgr.register(handler, inline=True)
+        for key in range(5):
+            await self.mgr.dispatch_event(note_on(note=key))
+        self.assertEqual(self.calls, [0, 1, 2, 3, 4])
+
+    async def test_not_inline(self):
+        '''non-inline coroutine handlers run as tasks'''
+        from mfp.mfp_app import MFPApp
+        from mfp.utils import AsyncTaskManager
+        if MFPApp().async_task is None:
+            MFPApp().async_task = AsyncTaskManager()
+
+        async def handler(event, data):
+            await asyncio.sleep(0)
+            self.calls.append(event.key)
+
+        self.mgr.register(handler)
+        for key in range(3):
+            await self.mgr.dispatch_event(note_on(note=key))
+        self.assertEqual(self.calls, [])
+        for _ in range(5):
+            await asyncio.sleep(0)
+        self.assertEqual(self.calls, [0, 1, 2])
+
+
+class FakeClient:
+    def __init__(self):
+        self.output = []
+        self.drains = 0
+
+    async def event_output(self, event, port=None):
+        if event.note == 13:
+            raise ValueError("unlucky note")
+        self.output.append((port, event.note))
+
+    async def drain_output(self):
+        self.drains += 1
+
+
+class MidiOutputTests (IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.mgr = midi.MFPMidiManager(0, 2)
+        self.mgr.client = FakeClient()
+        self.mgr.output_ports = ["out0", "out1"]
+
+    def note(self, key):
+        ev = midi.NoteOn()
+        ev.key = key
+        ev.velocity = 100
+        return ev
+
+    async def test_batch(self):
+        '''events sent in one tick are drained together'''
+        for key in range(4):
+            await self.mgr.send(key % 2, self.note(key))
+        self.assertEqual(self.mgr.output_depth, 4)
+        self.assertEqual(self.mgr.client.drains, 0)
+
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.mgr.client.drains, 1)
+        self.assertEqual(
+            self.mgr.client.output,
+            [("out0", 0), ("out0", 2), ("out1", 1), ("out1", 3)]
+        )
+        self.assertEqual(self.mgr.output_stats['events'], 4)
+        self.assertEqual(self.mgr.output_stats['max_depth'], 4)
+
+    async def test_latency(self):
+        '''with output_latency, events wait to join a later batch'''
+        self.mgr.output_latency = 0.05
+        await self.mgr.send(0, self.note(1))
+        await asyncio.sleep(0.01)
+        await self.mgr.send(0, self.note(2))
+        self.assertEqual(self.mgr.client.drains, 0)
+
+        await asyncio.sleep(0.1)
+        self.assertEqual(self.mgr.client.drains, 1)
+        self.assertEqual(self.mgr.client.output, [("out0", 1), ("out0", 2)])
+
+    async def test_output_error(self):
+        '''an event that fails to send does not drop the rest of the batch'''
+        for key in [1, 13, 2]:
+            await self.mgr.send(0, self.note(key))
+
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.mgr.client.output, [("out0", 1), ("out0", 2)])
+        self.assertEqual(self.mgr.client.drains, 1)
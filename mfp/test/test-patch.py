@@ -4,9 +4,12 @@ from mfp.patch import Patch
 from mfp.scope import NaiveScope
 from ..mfp_app import MFPApp
 from mfp import log, builtins
+from mfp.utils import AsyncTaskManager
 import simplejson as json
 import threading
 import asyncio
+import os
+import tempfile
 
 
 async def mkproc(case, init_type, init_args=None):
@@ -23,6 +26,9 @@ class PatchTests (IsolatedAsyncioTestCase):
         log.log_thread = threading.get_ident()
         log.log_loop = asyncio.get_event_loop()
         await MFPApp().setup()
+        if MFPApp().async_task is None:
+            # an earlier test shut the app down
+            MFPApp().async_task = AsyncTaskManager()
         builtins.register()
         self.patch = Patch('default', '', None, NaiveScope(), 'default')
         pass
@@ -96,3 +102,210 @@ class PatchTests (IsolatedAsyncioTestCase):
         await self.patch.send(True)
 
         self.assertEqual(p2.outlets[0], True)
+
+    async def test_load_connection_order(self):
+        """
+        Connections out of an object are restored in saved order
+        and the load records time spent in each phase
+        """
+        head = await mkproc(self, "var")
+        targets = [await mkproc(self, "var") for _ in range(4)]
+        for target in reversed(targets):
+            await head.connect(0, target, 0)
+        await targets[0].connect(0, targets[1], 0)
+
+        json_1 = await self.patch.json_serialize()
+        await self.patch.delete()
+
+        MFPApp().next_obj_id = 0
+        p2 = Patch('default', '', None, NaiveScope(), 'default')
+        await p2.json_deserialize(json_1)
+        json_2 = await p2.json_serialize()
+
+        saved_1 = json.loads(json_1)['objects']
+        saved_2 = json.loads(json_2)['objects']
+        self.assertEqual(
+            [saved_1[oid]['connections'] for oid in sorted(saved_1)],
+            [saved_2[oid]['connections'] for oid in sorted(saved_2)]
+        )
+
+        self.assertEqual(
+            set(p2.load_timings), {'create', 'setup', 'connect', 'onload'}
+        )
+
+    async def test_load_setup_error(self):
+        """
+        An object whose setup() fails is logged and the rest of
+        the patch still loads and connects
+        """
+        from unittest import mock
+        from mfp.processor import Processor
+
+        src = await mkproc(self, "var")
+        bad = await mkproc(self, "var")
+        dst = await mkproc(self, "var")
+        bad.name = "bad"
+        await src.connect(0, dst, 0)
+        await src.connect(0, bad, 0)
+        json_1 = await self.patch.json_serialize()
+        await self.patch.delete()
+
+        orig_setup = Processor.setup
+
+        async def setup(obj, **kwargs):
+            if obj.name == "bad":
+                raise RuntimeError("setup failed")
+            return await orig_setup(obj, **kwargs)
+
+        MFPApp().next_obj_id = 0
+        p2 = Patch('default', '', None, NaiveScope(), 'default')
+        with mock.patch.object(Processor, "setup", setup), \
+                mock.patch.object(log, "error") as error:
+            await p2.json_deserialize(json_1)
+
+        self.assertEqual(len(p2.objects), 3)
+        self.assertEqual(error.call_count, 1)
+        self.assertIn("'bad'", error.call_args[0][0])
+        new_src = [obj for obj in p2.objects.values() if obj.name == src.name][0]
+        self.assertEqual(len(new_src.connections_out[0]), 2)
+
+    async def test_create_gui_connections(self):
+        """
+        Creating a top-level patch's GUI sends its connections in one
+        batch and leaves the patch's own connections alone
+        """
+        calls = []
+
+        class FakeGUICommand:
+            def __getattr__(self, name):
+                async def call(*args, **kwargs):
+                    calls.append((name, args))
+                return call
+
+        src = await mkproc(self, "var")
+        dst = await mkproc(self, "var")
+        hidden = await mkproc(self, "var")
+        hidden.display_type = "hidden"
+        await src.connect(0, dst, 0)
+        await src.connect(0, hidden, 0)
+        connections_out = [list(port) for port in src.connections_out]
+
+        self.patch.gui_params['top_level'] = True
+        saved = (MFPApp().no_gui, MFPApp().gui_command)
+        MFPApp().no_gui = False
+        MFPApp().gui_command = FakeGUICommand()
+        try:
+            await self.patch.create_gui()
+        finally:
+            MFPApp().no_gui, MFPApp().gui_command = saved
+
+        self.assertEqual(src.connections_out, connections_out)
+        self.assertEqual(
+            [args for name, args in calls if name == "connect_batch"],
+            [([(src.obj_id, 0, dst.obj_id, 0)],)]
+        )
+
+    async def test_clonescope(self):
+        """
+        Clones of a scope get their own objects, wired to each other
+        and to the same objects outside the scope
+        """
+        voice = self.patch.add_scope("voice_001")
+        src = await mkproc(self, "var")
+        add = await MFPApp().create("+", "1", self.patch, voice, "add")
+        out = await MFPApp().create("var", None, self.patch, voice, "out")
+        await src.connect(0, add, 0)
+        await add.connect(0, out, 0)
+
+        await self.patch.clonescope("voice_001", 4)
+
+        clones = [self.patch.scopes.get("voice_%03d" % n) for n in range(2, 5)]
+        self.assertTrue(all(clones))
+        self.assertNotIn("voice_005", self.patch.scopes)
+
+        adds = [scope.bindings["add"] for scope in clones]
+        outs = [scope.bindings["out"] for scope in clones]
+        self.assertEqual(
+            src.connections_out[0], [(obj, 0) for obj in [add] + adds]
+        )
+        for clone_add, clone_out in zip(adds, outs):
+            self.assertEqual(clone_add.connections_out[0], [(clone_out, 0)])
+            self.assertEqual(clone_out.connections_in[0], [(clone_add, 0)])
+
+        await src.send(2)
+        self.assertEqual([obj.outlets[0] for obj in outs], [3, 3, 3])
+        self.assertIn('clone', self.patch.load_timings)
+
+    async def test_patch_file_cache(self):
+        """
+        A patch file used as an object type is parsed once until it
+        changes, and missing names aren't searched for again
+        """
+        saved_searchpath = MFPApp().searchpath
+        with tempfile.TemporaryDirectory() as tmpdir:
+            MFPApp().searchpath = tmpdir
+            MFPApp().reload_patch_files()
+            typename = "cached_%d" % os.getpid()
+            filename = os.path.join(tmpdir, typename + ".mfp")
+
+            src = Patch(typename, '', None, NaiveScope(), typename)
+            await MFPApp().create("var", "1", src, None, "v")
+            await src.save_file(filename)
+
+            try:
+                stats = MFPApp().patch_files.stats
+                p1 = await MFPApp().create(typename, None, self.patch, None, "p1")
+                p2 = await MFPApp().create(typename, None, self.patch, None, "p2")
+                self.assertEqual((stats['misses'], stats['hits']), (1, 1))
+                self.assertIsNot(p1.objects, p2.objects)
+                self.assertEqual(p2.file_origin, filename)
+
+                # rewriting the file is noticed
+                await MFPApp().create("var", "2", src, None, "w")
+                await src.save_file(filename)
+                p3 = await MFPApp().create(typename, None, self.patch, None, "p3")
+                self.assertEqual(stats['misses'], 2)
+                self.assertEqual(len(p3.objects), 2)
+                self.assertEqual(len(p1.objects), 1)
+
+                # so is a file that appears after a failed lookup
+                self.assertIsNone(MFPApp().patch_files.find("later.mfp", tmpdir))
+                lookups = stats['lookup_misses']
+                self.assertIsNone(MFPApp().patch_files.find("later.mfp", tmpdir))
+                self.assertEqual(stats['lookup_misses'], lookups)
+                await src.save_file(os.path.join(tmpdir, "later.mfp"))
+                self.assertIsNotNone(MFPApp().patch_files.find("later.mfp", tmpdir))
+
+                # a found file that can't be read is looked up again
+                p4 = Patch("later", '', None, NaiveScope(), "later")
+                await p4._load_file("later.mfp")
+                self.assertEqual(len(p4.objects), 2)
+                os.unlink(os.path.join(tmpdir, "later.mfp"))
+                p5 = Patch("later", '', None, NaiveScope(), "later")
+                await p5._load_file("later.mfp")
+                self.assertEqual(p5.objects, {})
+                self.assertIsNone(MFPApp().patch_files.find("later.mfp", tmpdir))
+            finally:
+                MFPApp().registry.pop(typename, None)
+                MFPApp().searchpath = saved_searchpath
+                MFPApp().reload_patch_files()
+
+    async def test_patch_file_search_order(self):
+        """
+        A patch file found in more than one search path directory
+        is loaded from the last one
+        """
+        saved_searchpath = MFPApp().searchpath
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as last:
+            MFPApp().searchpath = first + ":" + last
+            MFPApp().reload_patch_files()
+            src = Patch("dup", '', None, NaiveScope(), "dup")
+            await src.save_file(os.path.join(first, "dup.mfp"))
+            await src.save_file(os.path.join(last, "dup.mfp"))
+            try:
+                p1 = Patch("dup", '', None, NaiveScope(), "dup")
+                await p1._load_file("dup.mfp")
+                self.assertEqual(p1.file_origin, os.path.join(last, "dup.mfp"))
+            finally:
+                MFPApp().searchpath = saved_searchpath
+                MFPApp().reload_patch_files()
@@ -0,0 +1,76 @@
+"""
+test-peak-pyramid -- range updates of the buffer editor's peak summaries
+
+peak_pyramid.py only needs numpy, so it is loaded from its file
+rather than through the imgui buffer_editor package
+"""
+import importlib.util
+import os
+from unittest import TestCase
+
+import numpy as np
+
+PEAK_PYRAMID = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "gui", "imgui", "buffer_editor", "peak_pyramid.py"
+)
+
+spec = importlib.util.spec_from_file_location("peak_pyramid", PEAK_PYRAMID)
+peak_pyramid = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(peak_pyramid)
+PeakPyramid = peak_pyramid.PeakPyramid
+
+
+class PeakPyramidTests (TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(14)
+        # not a multiple of any factor, so every level has a short last bin
+        self.data = self.rng.uniform(-0.5, 0.5, 123457).astype(np.float32)
+
+    def assertSamePeaks(self, peaks, expected):
+        for factor in PeakPyramid.FACTORS:
+            np.testing.assert_array_equal(peaks.maxima[factor], expected.maxima[factor])
+            np.testing.assert_array_equal(peaks.minima[factor], expected.minima[factor])
+            np.testing.assert_array_equal(peaks.peaks[factor], expected.peaks[factor])
+
+    def test_full(self):
+        '''levels hold the min and max of each bin'''
+        peaks = PeakPyramid(self.data, 44100)
+        for factor in PeakPyramid.FACTORS:
+            bins = (len(self.data) + factor - 1) // factor
+            self.assertEqual(len(peaks.maxima[factor]), bins)
+            self.assertEqual(peaks.maxima[factor][-1], self.data[(bins - 1) * factor:].max())
+            self.assertEqual(peaks.minima[factor][3], self.data[3 * factor:4 * factor].min())
+            self.assertEqual(peaks.peaks[factor][6], peaks.maxima[factor][3])
+            self.assertEqual(peaks.peaks[factor][7], peaks.minima[factor][3])
+
+    def test_range(self):
+        '''updating a changed range matches a full rebuild'''
+        ranges = [
+            (0, 1), (9, 11), (995, 10005), (54321, 54322),
+            (99999, 120001), (123450, 123457), (0, 123457),
+        ]
+        peaks = PeakPyramid(self.data.copy(), 44100)
+        for start, end in ranges:
+            data = peaks.data.copy()
+            data[start:end] = self.rng.uniform(-1, 1, end - start)
+            peaks.update(data, start, end)
+            self.assertSamePeaks(peaks, PeakPyramid(data.copy(), 44100))
+
+    def test_lower(self):
+        '''a range update can lower a bin's peaks, not only raise them'''
+        data = self.data.copy()
+        peaks = PeakPyramid(data, 44100)
+        data[20000:30000] = 0
+        peaks.update(data, 20000, 30000)
+        self.assertEqual(peaks.maxima[10000][2], 0)
+        self.assertEqual(peaks.minima[10000][2], 0)
+        self.assertSamePeaks(peaks, PeakPyramid(data.copy(), 44100))
+
+    def test_resize(self):
+        '''a size change rebuilds whatever range is given'''
+        peaks = PeakPyramid(self.data.copy(), 44100)
+        data = self.rng.uniform(-1, 1, 5000).astype(np.float32)
+        peaks.update(data, 10, 20)
+        self.assertSamePeaks(peaks, PeakPyramid(data.copy(), 44100))
+        self.assertEqual(len(peaks.x_values[1]), 5000)
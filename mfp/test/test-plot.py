@@ -0,0 +1,89 @@
+"""
+test-plot -- point streaming from scatter plots, table values
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log, builtins
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.point_store import unpack_points
+from mfp.scope import NaiveScope
+from mfp.utils import AsyncTaskManager
+
+
+class FakeGUICommand:
+    def __init__(self):
+        self.commands = []
+
+    async def command(self, obj_id, action, data):
+        self.commands.append((action, data))
+
+
+class ScatterStreamTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        if MFPApp().async_task is None:
+            # an earlier test shut the app down
+            MFPApp().async_task = AsyncTaskManager()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+        self.saved_gui_command = MFPApp().gui_command
+        MFPApp().gui_command = FakeGUICommand()
+
+    def tearDown(self):
+        MFPApp().gui_command = self.saved_gui_command
+
+    async def scatter(self, args):
+        obj = await MFPApp().create("scatter", args, self.patch, None, "scatter")
+        obj.gui_created = True
+        return obj
+
+    async def test_batch(self):
+        '''points sent within a frame go to the GUI as one packed batch'''
+        obj = await self.scatter("2, stream=True, max_points=4")
+        for x in range(6):
+            await obj.send((x, x * 2))
+        await obj.send((0, 1), inlet=1)
+        self.assertEqual(MFPApp().gui_command.commands, [])
+
+        await asyncio.sleep(0.1)
+        commands = MFPApp().gui_command.commands
+        self.assertEqual([c[0] for c in commands], ["points"])
+        xs, ys = unpack_points(commands[0][1][0])
+        self.assertEqual(xs.tolist(), [0, 1, 2, 3, 4, 5])
+        self.assertEqual(ys.tolist(), [0, 2, 4, 6, 8, 10])
+        self.assertEqual(len(obj.points[0]), 4)
+        self.assertEqual(len(obj.points[1]), 1)
+
+    async def test_decimate(self):
+        '''decimation keeps the extremes of each pixel column'''
+        obj = await self.scatter("1, decimate=10")
+        obj.gui_params['x_min'] = 0
+        obj.gui_params['x_max'] = 10
+        for x in range(100):
+            await obj.send((x * 0.1, x % 7))
+
+        await asyncio.sleep(0.1)
+        commands = MFPApp().gui_command.commands
+        xs, ys = unpack_points(commands[0][1][0])
+        self.assertLessEqual(len(xs), 20)
+        self.assertEqual(max(ys), 6)
+        self.assertEqual(min(ys), 0)
+        self.assertEqual(len(obj.points[0]), 100)
+
+    async def test_table_values(self):
+        '''table values keep their type'''
+        obj = await MFPApp().create("table", "4", self.patch, None, "table")
+        await obj.send([1, 60])
+        await obj.send(1)
+        self.assertEqual(obj.outlets[0], 60)
+        self.assertIsInstance(obj.outlets[0], int)
+        self.assertEqual(obj.save_state()['points'], [0, 60, 0, 0])
+        self.assertIsInstance(obj.save_state()['points'][1], int)
@@ -0,0 +1,150 @@
+"""
+test-pluginfo -- LADSPA index cache and library scanning
+
+Uses the pluginfo package from this tree with a stub _pluginfo, so
+the scan runs in real worker processes without real plugins
+"""
+import importlib
+import os
+import sys
+import tempfile
+import time
+from unittest import TestCase, mock
+
+PLUGINFO_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+    "pluginfo"
+)
+
+# each fake library's contents say what loading it does
+STUB = '''
+import os
+import time
+
+def get_constants():
+    return {}
+
+def is_ladspa(path):
+    with open(path) as libfile:
+        kind = libfile.read()
+    if kind == "crash":
+        os._exit(1)
+    if kind == "hang":
+        time.sleep(60)
+    return kind == "ladspa"
+
+def list_plugins(path):
+    return [(path, 0, os.path.basename(path))]
+
+def describe_plugin(path, index):
+    return dict(label=os.path.basename(path))
+'''
+
+MODULES = ("_pluginfo", "pluginfo", "pluginfo.pluginfo")
+
+
+class PlugInfoScanTests (TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        stubdir = os.path.join(self.tmpdir.name, "stub")
+        self.libdir = os.path.join(self.tmpdir.name, "ladspa")
+        os.makedirs(stubdir)
+        os.makedirs(self.libdir)
+        with open(os.path.join(stubdir, "_pluginfo.py"), "w") as stubfile:
+            stubfile.write(STUB)
+        self.cache_path = os.path.join(self.tmpdir.name, "cache", "index.json")
+
+        # worker processes are spawned with this sys.path
+        self.saved_path = list(sys.path)
+        self.saved_modules = {
+            name: sys.modules.pop(name) for name in MODULES if name in sys.modules
+        }
+        sys.path[:0] = [stubdir, PLUGINFO_DIR]
+        self.module = importlib.import_module("pluginfo.pluginfo")
+
+        self.saved_env = os.environ.get("LADSPA_PATH")
+        os.environ["LADSPA_PATH"] = self.libdir
+
+    def tearDown(self):
+        sys.path[:] = self.saved_path
+        for name in MODULES:
+            sys.modules.pop(name, None)
+        sys.modules.update(self.saved_modules)
+        if self.saved_env is None:
+            del os.environ["LADSPA_PATH"]
+        else:
+            os.environ["LADSPA_PATH"] = self.saved_env
+        self.tmpdir.cleanup()
+
+    def library(self, name, kind):
+        path = os.path.join(self.libdir, name)
+        with open(path, "w") as libfile:
+            libfile.write(kind)
+        return path
+
+    def index(self, timeout=30):
+        info = self.module.PlugInfo(self.cache_path)
+        info.SCAN_TIMEOUT = timeout
+        with mock.patch.object(
+            info, "scan_libraries", wraps=info.scan_libraries
+        ) as scan:
+            info.index_ladspa()
+        scanned = []
+        if scan.called:
+            scanned = sorted(os.path.basename(p) for p in scan.call_args[0][0])
+        return info, scanned
+
+    def test_cache(self):
+        '''unchanged libraries come from the cache, changed ones are scanned'''
+        self.library("amp.so", "ladspa")
+        self.library("readme.txt", "text")
+        delay = self.library("delay.so", "ladspa")
+
+        info, scanned = self.index()
+        self.assertEqual(scanned, ["amp.so", "delay.so", "readme.txt"])
+        self.assertEqual(info.find("amp.so"), dict(label="amp.so"))
+        self.assertIsNone(info.find("readme.txt"))
+
+        info, scanned = self.index()
+        self.assertEqual(scanned, [])
+        self.assertEqual(info.find("delay.so"), dict(label="delay.so"))
+
+        with open(delay, "a") as libfile:
+            libfile.write("\n")
+        info, scanned = self.index()
+        self.assertEqual(scanned, ["delay.so"])
+        self.assertIsNone(info.find("delay.so"))
+        self.assertEqual(info.find("amp.so"), dict(label="amp.so"))
+
+    def test_crash(self):
+        '''a crashing library fails right away and isn't retried'''
+        for num in range(3):
+            self.library(f"good{num}.so", "ladspa")
+        crash = self.library("crash.so", "crash")
+
+        start = time.monotonic()
+        info, scanned = self.index()
+        self.assertLess(time.monotonic() - start, 15)
+        self.assertEqual(info.failed, [crash])
+        for num in range(3):
+            self.assertIsNotNone(info.find(f"good{num}.so"))
+
+        info, scanned = self.index()
+        self.assertEqual(scanned, [])
+        self.assertEqual(info.failed, [])
+
+    def test_hang(self):
+        '''a hung library fails at the deadline; ones that never started are rescanned later'''
+        hang = self.library("hang.so", "hang")
+        self.library("good.so", "ladspa")
+
+        start = time.monotonic()
+        with mock.patch("os.cpu_count", return_value=1):
+            info, scanned = self.index(timeout=1)
+        self.assertLess(time.monotonic() - start, 10)
+        self.assertEqual(info.failed, [hang])
+        self.assertIsNone(info.find("good.so"))
+
+        info, scanned = self.index(timeout=1)
+        self.assertEqual(scanned, ["good.so"])
+        self.assertEqual(info.find("good.so"), dict(label="good.so"))
@@ -0,0 +1,102 @@
+"""
+test-point-store -- columnar point storage for plot curves
+"""
+from unittest import TestCase
+
+import numpy as np
+
+from mfp.point_store import (
+    PointStore, combined_bounds, decimate, pack_points, unpack_points
+)
+
+
+class PointStoreTests (TestCase):
+    def test_grow(self):
+        '''without a capacity every point is kept'''
+        store = PointStore()
+        for x in range(200):
+            store.append(x, -x)
+        self.assertEqual(len(store), 200)
+        self.assertEqual(store.x()[-1], 199)
+        self.assertEqual(store.bounds(), (0, -199, 199, 0))
+        self.assertEqual(store.points()[:2], [(0.0, 0.0), (1.0, -1.0)])
+
+    def test_ring(self):
+        '''with a capacity the oldest points are dropped'''
+        store = PointStore(4)
+        for x in range(11):
+            store.append(x, x * x)
+        self.assertEqual(store.x().tolist(), [7, 8, 9, 10])
+        self.assertEqual(store.y().tolist(), [49, 64, 81, 100])
+        self.assertEqual(store.bounds(), (7, 49, 10, 100))
+        self.assertEqual(store.total, 11)
+
+        # the live points are a view, not a copy
+        self.assertTrue(np.shares_memory(store.x(), store.columns))
+
+    def test_visible(self):
+        '''visible() slices sorted data and masks unsorted data'''
+        store = PointStore()
+        store.extend((x * 0.5, x) for x in range(20))
+        xs, ys = store.visible(2.0, 3.0)
+        self.assertEqual(xs.tolist(), [2.0, 2.5, 3.0])
+        self.assertEqual(ys.tolist(), [4, 5, 6])
+        self.assertTrue(np.shares_memory(xs, store.columns))
+
+        store.append(0, 100)
+        self.assertFalse(store.x_sorted)
+        xs, ys = store.visible(None, 0.5)
+        self.assertEqual(xs.tolist(), [0, 0.5, 0])
+
+    def test_replace(self):
+        '''replacing an extreme point recomputes the bounds'''
+        store = PointStore(3)
+        store.extend([(0, 1), (1, 5), (2, 3), (3, 2)])
+        self.assertEqual(store.bounds(), (1, 2, 3, 5))
+        store.replace(0, 1, 0)
+        self.assertEqual(store.points(), [(1, 0), (2, 3), (3, 2)])
+        self.assertEqual(store.bounds(), (1, 0, 3, 3))
+        with self.assertRaises(IndexError):
+            store.replace(3, 0, 0)
+
+    def test_combined_bounds(self):
+        '''bounds of several curves are padded by 10%'''
+        first = PointStore()
+        first.extend([(0, 0), (5, 10)])
+        second = PointStore()
+        second.extend([(10, 20)])
+        self.assertEqual(combined_bounds([first, second, PointStore()]), (-1, -2, 11, 22))
+        self.assertEqual(combined_bounds([]), (None, None, None, None))
+
+    def test_window(self):
+        '''points older than the window are dropped'''
+        store = PointStore(window=2.5)
+        for x in range(100):
+            store.append(x * 0.1, x)
+        self.assertEqual(len(store), 26)
+        self.assertEqual(store.bounds(), (7.4, 74, 9.9, 99))
+        self.assertEqual(store.columns.shape[1], 64)
+
+    def test_extend_arrays(self):
+        '''a block of points wraps the ring like single appends'''
+        store = PointStore(5)
+        store.extend([(0, 0), (1, 1), (2, 2)])
+        store.extend_arrays(np.arange(3.0, 10.0), np.arange(3.0, 10.0) * 2)
+        self.assertEqual(store.points(), [(5, 10), (6, 12), (7, 14), (8, 16), (9, 18)])
+        self.assertEqual(store.bounds(), (5, 10, 9, 18))
+        self.assertEqual(store.total, 10)
+
+
+class PackingTests (TestCase):
+    def test_pack(self):
+        '''packed points unpack to the same values'''
+        xs, ys = unpack_points(pack_points(np.array([0.5, 1.5]), np.array([-1.0, 2.0])))
+        self.assertEqual(xs.tolist(), [0.5, 1.5])
+        self.assertEqual(ys.tolist(), [-1.0, 2.0])
+
+    def test_decimate(self):
+        '''each column keeps its lowest and highest point, in order'''
+        xs = np.array([0.0, 0.1, 0.2, 0.3, 1.0, 1.5, 2.2])
+        ys = np.array([5.0, 1.0, 9.0, 3.0, 4.0, 4.0, 7.0])
+        self.assertEqual(decimate(xs, ys, 1.0).tolist(), [1, 2, 4, 5, 6])
+        self.assertEqual(decimate(xs, ys, None).tolist(), list(range(7)))
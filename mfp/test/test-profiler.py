@@ -0,0 +1,71 @@
+"""
+test-profiler -- per-object trigger timing
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log, builtins, profiler
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.processor import Processor
+from mfp.scope import NaiveScope
+
+
+class ProfilerTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+
+    def tearDown(self):
+        profiler.disable()
+
+    async def test_off(self):
+        '''with profiling off the send methods are untouched'''
+        activate = Processor._send__activate
+        send_sync = Processor._send__sync
+        MFPApp().profile(True)
+        self.assertTrue(profiler.is_enabled())
+        self.assertIsNot(Processor._send__activate, activate)
+        self.assertFalse(MFPApp().profile())
+        self.assertIs(Processor._send__activate, activate)
+        self.assertIs(Processor._send__sync, send_sync)
+
+        obj = await MFPApp().create("+", "1", self.patch, None, "plus")
+        await obj.send(1)
+        self.assertIsNone(obj.profile)
+
+    async def test_profile(self):
+        '''triggers are counted and timed per object'''
+        MFPApp().profile(True)
+        plus = await MFPApp().create("+", "1", self.patch, None, "plus")
+        var = await MFPApp().create("var", None, self.patch, None, "var")
+        for value in range(5):
+            await plus.send(value)
+        await var.send(1)
+
+        # cold inlets don't count as triggers
+        await plus.send(2, inlet=1)
+
+        self.assertEqual(plus.profile.count, 5)
+        self.assertEqual(sum(plus.profile.histogram), 5)
+        self.assertLessEqual(plus.profile.max_ns, plus.profile.total_ns)
+        self.assertEqual(var.profile.count, 1)
+        self.assertIn('profile', plus.tooltip_info())
+
+        report = MFPApp().profile_report(sort_key="count")
+        self.assertTrue(report['enabled'])
+        self.assertEqual([row['name'] for row in report['objects'][:2]], ["plus", "var"])
+        totals = report['patches'][self.patch.obj_id]
+        self.assertEqual(totals['name'], 'default')
+        self.assertGreaterEqual(totals['count'], 6)
+
+        MFPApp().profile_report(reset=True)
+        self.assertIsNone(plus.profile)
+        self.assertNotIn('profile', plus.tooltip_info())
@@ -0,0 +1,104 @@
+"""
+test-replay -- cursor-driven playback of recorded events
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+
+from mfp import log, builtins
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.scope import NaiveScope
+from mfp.timer import MultiTimer
+
+
+class ReplayTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+        self.played = []
+
+    async def replay(self, args=None):
+        obj = await MFPApp().create("replay", args, self.patch, None, "replay")
+
+        async def send(tick, inlet=0):
+            self.played.append(tick.payload)
+        obj.send = send
+        return obj
+
+    async def record(self, obj, events):
+        obj.record()
+        start = obj.recording_start
+        for offset, payload in events:
+            obj.recording_start = MultiTimer.now() - offset
+            obj.inlets[0] = payload
+            await obj.trigger()
+        obj.recording_start = start
+
+    async def wait_played(self, count, timeout=2.0):
+        # poll rather than sleep a fixed time, so a slow event loop
+        # can't let extra events through or cut the wait short
+        deadline = asyncio.get_event_loop().time() + timeout
+        while len(self.played) < count:
+            if asyncio.get_event_loop().time() > deadline:
+                self.fail(f"only {len(self.played)} of {count} events played")
+            await asyncio.sleep(0.001)
+
+    async def test_play(self):
+        '''events play in offset order from one pending timer item'''
+        obj = await self.replay()
+        await self.record(obj, [(0.02, "b"), (0.01, "a"), (0.03, "c")])
+        self.assertEqual(obj.offsets, sorted(obj.offsets))
+
+        obj.play()
+        self.assertEqual(len(obj._timer.scheduled), 1)
+        await self.wait_played(3)
+        self.assertEqual(self.played, ["a", "b", "c"])
+        self.assertIsNone(obj.play_id)
+
+    async def test_stop(self):
+        '''stopping cancels the single pending item'''
+        obj = await self.replay()
+        await self.record(obj, [(0.01 * i, i) for i in range(1, 100)])
+        obj.play()
+        await asyncio.sleep(0.025)
+        obj.play_stop()
+        played = len(self.played)
+        await asyncio.sleep(0.03)
+        self.assertEqual(len(self.played), played)
+        self.assertEqual(obj._timer.scheduled, {})
+
+    async def test_loop(self):
+        '''looping wraps the cursor back to the start'''
+        obj = await self.replay()
+        await self.record(obj, [(0.0, "a"), (0.01, "b")])
+        obj.loop_length = 0.03
+
+        # stop from inside the callback that plays the sixth event
+        async def send(tick, inlet=0):
+            self.played.append(tick.payload)
+            if len(self.played) == 6:
+                obj.play_stop()
+        obj.send = send
+
+        obj.loop()
+        await self.wait_played(6)
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.played, ["a", "b", "a", "b", "a", "b"])
+        self.assertEqual(obj._timer.scheduled, {})
+
+    async def test_lookahead(self):
+        '''events within the lookahead go out with the first'''
+        obj = await self.replay("lookahead=20")
+        await self.record(obj, [(0.01, "a"), (0.015, "b"), (0.2, "c")])
+        obj.play()
+        await self.wait_played(1)
+        self.assertEqual(self.played, ["a", "b"])
+        await self.wait_played(3)
+        self.assertEqual(self.played, ["a", "b", "c"])
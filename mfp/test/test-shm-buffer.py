@@ -0,0 +1,50 @@
+"""
+test-shm-buffer -- numpy views of shared memory buffers
+"""
+import os
+from unittest import TestCase
+
+import numpy as np
+from posix_ipc import SharedMemory, O_CREX
+
+from mfp.shm_buffer import SharedBuffer
+
+
+class SharedBufferTests (TestCase):
+    def setUp(self):
+        self.buf_id = f"/mfp_test_buffer_{os.getpid()}"
+        self.shm = SharedMemory(self.buf_id, O_CREX, size=2 * 8 * 4)
+
+    def tearDown(self):
+        self.shm.close_fd()
+        self.shm.unlink()
+
+    def test_views(self):
+        '''writes through one mapping show up in another'''
+        writer = SharedBuffer(self.buf_id)
+        reader = SharedBuffer(self.buf_id, readonly=True)
+
+        writer.channel(1, 8)[:] = np.arange(8)
+        self.assertEqual(reader.channel(1, 8, 2, 5).tolist(), [2.0, 3.0, 4.0])
+        self.assertEqual(reader.channels(2, 8)[0].tolist(), [0.0] * 8)
+        self.assertFalse(reader.channel(0, 8).flags.writeable)
+        writer.close()
+        reader.close()
+
+    def test_resize(self):
+        '''a resized segment is remapped on the next view'''
+        buf = SharedBuffer(self.buf_id)
+        self.assertEqual(len(buf.channel(1, 8)), 8)
+
+        os.ftruncate(self.shm.fd, 2 * 4 * 4)
+        self.assertEqual(len(buf.channel(1, 8)), 0)
+        self.assertEqual(len(buf.channel(1, 4)), 4)
+        self.assertEqual(buf.channels(2, 8).shape, (1, 8))
+        buf.close()
+
+    def test_empty(self):
+        '''zero-size channels give empty views'''
+        buf = SharedBuffer(self.buf_id)
+        self.assertEqual(buf.channels(2, 0).shape, (0, 0))
+        self.assertEqual(len(buf.channel(0, 0)), 0)
+        buf.close()
@@ -24,6 +24,13 @@ class LimitedIncr (Processor):
             self.lastval = self.outlets[0]
 
 
+class SyncIncr (LimitedIncr):
+    def trigger(self):
+        if self.inlets[0] < self.limit:
+            self.outlets[0] = self.inlets[0] + 1
+            self.lastval = self.outlets[0]
+
+
 class FanOut (Processor):
     trail = []
 
@@ -82,6 +89,20 @@ class StackDepthTest(IsolatedAsyncioTestCase):
         self.assertEqual(self.var.status, Processor.READY)
         self.assertEqual(self.inc.lastval, 100000)
 
+    async def test_sync_trigger(self):
+        '''test_sync_trigger: synchronous trigger() runs without awaiting'''
+        await self.var.disconnect(0, self.inc, 0)
+        await self.inc.disconnect(0, self.var, 0)
+        self.inc = SyncIncr(self.patch, 100000)
+        await self.var.connect(0, self.inc, 0)
+        await self.inc.connect(0, self.var, 0)
+        self.assertTrue(SyncIncr.sync_trigger)
+        self.assertFalse(LimitedIncr.sync_trigger)
+
+        await self.var.send(0, 0)
+        self.assertEqual(self.inc.lastval, 100000)
+        self.assertEqual(self.inc.count_trigger, 100001)
+
 
 class DepthFirstTest(IsolatedAsyncioTestCase):
     async def asyncSetUp(self):
@@ -107,3 +128,17 @@ class DepthFirstTest(IsolatedAsyncioTestCase):
         '''test_depthfirst: depth-first execution order is preserved'''
         await self.procs[0].send(Bang, 0)
         self.assertEqual(FanOut.trail, [0, 4, 3, 9, 2, 1, 8, 7, 6, 5])
+
+    async def test_plan_invalidated(self):
+        '''test_plan_invalidated: connection changes rebuild the propagation plan'''
+        await self.procs[0].send(Bang, 0)
+        await self.procs[0].disconnect(3, self.procs[4], 0)
+        await self.procs[3].disconnect(0, self.procs[9], 0)
+        FanOut.trail = []
+        await self.procs[0].send(Bang, 0)
+        self.assertEqual(FanOut.trail, [0, 3, 2, 1, 8, 7, 6, 5])
+
+        self.procs[0].outlet_order = [0, 1, 2, 3]
+        FanOut.trail = []
+        await self.procs[0].send(Bang, 0)
+        self.assertEqual(FanOut.trail, [0, 1, 8, 7, 6, 5, 2, 3])
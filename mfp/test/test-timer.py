@@ -0,0 +1,193 @@
+"""
+test-timer -- MultiTimer scheduling and cancellation
+"""
+import asyncio
+import threading
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from mfp import log, builtins
+from mfp.bang import Bang
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.scope import NaiveScope
+from mfp.timer import Clock, MultiTimer
+
+
+class MultiTimerTests (IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.timer = MultiTimer()
+        self.fired = []
+
+    def cb(self, tag):
+        self.fired.append(tag)
+
+    async def test_order(self):
+        '''items fire in deadline order, not schedule order'''
+        now = MultiTimer.now()
+        self.timer.schedule(now + 0.03, self.cb, ["c"])
+        self.timer.schedule(now + 0.01, self.cb, ["a"])
+        self.timer.schedule(now + 0.02, self.cb, ["b"])
+        await asyncio.sleep(0.06)
+        self.assertEqual(self.fired, ["a", "b", "c"])
+        self.assertEqual(self.timer.scheduled, {})
+
+    async def test_cancel(self):
+        '''cancelled items never fire'''
+        now = MultiTimer.now()
+        keep = self.timer.schedule(now + 0.01, self.cb, ["keep"])
+        drop = self.timer.schedule(now + 0.005, self.cb, ["drop"])
+        self.timer.cancel(drop)
+        await asyncio.sleep(0.03)
+        self.assertEqual(self.fired, ["keep"])
+        self.assertNotIn(keep, self.timer.scheduled)
+
+    async def test_shared_deadline(self):
+        '''items with the same deadline fire together, in schedule order'''
+        deadline = MultiTimer.now() + 0.01
+        for i in range(100):
+            self.timer.schedule(deadline, self.cb, [i])
+        await asyncio.sleep(0.03)
+        self.assertEqual(self.fired, list(range(100)))
+
+    async def test_async_callback(self):
+        '''awaitable callbacks are run to completion'''
+        async def acb(tag):
+            await asyncio.sleep(0)
+            self.fired.append(tag)
+
+        self.timer.schedule(MultiTimer.now(), acb, ["x"])
+        await asyncio.sleep(0.01)
+        self.assertEqual(self.fired, ["x"])
+
+    async def test_stats(self):
+        '''late-by times are recorded for each fired item'''
+        now = MultiTimer.now()
+        for i in range(10):
+            self.timer.schedule(now + 0.001 * i, self.cb, [i])
+        await asyncio.sleep(0.03)
+        summary = self.timer.stats.summary()
+        self.assertEqual(summary['count'], 10)
+        self.assertGreaterEqual(summary['p50_ms'], 0)
+        self.assertLessEqual(summary['p50_ms'], summary['max_ms'])
+        self.assertEqual(sum(summary['histogram'].values()), 10)
+        self.assertIn(self.timer.name, MultiTimer.jitter_report())
+
+    async def test_slow_callback(self):
+        '''a slow async callback doesn't hold up later items'''
+        async def slow(tag):
+            await asyncio.sleep(0.05)
+            self.fired.append(tag)
+
+        now = MultiTimer.now()
+        self.timer.schedule(now, slow, ["slow"])
+        self.timer.schedule(now + 0.005, self.cb, ["fast"])
+        await asyncio.sleep(0.02)
+        self.assertEqual(self.fired, ["fast"])
+        await asyncio.sleep(0.05)
+        self.assertEqual(self.fired, ["fast", "slow"])
+
+    async def test_cancel_in_batch(self):
+        '''an item cancelled by an earlier one in the same batch doesn't fire'''
+        deadline = MultiTimer.now() + 0.005
+        ids = {}
+
+        def stop(tag):
+            self.fired.append(tag)
+            self.timer.cancel(ids["second"])
+
+        self.timer.schedule(deadline, stop, ["first"])
+        ids["second"] = self.timer.schedule(deadline, self.cb, ["second"])
+        await asyncio.sleep(0.03)
+        self.assertEqual(self.fired, ["first"])
+        self.assertEqual(self.timer.firing, set())
+        self.assertEqual(self.timer.stats.count, 1)
+
+
+    async def test_workers(self):
+        '''callbacks run in a bounded set of reused worker tasks'''
+        async def acb(tag):
+            self.fired.append(tag)
+
+        for batch in range(3):
+            deadline = MultiTimer.now() + 0.005
+            for i in range(50):
+                self.timer.schedule(deadline, acb, [i])
+            await asyncio.sleep(0.02)
+            if batch == 0:
+                workers = set(self.timer.workers)
+            self.assertEqual(self.timer.workers, workers)
+
+        self.assertEqual(self.fired, list(range(50)) * 3)
+        self.assertLessEqual(len(workers), MultiTimer.MAX_WORKERS)
+
+class LookaheadTests (IsolatedAsyncioTestCase):
+    '''
+    metro and beatchase in lookahead mode, driven by a fake clock. The
+    timer deadlines are far enough off that the real driver never fires
+    during a test; ticks are delivered by calling timer_cb()
+    '''
+    async def asyncSetUp(self):
+        MFPApp().no_gui = True
+        MFPApp().no_dsp = True
+        MFPApp().samplerate = 44100
+        log.log_quiet = True
+        log.log_thread = threading.get_ident()
+        log.log_loop = asyncio.get_event_loop()
+        await MFPApp().setup()
+        builtins.register()
+        self.patch = Patch('default', '', None, NaiveScope(), 'default')
+
+        self.clock = 1000.0
+        clock_patch = patch.object(Clock, "now", staticmethod(lambda: self.clock))
+        clock_patch.start()
+        self.addCleanup(clock_patch.stop)
+
+    async def create(self, init_type, init_args):
+        obj = await MFPApp().create(init_type, init_args, self.patch, None, init_type)
+        self.stamp = await MFPApp().create("var", None, self.patch, None, "stamp")
+        await obj.connect(1, self.stamp, 0)
+        return obj
+
+    def pending_deadline(self, obj):
+        return obj._timer.scheduled[obj.pending][0]
+
+    async def test_metro(self):
+        '''each tick fires lookahead early and reports the tick's timestamp'''
+        metro = await self.create("metro", "1000, lookahead=100")
+        start = self.clock
+        await metro.send(True)
+        self.assertEqual(self.stamp.value, Clock.timestamp(start))
+        self.assertEqual(metro.tick_time, start + 1.0)
+        self.assertAlmostEqual(self.pending_deadline(metro), start + 0.9)
+
+        # the timer fires at the early deadline, 10ms late
+        self.clock = start + 0.91
+        await metro.timer_cb()
+        self.assertEqual(self.stamp.value, Clock.timestamp(start + 1.0))
+        self.assertEqual(metro.tick_time, start + 2.0)
+        self.assertAlmostEqual(self.pending_deadline(metro), start + 1.9)
+
+        await metro.send(False)
+        self.assertIsNone(metro.pending)
+
+    async def test_beatchase(self):
+        '''chased beats fire lookahead early and report the beat's timestamp'''
+        chase = await self.create("beatchase", "1, lookahead=100")
+        start = self.clock
+        await chase.send(True)
+        await chase.send(Bang)
+        self.clock = start + 0.5
+        await chase.send(Bang)
+        self.assertEqual(self.stamp.value, Clock.timestamp(start + 0.5))
+        self.assertAlmostEqual(chase.tick_time, start + 1.0)
+        self.assertAlmostEqual(self.pending_deadline(chase), start + 0.9)
+
+        self.clock = start + 0.9
+        await chase.timer_cb()
+        self.assertEqual(self.stamp.value, Clock.timestamp(start + 1.0))
+        self.assertAlmostEqual(chase.tick_time, start + 1.5)
+        self.assertAlmostEqual(self.pending_deadline(chase), start + 1.4)
+
+        await chase.send(False)
+        self.assertIsNone(chase.pending)
@@ -2,37 +2,274 @@
 '''
 timer.py
 Multi-timer implementation
+
+All scheduled items for a MultiTimer share one driver task that
+sleeps until the earliest deadline in a heap. Deadlines are on the
+monotonic clock (see Clock.now())
 '''
 
 import asyncio
+import heapq
 import inspect
+import time
+import weakref
+from collections import deque
 from datetime import datetime
 
 from mfp import log
 
+
+class Clock:
+    """
+    Clock source for control-rate timing. Times are float seconds
+    on the monotonic clock
+    """
+    @staticmethod
+    def now_ns():
+        return time.monotonic_ns()
+
+    @staticmethod
+    def now():
+        return time.monotonic_ns() / 1e9
+
+    @staticmethod
+    def timestamp(when):
+        """
+        'when' as integer microseconds on CLOCK_MONOTONIC. This is the
+        clock g_get_monotonic_time() reads in mfpdsp, and jack_get_time()
+        with JACK's default system clock, so the DSP side can turn it
+        into a frame with jack_time_to_frames() however late the
+        message carrying it arrives
+        """
+        return round(when * 1e6)
+
+
+class TimerStats:
+    """
+    How late timer callbacks fire relative to their deadline.
+    Keeps a fixed-bucket histogram over all ticks and the most
+    recent samples for percentiles
+    """
+    # upper edges of histogram buckets, milliseconds
+    BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 20, 50, 100, 250, 500)
+
+    def __init__(self, recent=1000):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = [0] * (len(self.BUCKETS) + 1)
+        self.recent = deque(maxlen=recent)
+
+    def record(self, late):
+        late_ms = late * 1000.0
+        self.count += 1
+        self.total += late_ms
+        if late_ms > self.max:
+            self.max = late_ms
+        self.recent.append(late_ms)
+
+        bucket = 0
+        for edge in self.BUCKETS:
+            if late_ms <= edge:
+                break
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def percentile(self, pct):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        index = min(len(ordered) - 1, int(len(ordered) * pct / 100.0))
+        return ordered[index]
+
+    def reset(self):
+        self.__init__(self.recent.maxlen)
+
+    def summary(self):
+        labels = [f"<={e}ms" for e in self.BUCKETS] + [f">{self.BUCKETS[-1]}ms"]
+        return dict(
+            count=self.count,
+            mean_ms=(self.total / self.count) if self.count else None,
+            max_ms=self.max,
+            p50_ms=self.percentile(50),
+            p90_ms=self.percentile(90),
+            p99_ms=self.percentile(99),
+            histogram={
+                label: count for label, count in zip(labels, self.histogram)
+                if count
+            }
+        )
+
+
 class MultiTimer:
-    def __init__(self):
+    # rebuild the heap when stale (cancelled) entries outnumber live
+    # ones by this factor
+    COMPACT_RATIO = 2
+    COMPACT_MIN = 64
+
+    # due callbacks are run by up to this many worker tasks per timer,
+    # so one slow cascade doesn't hold up the other items and firing
+    # an item doesn't create a task
+    MAX_WORKERS = 8
+
+    all_timers = weakref.WeakSet()
+
+    def __init__(self, name=None):
+        self.name = name or f"timer_{id(self):x}"
         self.next_id = 0
         self.scheduled = {}
+        self.heap = []
+        self.task = None
+        self.wakeup = None
+
+        # ids of items that have come due but whose callback hasn't
+        # started yet, so cancel() can still stop them
+        self.firing = set()
 
-    async def _wait(self, item_id, deadline, callback, data):
-        await asyncio.sleep((deadline - datetime.now()).total_seconds())
-        cb = callback(*data)
-        if inspect.isawaitable(cb):
-            await cb
-        del self.scheduled[item_id]
+        # due items waiting for a worker, and the workers (which wait
+        # on the queue between items) for the current event loop
+        self.queue = None
+        self.workers = set()
+        self.idle = 0
+        self.stats = TimerStats()
+        MultiTimer.all_timers.add(self)
+
+    @staticmethod
+    def now():
+        return Clock.now()
+
+    @classmethod
+    def jitter_report(cls):
+        """
+        Late-by statistics of all live timers, by name
+        """
+        return {
+            t.name: t.stats.summary()
+            for t in sorted(cls.all_timers, key=lambda t: t.name)
+        }
+
+    @classmethod
+    def deadline_from(cls, deadline):
+        """
+        Convert a deadline to monotonic clock seconds. A datetime
+        is taken as wall-clock time and converted relative to now
+        """
+        if isinstance(deadline, datetime):
+            return cls.now() + (deadline - datetime.now()).total_seconds()
+        return deadline
+
+    def _ensure_driver(self, wake):
+        loop = asyncio.get_running_loop()
+        if self.task is None or self.task.done() or self.task.get_loop() is not loop:
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+        elif wake:
+            self.wakeup.set()
+
+    def _pop_stale(self):
+        while self.heap and self.heap[0][1] not in self.scheduled:
+            heapq.heappop(self.heap)
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                self._pop_stale()
+                if not self.heap:
+                    break
+
+                delay = self.heap[0][0] - self.now()
+                if delay > 0:
+                    self.wakeup.clear()
+                    handle = loop.call_later(delay, self.wakeup.set)
+                    try:
+                        await self.wakeup.wait()
+                    finally:
+                        handle.cancel()
+                    continue
+
+                # collect everything that is due and fire as a batch
+                now = self.now()
+                due = []
+                while self.heap and self.heap[0][0] <= now:
+                    _, item_id = heapq.heappop(self.heap)
+                    item = self.scheduled.pop(item_id, None)
+                    if item is not None:
+                        due.append((item_id, item))
+                        self.firing.add(item_id)
+
+                # workers start items in order, and each checks that
+                # it wasn't cancelled by an earlier one
+                for item_id, (deadline, callback, data) in due:
+                    self._dispatch((item_id, deadline, callback, data))
+
+                # let other tasks run even if deadlines are already past
+                await asyncio.sleep(0)
+        finally:
+            if self.task is asyncio.current_task():
+                self.task = None
+
+    def _dispatch(self, item):
+        loop = asyncio.get_running_loop()
+        if self.queue is None or self.queue_loop is not loop:
+            self.queue = asyncio.Queue()
+            self.queue_loop = loop
+            self.workers = set()
+            self.idle = 0
+
+        self.queue.put_nowait(item)
+        if self.queue.qsize() > self.idle and len(self.workers) < self.MAX_WORKERS:
+            self.idle += 1
+            task = asyncio.create_task(self._work(self.queue))
+            self.workers.add(task)
+            task.add_done_callback(self.workers.discard)
+
+    async def _work(self, queue):
+        while True:
+            item = await queue.get()
+            self.idle -= 1
+            try:
+                await self._fire(*item)
+            finally:
+                self.idle += 1
+
+    async def _fire(self, item_id, deadline, callback, data):
+        if item_id not in self.firing:
+            # cancelled after it came due
+            return
+        self.firing.discard(item_id)
+        self.stats.record(self.now() - deadline)
+        try:
+            cb = callback(*data)
+            if inspect.isawaitable(cb):
+                await cb
+        except Exception as e:
+            log.error(f"[timer] Exception in timer callback {callback}: {e}")
+            log.debug_traceback(e)
 
     def schedule(self, deadline, callback, data=[]):
         item_id = self.next_id
         self.next_id += 1
-        task = asyncio.create_task(
-            self._wait(item_id, deadline, callback, data)
-        )
-        self.scheduled[item_id] = (deadline, task, item_id)
+        deadline = self.deadline_from(deadline)
+
+        self.scheduled[item_id] = (deadline, callback, data)
+        heapq.heappush(self.heap, (deadline, item_id))
+
+        # the driver only needs to recompute its sleep if this is
+        # now the earliest deadline
+        self._ensure_driver(self.heap[0][1] == item_id)
         return item_id
 
     def cancel(self, item_id):
-        if item_id in self.scheduled:
-            old_task = self.scheduled[item_id]
-            del self.scheduled[item_id]
-            old_task.cancel()
+        if self.scheduled.pop(item_id, None) is None:
+            self.firing.discard(item_id)
+            return
+
+        # cancelled entries stay in the heap and are skipped when
+        # they come to the top; compact if too many pile up
+        if (
+            len(self.heap) > self.COMPACT_MIN
+            and len(self.heap) > self.COMPACT_RATIO * len(self.scheduled)
+        ):
+            self.heap = [e for e in self.heap if e[1] in self.scheduled]
+            heapq.heapify(self.heap)
@@ -0,0 +1,244 @@
+#! /usr/bin/env python
+'''
+benchmark.py
+Control-rate message throughput benchmarks
+
+Builds patches headless (no GUI, no DSP) and drives them through
+Processor.send. Run with:
+
+    python -m mfp.tools.benchmark [topology ...] [-o results.json]
+
+Results saved with -o can be given to a later run with -c to
+compare throughput across versions.
+'''
+
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import sys
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+from mfp import builtins, log
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.scope import NaiveScope
+
+
+async def mkproc(patch, init_type, init_args=None):
+    return await MFPApp().create(init_type, init_args, patch, None, init_type)
+
+
+async def build_chain(patch, size):
+    '''[+ 1] -> [+ 1] -> ... size objects long'''
+    procs = [await mkproc(patch, "+", "1") for _ in range(size)]
+    for src, dst in zip(procs, procs[1:]):
+        await src.connect(0, dst, 0)
+    return procs[0], [0], size
+
+
+async def build_fanout(patch, size):
+    '''one [+ 0] with size [+ 1] connected to its outlet'''
+    head = await mkproc(patch, "+", "0")
+    for _ in range(size):
+        await head.connect(0, await mkproc(patch, "+", "1"), 0)
+    return head, [0], size + 1
+
+
+async def build_loop(patch, size):
+    '''[+ 1] and [<: size] feeding back into each other'''
+    incr = await mkproc(patch, "+", "1")
+    cmp = await mkproc(patch, "<:", str(size))
+    await incr.connect(0, cmp, 0)
+    await cmp.connect(0, incr, 0)
+    return incr, [0], 2 * size
+
+
+async def build_route(patch, size):
+    '''[route 0, 1, ...] with a [var] on each outlet, cycling addresses'''
+    head = await mkproc(patch, "route", ", ".join(str(n) for n in range(size)))
+    for outlet in range(size):
+        await head.connect(outlet, await mkproc(patch, "var"), 0)
+    return head, [[n, 1] for n in range(size)], 2
+
+
+async def build_pack(patch, size):
+    '''[unpack size] with every item outlet wired to [pack size]'''
+    unpack = await mkproc(patch, "unpack", str(size))
+    pack = await mkproc(patch, "pack", str(size))
+    for n in range(size):
+        await unpack.connect(n, pack, n)
+    return unpack, [list(range(size))], size + 1
+
+
+async def build_var(patch, size):
+    '''[var] -> [var] -> ... size objects long'''
+    procs = [await mkproc(patch, "var", "0") for _ in range(size)]
+    for src, dst in zip(procs, procs[1:]):
+        await src.connect(0, dst, 0)
+    return procs[0], [1, 2], size
+
+
+async def build_bus(patch, size):
+    '''[send bench] into a bus with size [recv bench] listening'''
+    send = await mkproc(patch, "send", "'bench'")
+    await send.onload(0)
+    for _ in range(size):
+        recv = await mkproc(patch, "recv", "'bench'")
+        await recv.onload(1)
+    return send, [0], size + 2
+
+
+async def build_autowrap(patch, size):
+    '''chain of size autowrapped Python functions'''
+    from mfp.builtins.pyfunc import PyAutoWrap
+
+    # not a registered name, so create() wraps the function itself
+    procs = [
+        await MFPApp().create("lambda x: x + 1", None, patch, None, f"autowrap_{num}")
+        for num in range(size)
+    ]
+    if not all(isinstance(proc, PyAutoWrap) for proc in procs):
+        raise RuntimeError("autowrap benchmark objects are not PyAutoWrap")
+    for src, dst in zip(procs, procs[1:]):
+        await src.connect(0, dst, 0)
+    return procs[0], [1], size
+
+
+TOPOLOGIES = dict(
+    chain=build_chain,
+    fanout=build_fanout,
+    loop=build_loop,
+    route=build_route,
+    pack=build_pack,
+    var=build_var,
+    bus=build_bus,
+    autowrap=build_autowrap,
+)
+
+
+def percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100.0))]
+
+
+async def run_topology(patch, name, size, seconds, alloc_sends):
+    head, values, hops = await TOPOLOGIES[name](patch, size)
+    values = itertools.cycle(values)
+
+    # warm up caches and propagation plans
+    await head.send(next(values))
+
+    durations = []
+    start = time.perf_counter()
+    elapsed = 0
+    while elapsed < seconds:
+        before = time.perf_counter()
+        await head.send(next(values))
+        after = time.perf_counter()
+        durations.append(after - before)
+        elapsed = after - start
+
+    # allocations are measured separately since tracing is slow
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for _ in range(alloc_sends):
+        await head.send(next(values))
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    per_hop = sorted(d * 1e6 / hops for d in durations)
+    return dict(
+        topology=name,
+        size=size,
+        hops_per_send=hops,
+        sends=len(durations),
+        seconds=elapsed,
+        msgs_per_sec=len(durations) * hops / elapsed,
+        hop_us_p50=percentile(per_hop, 50),
+        hop_us_p90=percentile(per_hop, 90),
+        hop_us_p99=percentile(per_hop, 99),
+        alloc_peak_bytes=peak - base,
+        alloc_retained_bytes=current - base,
+    )
+
+
+async def setup_app():
+    MFPApp().no_gui = True
+    MFPApp().no_dsp = True
+    log.log_quiet = True
+    log.log_thread = threading.get_ident()
+    log.log_loop = asyncio.get_event_loop()
+    await MFPApp().setup()
+    builtins.register()
+
+
+def run_info(args):
+    from mfp.mfp_main import version
+    return dict(
+        mfp_version=version(),
+        python=sys.version.split()[0],
+        platform=platform.platform(),
+        timestamp=datetime.now().isoformat(),
+        size=args.size,
+        seconds=args.seconds,
+    )
+
+
+def load_baseline(filename):
+    with open(filename) as infile:
+        saved = json.load(infile)
+    return {r['topology']: r for r in saved.get('results', [])}
+
+
+async def main(args):
+    baseline = load_baseline(args.compare) if args.compare else {}
+
+    await setup_app()
+    results = []
+    for name in args.topology or TOPOLOGIES:
+        patch = Patch(name, '', None, NaiveScope(), name)
+        result = await run_topology(
+            patch, name, args.size, args.seconds, args.alloc_sends
+        )
+        results.append(result)
+
+        line = "%-10s %12.0f msgs/sec  hop p50 %7.2fus  p99 %7.2fus  peak %8d bytes" % (
+            name, result['msgs_per_sec'], result['hop_us_p50'],
+            result['hop_us_p99'], result['alloc_peak_bytes']
+        )
+        if name in baseline:
+            line += "  (%+.1f%%)" % (
+                100.0 * (result['msgs_per_sec'] / baseline[name]['msgs_per_sec'] - 1)
+            )
+        print(line)
+
+    if args.output:
+        with open(args.output, "w") as outfile:
+            json.dump(dict(info=run_info(args), results=results), outfile, indent=2)
+    return results
+
+
+def main_sync_wrapper():
+    parser = argparse.ArgumentParser(description="MFP control-rate benchmarks")
+    parser.add_argument("topology", nargs="*", choices=[[], *TOPOLOGIES],
+                        help="Topologies to run (default: all)")
+    parser.add_argument("-n", "--size", type=int, default=100,
+                        help="Objects (or iterations) per topology")
+    parser.add_argument("-t", "--seconds", type=float, default=2.0,
+                        help="Time to spend on each topology")
+    parser.add_argument("-a", "--alloc-sends", type=int, default=100,
+                        help="Sends to trace when measuring allocations")
+    parser.add_argument("-o", "--output", help="Save results as JSON")
+    parser.add_argument("-c", "--compare", help="Compare to results saved with -o")
+    args = parser.parse_args()
+    asyncio.run(main(args))
+
+
+if __name__ == "__main__":
+    main_sync_wrapper()
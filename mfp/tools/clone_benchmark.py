@@ -0,0 +1,81 @@
+#! /usr/bin/env python
+'''
+clone_benchmark.py
+Time taken by Patch.clonescope to build polyphonic voices
+
+Builds a voice scope of control-rate objects headless (no GUI, no
+DSP) and clones it. Run with:
+
+    python -m mfp.tools.clone_benchmark [-n objects] [-v voices ...]
+'''
+
+import argparse
+import asyncio
+import time
+
+from mfp.mfp_app import MFPApp
+from mfp.patch import Patch
+from mfp.scope import NaiveScope
+from mfp.tools.benchmark import setup_app
+
+
+async def build_voice(patch, scopename, size):
+    '''
+    [var] outside the scope feeding a chain of size [+ 1] inside it,
+    each link also tapped by a [var]
+    '''
+    scope = patch.add_scope(scopename)
+    src = await MFPApp().create("var", None, patch, None, "src")
+    prev = src
+    for num in range(size // 2):
+        add = await MFPApp().create("+", "1", patch, scope, f"add_{num}")
+        tap = await MFPApp().create("var", None, patch, scope, f"tap_{num}")
+        await prev.connect(0, add, 0)
+        await add.connect(0, tap, 0)
+        prev = add
+    return src
+
+
+async def run_clone(size, voices):
+    patch = Patch('clone', '', None, NaiveScope(), 'clone')
+    await build_voice(patch, "voice_001", size)
+
+    start = time.perf_counter()
+    await patch.clonescope("voice_001", voices)
+    elapsed = time.perf_counter() - start
+    await patch.delete()
+
+    return dict(
+        objects=size,
+        voices=voices,
+        seconds=elapsed,
+        ms_per_voice=1000 * elapsed / max(1, voices - 1),
+    )
+
+
+async def main(args):
+    await setup_app()
+    MFPApp().no_onload = True
+    results = []
+    for voices in args.voices:
+        result = await run_clone(args.size, voices)
+        results.append(result)
+        print("%4d objects x %3d voices  %8.3f s  %7.2f ms/voice" % (
+            result['objects'], result['voices'], result['seconds'],
+            result['ms_per_voice']
+        ))
+    return results
+
+
+def main_sync_wrapper():
+    parser = argparse.ArgumentParser(description="MFP clonescope benchmark")
+    parser.add_argument("-n", "--size", type=int, default=40,
+                        help="Objects in the voice scope")
+    parser.add_argument("-v", "--voices", type=int, nargs="+", default=[8, 32, 64],
+                        help="Number of voices to build (including the original)")
+    args = parser.parse_args()
+    asyncio.run(main(args))
+
+
+if __name__ == "__main__":
+    main_sync_wrapper()
@@ -0,0 +1,110 @@
+#! /usr/bin/env python
+'''
+midi_benchmark.py
+Per-event cost of MIDI input decoding and handler dispatch
+
+Feeds synthetic ALSA sequencer events through from_alsaseq() and
+MFPMidiManager.dispatch_event() without opening a sequencer client.
+Run with:
+
+    python -m mfp.tools.midi_benchmark [-n handlers] [-e events]
+'''
+
+import argparse
+import asyncio
+import itertools
+import time
+
+import alsa_midi
+
+from mfp import midi
+
+
+def synthetic_events(count):
+    '''a mix of notes, controllers, pitchbend and clock from 4 sources'''
+    sources = [alsa_midi.Address(20 + n, n % 2) for n in range(4)]
+    makers = [
+        lambda n, src: alsa_midi.NoteOnEvent(
+            note=n % 128, velocity=1 + n % 127, channel=n % 16, source=src),
+        lambda n, src: alsa_midi.NoteOffEvent(
+            note=n % 128, velocity=0, channel=n % 16, source=src),
+        lambda n, src: alsa_midi.ControlChangeEvent(
+            param=n % 128, value=n % 128, channel=n % 16, source=src),
+        lambda n, src: alsa_midi.PitchBendEvent(
+            value=n % 8192, channel=n % 16, source=src),
+        lambda n, src: alsa_midi.ClockEvent(source=src),
+    ]
+    maker = itertools.cycle(makers)
+    return [next(maker)(n, sources[n % len(sources)]) for n in range(count)]
+
+
+def register_handlers(mgr, count, inline):
+    '''handlers spread over channel, event type, port and client filters'''
+    calls = [0]
+
+    def handler(event, data):
+        calls[0] += 1
+
+    async def inline_handler(event, data):
+        calls[0] += 1
+
+    etypes = [midi.NoteOn, midi.Note, midi.MidiCC, midi.MidiPitchbend, midi.MidiClock]
+    for n in range(count):
+        filters = {}
+        kind = n % 4
+        if kind == 0:
+            filters["channel"] = [n % 16]
+        elif kind == 1:
+            filters["etype"] = [etypes[n % len(etypes)]]
+        elif kind == 2:
+            filters["etype"] = [midi.MidiCC]
+            filters["channel"] = [n % 16]
+            filters["port"] = [n % 2]
+        else:
+            filters["unit"] = [20 + n % 4]
+        mgr.register(inline_handler if inline else handler, n, filters, inline=inline)
+    return calls
+
+
+async def run(args):
+    mgr = midi.MFPMidiManager(1, 1)
+    calls = register_handlers(mgr, args.handlers, args.inline)
+    raw_events = synthetic_events(args.events)
+
+    start = time.perf_counter()
+    events = [midi.from_alsaseq(e) for e in raw_events]
+    decode_time = time.perf_counter() - start
+
+    # first pass fills the dispatch index
+    for event in events:
+        await mgr.dispatch_event(event)
+    calls[0] = 0
+
+    start = time.perf_counter()
+    for event in events:
+        await mgr.dispatch_event(event)
+    dispatch_time = time.perf_counter() - start
+
+    print("%d events, %d handlers%s" % (
+        len(events), args.handlers, " (inline)" if args.inline else ""
+    ))
+    print("  decode:   %8.2f us/event" % (decode_time * 1e6 / len(events)))
+    print("  dispatch: %8.2f us/event, %.1f handler calls/event" % (
+        dispatch_time * 1e6 / len(events), calls[0] / len(events)
+    ))
+
+
+def main_sync_wrapper():
+    parser = argparse.ArgumentParser(description="MFP MIDI input benchmark")
+    parser.add_argument("-n", "--handlers", type=int, default=64,
+                        help="Number of registered handlers")
+    parser.add_argument("-e", "--events", type=int, default=50000,
+                        help="Number of synthetic events")
+    parser.add_argument("-i", "--inline", action="store_true",
+                        help="Register handlers for inline delivery")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main_sync_wrapper()
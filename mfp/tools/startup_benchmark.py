@@ -0,0 +1,139 @@
+#! /usr/bin/env python
+'''
+startup_benchmark.py
+Cold-start time from launch to the first patch being open
+
+Each measurement runs in a fresh interpreter. Import times come from
+python -X importtime, and the startup phases (setup, builtin
+registration, opening a patch, creating its first objects) from
+MFPApp().startup_report() in a headless (no GUI, no DSP) app. Run with:
+
+    python -m mfp.tools.startup_benchmark [-n top] [-p patchfile]
+'''
+
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+
+IMPORTTIME_RE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+# a few of the most common object types, to see what they cost to load
+FIRST_OBJECTS = [
+    ("+", "1"), ("var", None), ("message", "1"), ("print", None),
+    ("inlet", None), ("outlet", None),
+]
+
+
+def import_times(module):
+    '''
+    (name, self_us, cumulative_us, depth) for each module imported
+    by 'import module' in a fresh interpreter
+    '''
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True
+    )
+    modules = []
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME_RE.match(line)
+        if match:
+            self_us, cumul_us, indent, name = match.groups()
+            modules.append((name, int(self_us), int(cumul_us), len(indent) // 2))
+    return modules
+
+
+async def child_main(patchfile):
+    import os
+    import threading
+    from mfp import builtins, log
+    from mfp.mfp_app import MFPApp
+
+    app = MFPApp()
+    app.no_gui = True
+    app.no_dsp = True
+    app.no_onload = True
+    app.searchpath = os.getcwd()
+    log.log_quiet = True
+    log.log_thread = threading.get_ident()
+    log.log_loop = asyncio.get_event_loop()
+
+    start = time.monotonic()
+    await app.setup()
+    app.add_startup_timing('setup', start)
+
+    start = time.monotonic()
+    builtins.register()
+    app.add_startup_timing('init', start)
+
+    start = time.monotonic()
+    patch = await app.open_file(patchfile, show_gui=False)
+    app.add_startup_timing('open', start)
+
+    start = time.monotonic()
+    for init_type, init_args in FIRST_OBJECTS:
+        await app.create(init_type, init_args, patch, None, init_type)
+    app.add_startup_timing('first_objects', start)
+
+    print(json.dumps(app.startup_report()))
+    await app.finish()
+
+
+def run_child(patchfile):
+    cmd = [sys.executable, "-m", "mfp.tools.startup_benchmark", "--child"]
+    if patchfile:
+        cmd += ["-p", patchfile]
+    start = time.monotonic()
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    elapsed = time.monotonic() - start
+    for line in reversed(proc.stdout.splitlines()):
+        if line.startswith("{"):
+            report = json.loads(line)
+            report['wall_ms'] = round(elapsed * 1000, 2)
+            return report
+    print(proc.stderr, file=sys.stderr)
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="MFP startup benchmark")
+    parser.add_argument("-n", "--top", type=int, default=15,
+                        help="Number of slowest imports to show")
+    parser.add_argument("-p", "--patchfile", default=None,
+                        help="Patch file to open (default: an empty patch)")
+    parser.add_argument("-m", "--module", default="mfp.mfp_main",
+                        help="Module whose import time to break down")
+    parser.add_argument("--child", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child_main(args.patchfile))
+        return
+
+    modules = import_times(args.module)
+    total = max((cumul for _, _, cumul, _ in modules), default=0)
+    print("import %s: %.1fms, %d modules" % (args.module, total / 1000, len(modules)))
+    print("  %-48s %10s %10s" % ("slowest imports", "self ms", "cumul ms"))
+    for name, self_us, cumul_us, _ in sorted(
+        modules, key=lambda m: m[1], reverse=True
+    )[:args.top]:
+        print("  %-48s %10.1f %10.1f" % (name, self_us / 1000, cumul_us / 1000))
+
+    report = run_child(args.patchfile)
+    if report is None:
+        print("startup run failed")
+        return
+    print("startup to first patch: %.1fms wall clock" % report['wall_ms'])
+    for phase, ms in report['phases'].items():
+        print("  %-20s %8.1fms" % (phase, ms))
+    print("  builtin modules loaded: %s" % ", ".join(
+        "%s %.1fms" % item for item in report['builtins'].items()
+    ))
+
+
+if __name__ == "__main__":
+    main()
@@ -433,6 +433,58 @@ class AsyncTaskManager:
         for task in pending:
             task.cancel()
 
+
+class FlushScheduler:
+    """
+    Run the coroutine function flush() in a task, no more than one at
+    a time. delay() gives the seconds to wait before flushing, or 0
+    to flush on the next pass of the event loop; a flush requested
+    while one is running is scheduled when it finishes
+    """
+    def __init__(self, flush, delay):
+        self.flush = flush
+        self.delay = delay
+        self.handle = None
+        self.task = None
+        self.again = False
+
+    def schedule(self, loop=None):
+        if self.task is not None:
+            self.again = True
+            return
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+        delay = self.delay()
+        handle = self.handle
+        if delay <= 0:
+            # replace a timer with a flush on the next pass
+            if handle is None or isinstance(handle, asyncio.TimerHandle):
+                if handle is not None:
+                    handle.cancel()
+                self.handle = loop.call_soon(self._start)
+        elif handle is None:
+            self.handle = loop.call_later(delay, self._start)
+
+    def _start(self):
+        from .mfp_app import MFPApp
+        self.handle = None
+        if self.task is not None:
+            return
+        if MFPApp._singleton is not None and MFPApp().async_task is not None:
+            self.task = MFPApp().async_task(self._run())
+        else:
+            self.task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            await self.flush()
+        finally:
+            self.task = None
+            if self.again:
+                self.again = False
+                self.schedule()
+
 class AsyncExecMonitor:
     '''
     AsyncExecMonitor -- launch a process which will connect back to this process
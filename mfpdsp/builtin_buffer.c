@@ -709,9 +709,17 @@ shared_buffer_alloc(buf_info * buf)
         munmap(buf->buf_ptr, buf->buf_size);
         buf->buf_ptr = NULL;
     }
-    int tval = ftruncate(buf->shm_fd, size);
-    if (tval < 0) {
-        mfp_log_warning("[alloc] ftruncate error '%s'", strerror(errno));
+    /*
+     * an existing segment (buf_id given by the caller) may be mapped
+     * by other processes, and shrinking it under them is a SIGBUS on
+     * their next read. Only ever grow it; new segments get a new name
+     */
+    struct stat shm_stat;
+    if ((fstat(buf->shm_fd, &shm_stat) < 0) || (shm_stat.st_size < size)) {
+        int tval = ftruncate(buf->shm_fd, size);
+        if (tval < 0) {
+            mfp_log_warning("[alloc] ftruncate error '%s'", strerror(errno));
+        }
     }
     buf->buf_size = size;
     buf->buf_ptr = mmap(NULL, size, PROT_READ|PROT_WRITE, MAP_SHARED, buf->shm_fd, 0);
@@ -3,7 +3,9 @@
 #include <stdio.h>
 #include <string.h>
 #include <glib.h>
+#include <glib/gstdio.h>
 #include <pthread.h>
+#include <unistd.h>
 
 /* HACK -- force some definitions before including any Faust code */
 #define LIBFAUSTCOMMON_C_H
@@ -27,8 +29,32 @@ LIBFAUST_API char* CprintSignal(Signal sig, bool shared, int max_size);
 
 pthread_mutex_t faust_compile_mutex = PTHREAD_MUTEX_INITIALIZER;
 
+/*
+ * compiled factories, shared by every faust~ with the same code.
+ * Keyed by a hash of the code and compiler settings, and also
+ * written to disk under the same key so a restart can skip the
+ * compile. The table has its own mutex, held only briefly, so
+ * releasing a factory in process() never waits on a compile
+ */
+typedef struct {
+    char * key;
+    llvm_dsp_factory * factory;
+    int refcount;
+} faust_factory_entry;
+
+static GHashTable * faust_factories = NULL;
+pthread_mutex_t faust_factory_mutex = PTHREAD_MUTEX_INITIALIZER;
+
+#define FAUST_OPT_LEVEL -1
+#define FAUST_TARGET ""
+
+#define FACTORY_COMPILED 0
+#define FACTORY_SHARED 1
+#define FACTORY_DISK 2
+
 typedef struct {
     char * faust_code;
+    char * faust_factory_key;
     llvm_dsp_factory * faust_factory;
     llvm_dsp * faust_dsp;
     FAUSTFLOAT ** faust_inbufs;
@@ -41,6 +67,7 @@ typedef struct {
 
     pthread_t compile_thread;
     int compile_thread_finished;
+    char * next_faust_factory_key;
     llvm_dsp_factory * next_faust_factory;
     llvm_dsp * next_faust_dsp;
     FAUSTFLOAT ** next_faust_inbufs;
@@ -62,6 +89,137 @@ typedef struct {
 #define RESP_DSP_INLETS 1
 #define RESP_DSP_OUTLETS 2
 #define RESP_COMPILED 3
+#define RESP_FACTORY_CACHE 4
+#define RESP_COMPILE_MS 5
+
+static char *
+faust_factory_key(const char * faust_code)
+{
+    GChecksum * checksum = g_checksum_new(G_CHECKSUM_SHA256);
+    /* FAUST_TARGET "" means the host, so include the host's triple
+     * and CPU: a cache dir shared between machines must not hand
+     * out machine code built for another CPU */
+    char * machine = getCDSPMachineTarget();
+    char * settings = g_strdup_printf(
+        "%s|%d|%s|%s|", getCLibFaustVersion(), FAUST_OPT_LEVEL, FAUST_TARGET,
+        machine ? machine : ""
+    );
+    char * key;
+
+    freeCMemory(machine);
+
+    g_checksum_update(checksum, (const guchar *)settings, -1);
+    g_checksum_update(checksum, (const guchar *)faust_code, -1);
+    key = g_strdup(g_checksum_get_string(checksum));
+
+    g_checksum_free(checksum);
+    g_free(settings);
+    return key;
+}
+
+static char *
+faust_factory_cache_path(const char * key)
+{
+    char * filename = g_strdup_printf("%s.fmc", key);
+    char * path = g_build_filename(g_get_user_cache_dir(), "mfp", "faust", filename, NULL);
+    g_free(filename);
+    return path;
+}
+
+/* get a factory for the code, from the table, the disk cache, or
+ * by compiling it. Call with faust_compile_mutex held, so that
+ * identical code being compiled for two objects is only compiled once */
+static llvm_dsp_factory *
+faust_factory_acquire(const char * key, const char * faust_code, int * cache_status, char * error_msg)
+{
+    faust_factory_entry * entry;
+    llvm_dsp_factory * factory = NULL;
+    char * path;
+
+    pthread_mutex_lock(&faust_factory_mutex);
+    if (faust_factories == NULL) {
+        faust_factories = g_hash_table_new(g_str_hash, g_str_equal);
+    }
+
+    entry = g_hash_table_lookup(faust_factories, key);
+    if (entry != NULL) {
+        entry->refcount++;
+        pthread_mutex_unlock(&faust_factory_mutex);
+        *cache_status = FACTORY_SHARED;
+        return entry->factory;
+    }
+    pthread_mutex_unlock(&faust_factory_mutex);
+
+    path = faust_factory_cache_path(key);
+    if (g_file_test(path, G_FILE_TEST_IS_REGULAR)) {
+        factory = readCDSPFactoryFromMachineFile(path, FAUST_TARGET, error_msg);
+        if (!factory) {
+            mfp_log_debug("[faust~] Could not read cached factory %s: %s\n", path, error_msg);
+        }
+        else {
+            *cache_status = FACTORY_DISK;
+        }
+    }
+
+    if (!factory) {
+        factory = createCDSPFactoryFromString(
+            "mfp_faust", faust_code, 0, NULL, FAUST_TARGET, error_msg, FAUST_OPT_LEVEL
+        );
+        *cache_status = FACTORY_COMPILED;
+
+        if (factory) {
+            /* write then rename, so other DSP processes never see a partial file */
+            char * dirname = g_path_get_dirname(path);
+            char * tmp_path = g_strdup_printf("%s.%d.tmp", path, (int)getpid());
+            g_mkdir_with_parents(dirname, 0755);
+            if (
+                !writeCDSPFactoryToMachineFile(factory, tmp_path, FAUST_TARGET)
+                || g_rename(tmp_path, path) != 0
+            ) {
+                mfp_log_debug("[faust~] Could not write factory cache %s\n", path);
+                g_unlink(tmp_path);
+            }
+            g_free(tmp_path);
+            g_free(dirname);
+        }
+    }
+    g_free(path);
+
+    if (factory) {
+        entry = g_malloc0(sizeof(faust_factory_entry));
+        entry->key = g_strdup(key);
+        entry->factory = factory;
+        entry->refcount = 1;
+        pthread_mutex_lock(&faust_factory_mutex);
+        g_hash_table_insert(faust_factories, entry->key, entry);
+        pthread_mutex_unlock(&faust_factory_mutex);
+    }
+    return factory;
+}
+
+static void
+faust_factory_release(const char * key)
+{
+    faust_factory_entry * entry;
+    faust_factory_entry * unused = NULL;
+
+    pthread_mutex_lock(&faust_factory_mutex);
+    entry = faust_factories ? g_hash_table_lookup(faust_factories, key) : NULL;
+    if (entry != NULL) {
+        entry->refcount--;
+        if (entry->refcount <= 0) {
+            g_hash_table_remove(faust_factories, key);
+            unused = entry;
+        }
+    }
+    pthread_mutex_unlock(&faust_factory_mutex);
+
+    if (unused != NULL) {
+        deleteCDSPFactory(unused->factory);
+        g_free(unused->key);
+        g_free(unused);
+    }
+}
 
 static void
 faust_cleanup_dsp(mfp_processor * proc) {
@@ -72,10 +230,15 @@ faust_cleanup_dsp(mfp_processor * proc) {
     }
 
     if (d->faust_factory) {
-        deleteCDSPFactory(d->faust_factory);
+        faust_factory_release(d->faust_factory_key);
         d->faust_factory = NULL;
     }
 
+    if (d->faust_factory_key) {
+        g_free(d->faust_factory_key);
+        d->faust_factory_key = NULL;
+    }
+
     if (d->faust_buffers) {
         g_free(d->faust_buffers);
         d->faust_buffers = NULL;
@@ -102,6 +265,8 @@ process(mfp_processor * proc)
 
             d->faust_dsp = d->next_faust_dsp;
             d->faust_factory = d->next_faust_factory;
+            d->faust_factory_key = d->next_faust_factory_key;
+            d->next_faust_factory_key = NULL;
             d->faust_inbufs = d->next_faust_inbufs;
             d->faust_outbufs = d->next_faust_outbufs;
             d->faust_buffers = d->next_faust_buffers;
@@ -179,25 +344,13 @@ destroy(mfp_processor * proc)
 {
     builtin_faust_data * d = (builtin_faust_data *)(proc->data);
 
-    if (d->faust_dsp) {
-        deleteCDSPInstance(d->faust_dsp);
-        d->faust_dsp = NULL;
-    }
-
-    if (d->faust_factory) {
-        deleteCDSPFactory(d->faust_factory);
-        d->faust_factory = NULL;
-    }
+    faust_cleanup_dsp(proc);
 
     if (d->faust_code) {
         g_free(d->faust_code);
         d->faust_code = NULL;
     }
 
-    if (d->faust_buffers) {
-        g_free(d->faust_buffers);
-        d->faust_buffers = NULL;
-    }
     if (d->faust_params) {
         g_hash_table_destroy(d->faust_params);
         d->faust_params = NULL;
@@ -322,20 +475,33 @@ faust_config(mfp_processor * proc) {
     FAUSTFLOAT * faust_buffers;
 
     if (d->faust_code && strlen(d->faust_code) >= 2) {
+        char * factory_key = faust_factory_key(d->faust_code);
+        gint64 compile_start;
+        int cache_status = FACTORY_COMPILED;
 
         pthread_mutex_lock(&faust_compile_mutex);
 
-        faust_factory = createCDSPFactoryFromString(
-            "mfp_faust", d->faust_code, 0, NULL, "", error_msg, -1
+        /* time only the lookup or compile, not the wait for other
+         * objects' compiles */
+        compile_start = g_get_monotonic_time();
+
+        faust_factory = faust_factory_acquire(
+            factory_key, d->faust_code, &cache_status, error_msg
         );
 
         if (!faust_factory) {
             mfp_log_debug("[faust~] Compilation error in Faust code\n");
             mfp_log_debug("[faust~] %s\n", error_msg);
             pthread_mutex_unlock(&faust_compile_mutex);
+            g_free(factory_key);
             return -1;
         }
         else {
+            mfp_dsp_send_response_int(proc, RESP_FACTORY_CACHE, cache_status);
+            mfp_dsp_send_response_float(
+                proc, RESP_COMPILE_MS, (g_get_monotonic_time() - compile_start) / 1000.0
+            );
+
             faust_dsp = createCDSPInstance(faust_factory);
             if (!faust_dsp) {
                 mfp_log_debug("[faust~] Cannot create DSP engine\n");
@@ -367,6 +533,7 @@ faust_config(mfp_processor * proc) {
             }
         }
         d->next_faust_factory = faust_factory;
+        d->next_faust_factory_key = factory_key;
         d->next_faust_dsp = faust_dsp;
         d->next_faust_inbufs = faust_inbufs;
         d->next_faust_outbufs = faust_outbufs;
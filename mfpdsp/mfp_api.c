@@ -209,6 +209,23 @@ mfp_api_dsp_response(int proc_id, char * resp, int resp_type, char * msgbuf, int
     return request_id;
 }
 
+int
+mfp_api_dsp_response_batch(const char * records, int reclen, char * msgbuf, int * msglen)
+{
+    const char service_name[] = "MFPCommand.dsp_response_batch";
+    const int instance_id = api_rpcid;
+    mfp_rpc_argblock argblock;
+    mfp_rpc_args * arglist = mfp_rpc_args_init(&argblock);
+
+    mfp_rpc_args_append_bytes(arglist, records, reclen);
+
+    int request_id = mfp_rpc_request(
+        service_name, instance_id, arglist,
+        NULL, NULL, msgbuf, msglen
+    );
+    return request_id;
+}
+
 /* FIXME make mfp_api_close_context nonblocking */
 int
 mfp_api_close_context(mfp_context * context)
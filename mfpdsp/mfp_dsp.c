@@ -286,6 +286,9 @@ mfp_dsp_run(mfp_context * ctxt)
 
     gettimeofday(&start, NULL);
 
+    /* numeric responses from this block go out together at the end */
+    mfp_dsp_response_batch_begin();
+
     /* handle any messages for this context */
     mfp_dsp_handle_requests(ctxt);
 
@@ -313,6 +316,8 @@ mfp_dsp_run(mfp_context * ctxt)
     }
     ctxt->proc_count ++;
 
+    mfp_dsp_response_batch_end();
+
     gettimeofday(&end, NULL);
     mfp_context_update_usage(ctxt, &start, &end);
 }
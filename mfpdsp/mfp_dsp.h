@@ -219,6 +219,17 @@ typedef struct mfp_rpc_argblock_struct {
 #define RESP_JACK_FREEWHEEL 8
 #define RESP_DSP_LOAD 9
 
+/* numeric responses are sent to Python in batches of these.
+ * value_type is PARAMTYPE_FLT, PARAMTYPE_BOOL or PARAMTYPE_INT */
+typedef struct {
+    int32_t obj_id;
+    int16_t resp_type;
+    int16_t value_type;
+    double value;
+} mfp_response_record;
+
+#define MFP_RESPONSE_BATCH_SIZE 256
+
 #define ALLOC_IDLE 0
 #define ALLOC_WORKING 1
 #define ALLOC_READY 2
@@ -295,6 +306,8 @@ extern void mfp_dsp_send_response_bool(mfp_processor * proc, int msg_type, int r
 extern void mfp_dsp_send_response_int(mfp_processor * proc, int msg_type, int response);
 extern void mfp_dsp_send_response_float(mfp_processor * proc, int msg_type, double response);
 extern void mfp_dsp_send_patch_response_float(int obj_id, int msg_type, double response);
+extern void mfp_dsp_response_batch_begin(void);
+extern void mfp_dsp_response_batch_end(void);
 
 extern int mfp_num_input_buffers(mfp_context * ctxt);
 extern int mfp_num_output_buffers(mfp_context * ctxt);
@@ -379,6 +392,7 @@ extern void mfp_rpc_args_append_bool(mfp_rpc_args *, int);
 extern void mfp_rpc_args_append_string(mfp_rpc_args *, const char *);
 extern void mfp_rpc_args_append_int(mfp_rpc_args *, int64_t);
 extern void mfp_rpc_args_append_double(mfp_rpc_args *, double);
+extern void mfp_rpc_args_append_bytes(mfp_rpc_args *, const char *, int);
 
 /* mfp_context.c */
 extern mfp_context * mfp_context_new(int ctype);
@@ -397,6 +411,7 @@ extern int mfp_api_send_midi_to_inlet(mfp_context * ctxt, int port, int64_t val,
 extern int mfp_api_send_midi_to_outlet(mfp_context * ctxt, int port, int64_t val, char *, int *);
 extern int mfp_api_show_editor(mfp_context * ctxt, int show, char *, int *);
 extern int mfp_api_dsp_response(int proc_id, char * resp, int mtype, char * mbuf, int * mlen);
+extern int mfp_api_dsp_response_batch(const char * records, int reclen, char * mbuf, int * mlen);
 extern int mfp_api_exit_notify(mfp_context * context);
 
 extern void _mfp_log(const char * , const char *, int, ...);
@@ -165,13 +165,75 @@ mfp_dsp_handle_requests(mfp_context * context)
     }
 }
 
+/*
+ * Numeric responses are collected in a per-thread batch while a DSP
+ * block is running (between mfp_dsp_response_batch_begin and _end)
+ * and sent as one packed MFPCommand.dsp_response_batch call. Outside
+ * a block each response is sent right away, as a batch of one.
+ */
+static __thread mfp_response_record response_batch[MFP_RESPONSE_BATCH_SIZE];
+static __thread int response_batch_count = 0;
+static __thread int response_batch_open = 0;
+
+static void
+response_batch_flush(void)
+{
+    if (response_batch_count == 0) {
+        return;
+    }
+
+    char * msgbuf = mfp_comm_get_buffer();
+    int msglen = 0;
+
+    mfp_api_dsp_response_batch(
+        (const char *)response_batch,
+        response_batch_count * sizeof(mfp_response_record),
+        msgbuf, &msglen
+    );
+    mfp_comm_submit_buffer(msgbuf, msglen);
+    response_batch_count = 0;
+}
+
+static void
+response_batch_add(int obj_id, int msg_type, int value_type, double value)
+{
+    mfp_response_record * rec = response_batch + response_batch_count;
+
+    rec->obj_id = obj_id;
+    rec->resp_type = msg_type;
+    rec->value_type = value_type;
+    rec->value = value;
+    response_batch_count++;
+
+    if (!response_batch_open || (response_batch_count == MFP_RESPONSE_BATCH_SIZE)) {
+        response_batch_flush();
+    }
+}
+
+void
+mfp_dsp_response_batch_begin(void)
+{
+    response_batch_open = 1;
+}
+
+void
+mfp_dsp_response_batch_end(void)
+{
+    response_batch_flush();
+    response_batch_open = 0;
+}
+
 void
 mfp_dsp_send_response_str(mfp_processor * proc, int msg_type, char * response)
 {
-    char * msgbuf = mfp_comm_get_buffer();
+    char * msgbuf;
     int msglen = 0;
     char tbuf[MFP_MAX_MSGSIZE];
 
+    /* keep responses in order */
+    response_batch_flush();
+
+    msgbuf = mfp_comm_get_buffer();
     snprintf(tbuf, MFP_MAX_MSGSIZE, "\"%s\"", response);
     mfp_api_dsp_response(proc->rpc_id, tbuf, msg_type, msgbuf, &msglen);
     mfp_comm_submit_buffer(msgbuf, msglen);
@@ -180,45 +242,25 @@ mfp_dsp_send_response_str(mfp_processor * proc, int msg_type, char * response)
 void
 mfp_dsp_send_response_bool(mfp_processor * proc, int msg_type, int response)
 {
-    char * msgbuf = mfp_comm_get_buffer();
-    int msglen = 0;
-    char tbuf[MFP_MAX_MSGSIZE];
-    snprintf(tbuf, MFP_MAX_MSGSIZE, "%d", response);
-    mfp_api_dsp_response(proc->rpc_id, tbuf, msg_type, msgbuf, &msglen);
-    mfp_comm_submit_buffer(msgbuf, msglen);
+    response_batch_add(proc->rpc_id, msg_type, PARAMTYPE_BOOL, response);
 }
 
 void
 mfp_dsp_send_response_int(mfp_processor * proc, int msg_type, int response)
 {
-    char * msgbuf = mfp_comm_get_buffer();
-    int msglen = 0;
-    char tbuf[MFP_MAX_MSGSIZE];
-    snprintf(tbuf, MFP_MAX_MSGSIZE, "%d", response);
-    mfp_api_dsp_response(proc->rpc_id, tbuf, msg_type, msgbuf, &msglen);
-    mfp_comm_submit_buffer(msgbuf, msglen);
+    response_batch_add(proc->rpc_id, msg_type, PARAMTYPE_INT, response);
 }
 
 void
 mfp_dsp_send_response_float(mfp_processor * proc, int msg_type, double response)
 {
-    char * msgbuf = mfp_comm_get_buffer();
-    int msglen = 0;
-    char tbuf[MFP_MAX_MSGSIZE];
-    snprintf(tbuf, MFP_MAX_MSGSIZE, "%f", response);
-    mfp_api_dsp_response(proc->rpc_id, tbuf, msg_type, msgbuf, &msglen);
-    mfp_comm_submit_buffer(msgbuf, msglen);
+    response_batch_add(proc->rpc_id, msg_type, PARAMTYPE_FLT, response);
 }
 
 
 void
 mfp_dsp_send_patch_response_float(int patch_id, int msg_type, double response)
 {
-    char * msgbuf = mfp_comm_get_buffer();
-    int msglen = 0;
-    char tbuf[MFP_MAX_MSGSIZE];
-    snprintf(tbuf, MFP_MAX_MSGSIZE, "%f", response);
-    mfp_api_dsp_response(patch_id, tbuf, msg_type, msgbuf, &msglen);
-    mfp_comm_submit_buffer(msgbuf, msglen);
+    response_batch_add(patch_id, msg_type, PARAMTYPE_FLT, response);
 }
 
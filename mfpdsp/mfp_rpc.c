@@ -693,3 +693,14 @@ mfp_rpc_args_append_double(mfp_rpc_args * arglist, double value) {
 
     arglist->n_items += 1;
 }
+
+void
+mfp_rpc_args_append_bytes(mfp_rpc_args * arglist, const char * value, int len) {
+    int prev_count = arglist->n_items;
+
+    arglist->items[prev_count]->value_types_case = CARP__PYTHON_VALUE__VALUE_TYPES__BYTES;
+    arglist->items[prev_count]->_bytes.data = (uint8_t *)value;
+    arglist->items[prev_count]->_bytes.len = len;
+
+    arglist->n_items += 1;
+}
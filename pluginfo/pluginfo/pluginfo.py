@@ -6,8 +6,14 @@ Python package using C extension to dig info about plugins
 '''
 
 import _pluginfo
+import json
+import multiprocessing
 import os 
 import math 
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
 def splitpath(p):
     parts = p.split(":")
@@ -27,44 +33,233 @@ def splitpath(p):
             prefix = None 
     return unescaped 
 
+# in a worker process, where scan_library() reports each library
+# it starts on
+_started = None
+
+def init_worker(started):
+    global _started
+    _started = started
+
+def scan_library(fullpath):
+    '''
+    (plugins, descriptions) for a LADSPA library, or None if it
+    isn't one. Run in a worker process by PlugInfo.index_ladspa
+    '''
+    if _started is not None:
+        _started.put(fullpath)
+    if not _pluginfo.is_ladspa(fullpath):
+        return None
+    plugs = _pluginfo.list_plugins(fullpath)
+    return (
+        [list(p) for p in plugs],
+        [_pluginfo.describe_plugin(p[0], p[1]) for p in plugs]
+    )
+
+
 class PlugInfo (object): 
 
     LADSPA_PATH_DEFAULT="%s/.ladspa:/usr/local/lib/ladspa:/usr/lib/ladspa"
+    CACHE_VERSION = 1
+
+    # seconds from the start of a scan to give up on libraries that
+    # haven't finished
+    SCAN_TIMEOUT = 30
 
-    def __init__ (self): 
+    def __init__ (self, cache_path=None): 
         self.plugindirs = [] 
         self.libinfo = {} 
         self.pluginfo = {} 
+        self.failed = []
         self.samplerate = 44100
+        self.cache_path = cache_path
+        self.index_done = False
+        self.indexed = threading.Condition()
         const = _pluginfo.get_constants()
         for k, v in const.items():
             setattr(self, k, v)
 
+    @staticmethod
+    def default_cache_path():
+        cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+            os.environ.get("HOME", "~"), ".cache"
+        )
+        return os.path.join(cache_home, "mfp", "ladspa-index.json")
+
+    def load_cache(self):
+        if not self.cache_path:
+            return {}
+        try:
+            with open(self.cache_path) as cachefile:
+                cache = json.load(cachefile)
+        except (OSError, ValueError):
+            return {}
+        if cache.get("version") != self.CACHE_VERSION:
+            return {}
+        return cache.get("libraries", {})
+
+    def save_cache(self, libraries):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp"
+            with open(tmp_path, "w") as cachefile:
+                json.dump(dict(version=self.CACHE_VERSION, libraries=libraries), cachefile)
+            os.replace(tmp_path, self.cache_path)
+        except OSError:
+            pass
+
+    def add_library(self, fullpath, entry):
+        plugins = entry.get("plugins")
+        if not plugins:
+            return
+        with self.indexed:
+            self.libinfo[fullpath] = plugins
+            for p, pinfo in zip(plugins, entry.get("descriptions")):
+                self.pluginfo[p[2].lower()] = pinfo
+            self.indexed.notify_all()
+
     def index_ladspa(self):
+        '''
+        Find the LADSPA plugins on LADSPA_PATH. Libraries are only
+        opened if they are new or have changed since the cached index
+        was written, and then in worker processes
+        '''
         pathenv = os.environ.get("LADSPA_PATH") 
         if not pathenv: 
             pathenv = self.LADSPA_PATH_DEFAULT % os.environ.get("HOME", "~")
-        
-        dirs = splitpath(pathenv)
-        for d in dirs:
-            try: 
-                candidates = os.listdir(d)
-            except:
-                continue 
-
-            for c in candidates: 
-                fullpath = os.path.join(d, c)
-                if _pluginfo.is_ladspa(fullpath):
-                    plugs = _pluginfo.list_plugins(fullpath)
-                    self.libinfo[fullpath] = plugs  
-                    for p in plugs: 
-                        key = p[2].lower()
-                        pinfo = _pluginfo.describe_plugin(p[0], p[1])
-                        self.pluginfo[key] = pinfo
+
+        self.index_done = False
+        try:
+            cached = self.load_cache()
+            libraries = {}
+            to_scan = []
+
+            dirs = splitpath(pathenv)
+            for d in dirs:
+                try: 
+                    candidates = os.listdir(d)
+                except:
+                    continue 
+
+                for c in candidates: 
+                    fullpath = os.path.join(d, c)
+                    try:
+                        st = os.stat(fullpath)
+                    except OSError:
+                        continue
+                    entry = cached.get(fullpath)
+                    if (
+                        entry is not None
+                        and entry.get("mtime") == st.st_mtime
+                        and entry.get("size") == st.st_size
+                    ):
+                        libraries[fullpath] = entry
+                        self.add_library(fullpath, entry)
+                    else:
+                        libraries[fullpath] = dict(mtime=st.st_mtime, size=st.st_size)
+                        to_scan.append(fullpath)
+
+            if to_scan:
+                self.scan_libraries(to_scan, libraries)
+            if to_scan or len(libraries) != len(cached):
+                self.save_cache(libraries)
+        finally:
+            with self.indexed:
+                self.index_done = True
+                self.indexed.notify_all()
+
+    def scan_libraries(self, to_scan, libraries):
+        # a library that crashes its worker breaks the whole pool. The
+        # libraries that were unfinished then are scanned again one at
+        # a time to find the one that did it. Failed libraries (crashed,
+        # or still running at the deadline) aren't tried again until
+        # they change
+        deadline = time.monotonic() + self.SCAN_TIMEOUT
+        workers = min(len(to_scan), os.cpu_count() or 1)
+        retry = self.scan_batch(to_scan, libraries, workers, deadline)
+        while retry:
+            retry = self.scan_batch(retry, libraries, 1, deadline)
+
+    def scan_batch(self, paths, libraries, workers, deadline):
+        '''
+        Scan paths in a pool of worker processes. Returns the paths
+        to scan again because a crash broke the pool
+        '''
+        context = multiprocessing.get_context("spawn")
+        started = context.SimpleQueue()
+        pool = ProcessPoolExecutor(
+            workers, mp_context=context,
+            initializer=init_worker, initargs=(started,)
+        )
+        retry = []
+        timed_out = []
+        try:
+            pending = [
+                (fullpath, pool.submit(scan_library, fullpath))
+                for fullpath in paths
+            ]
+            for fullpath, future in pending:
+                entry = libraries[fullpath]
+                try:
+                    scanned = future.result(max(0, deadline - time.monotonic()))
+                except BrokenProcessPool:
+                    retry.append(fullpath)
+                    continue
+                except TimeoutError:
+                    timed_out.append(fullpath)
+                    continue
+                except Exception:
+                    self.scan_failed(fullpath, entry)
+                    continue
+                if scanned is not None:
+                    entry["plugins"], entry["descriptions"] = scanned
+                    self.add_library(fullpath, entry)
+        finally:
+            # shutdown() would wait for a hung library, so kill the workers
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        if timed_out:
+            # libraries stuck behind hung ones never started; leave them
+            # out of the cache so they are scanned next time
+            was_started = set()
+            while not started.empty():
+                was_started.add(started.get())
+            for fullpath in timed_out:
+                if fullpath in was_started:
+                    self.scan_failed(fullpath, libraries[fullpath])
+                else:
+                    del libraries[fullpath]
+        started.close()
+
+        if workers == 1 and retry:
+            # scanned in order, so the first unfinished library crashed
+            self.scan_failed(retry[0], libraries[retry[0]])
+            retry = retry[1:]
+        return retry
+
+    def scan_failed(self, fullpath, entry):
+        entry["failed"] = True
+        self.failed.append(fullpath)
 
     def find(self, name):
         return self.pluginfo.get(name.lower())
 
+    def wait_for(self, name, timeout=None):
+        '''
+        Find a plugin, waiting for a running index_ladspa() to either
+        reach it or finish
+        '''
+        key = name.lower()
+        with self.indexed:
+            self.indexed.wait_for(
+                lambda: key in self.pluginfo or self.index_done, timeout
+            )
+        return self.find(name)
+
     def port_default(self, portinfo): 
         htype = portinfo.get("hint_type", 0)
         hlower = portinfo.get("hint_lower", 0)